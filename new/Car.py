@@ -1,13 +1,15 @@
-import pygame
-import random as rd
-from settings import *
-pygame.init()
+from lanes import link
 
 
-class Car(pygame.sprite.Sprite):
+class Car:
     """
     Classe permettant de faire apparaître des voitures.
 
+    La voiture ne contient que la logique (IDM et MOBIL), l'affichage est
+    laissé à la fenêtre de visualisation qui observe le moteur. Les
+    paramètres des modèles sont ceux du scénario du moteur, toutes les
+    distances sont en mètre.
+
     ...
 
     Attributes
@@ -21,29 +23,31 @@ class Car(pygame.sprite.Sprite):
     v0 : float
         la vitesse désirée sur la portion de route
     simu : class
-        la simulation qui fait appel à "Car"
-    group :pygame.sprite.Group
-        groupe auquel la voiture appartient
-    x : list
-        ensemble des positions en abscisse
-    time : list
-        ensemble des temps de prélévement des positions
+        le moteur qui fait appel à "Car"
+    scenario : Scenario
+        configuration de la simulation (celle du moteur)
     acceleration : float
         accélération du véhicule
     P : float
         facteur de politesse
+    voies : int
+        nombre de voies à la position de la voiture
+    zone : int
+        indice de la zone de restriction où se trouve la voiture (cf documentation Restrictions)
     pos : list
-        position [x,y]
-    rect : pygame.Rect
-        dimension du véhicule
+        position [x] en mètre (abscisse du milieu de la voiture)
     cooldown_change_line : float
         temps entre chaque changement de ligne
     cooldown_time : float
         temps du dernier changement de voie
-    display_surface : pygame.display
-        fenêtre d'affichage
+    birth : float
+        instant d'apparition de la voiture
+    key : float
+        abscisse de la voiture dans l'index des voies (cf documentation LaneIndex)
     leader : Car
         meneur actuel de la voiture
+    follower : Car
+        suiveur actuel de la voiture (cf documentation link)
     old_leader : Car
         ancien meneur de la voiture
     s : float
@@ -65,13 +69,11 @@ class Car(pygame.sprite.Sprite):
         Donne l'accélération de car en fonction de son meneur (leader).
     move():
         Change la position, vitesse, accélération de la voiture.
-    draw():
-        Permet d'afficher la voiture dans la fenêtre.
     update():
         Actualise à chaque image la voiture.
     """
 
-    def __init__(self, name, road, velocity_init, v0, simu, group, x=-CAR_DIM[0]*ALPHA/2):
+    def __init__(self, name, road, velocity_init, v0, simu, x=None):
         """
         Construit tous les  attributs nécessaires pour l'objet voiture.
 
@@ -86,42 +88,39 @@ class Car(pygame.sprite.Sprite):
         v0 : float
             la vitesse désirée sur la portion de route
         simu : class
-            la simulation qui fait appelle à "Car"
-        group :pygame.sprite.Group
-            groupe auquel la voiture appartient
+            le moteur qui fait appel à "Car"
         x : float
-            abscisse à l'apparition
+            abscisse à l'apparition en mètre, juste avant le début de la
+            route si None
         """
 
-        super().__init__(group)
-        self.group = group
+        scenario = simu.scenario
+        self.scenario = scenario
+        if x is None:
+            x = - scenario.CAR_LENGTH / 2
+
         self.name = name
         self.velocity = velocity_init
         self.v0 = v0
         self.acceleration = 0  # la voiture n'est pas censée manoeuvrer à l'initialisation
         self.road = road        # il peut aller de 0 à 2
         self.voies = 3
-        self.P = rd.normalvariate(MOYP, SIGMA)  # facteur de politesse
-
-        self.pos = [x, Y_ROAD[road] * ALPHA] # position en mètre
-        self.rect = pygame.Rect(- CAR_DIM[0] / 2, 0, *CAR_DIM)
-        self.rect.center = [x/ALPHA, Y_ROAD[road]]         # position en pixel
+        self.zone = None        # zone de restriction où se trouve la voiture
+        self.P = simu.random.normalvariate(scenario.MOYP, scenario.SIGMA)  # facteur de politesse
 
-        # on enregistre les différentes positions
-        self.x = [self.pos[0]]
-        self.time = [pygame.time.get_ticks() * 1e-3]
+        self.pos = [x] # position en mètre
 
         self.simu = simu # utilisé pour enlever la voiture et avoir dt
 
-        self.cooldown_change_line = 2e3 # temps entre chaque changement de voie
-        self.cooldown_time = pygame.time.get_ticks()
+        self.cooldown_change_line = scenario.COOLDOWN # temps entre chaque changement de voie (s)
+        self.cooldown_time = self.simu.time
+        self.birth = self.simu.time  # pour le temps de parcours
 
-        # différentes fonctions
-        self.display_surface = pygame.display.get_surface()
         # lien avec le leader
         self.leader = None  # leader de la voiture pour le modèle de la voiture suiveuse
+        self.follower = None  # voiture dont on est le leader
         self.old_leader = None
-        self.s = WIDTH * ALPHA
+        self.s = scenario.DISTANCE
 
     def apply_restrictions(self):
         """
@@ -136,11 +135,15 @@ class Car(pygame.sprite.Sprite):
         None
         """
 
-        index = 0
-        while index + 1<len(self.simu.restrictions) and self.pos[0]/ALPHA + CAR_DIM[0]/2 > self.simu.restrictions[index + 1][0]:
-            index +=1
-        self.voies = self.simu.restrictions[index][2]
-        self.v0 = self.simu.restrictions[index][1]
+        zones = self.simu.zones
+        front = self.pos[0] + self.scenario.CAR_LENGTH / 2
+        # on part de la zone du pas précédent, on ne cherche que la première fois
+        if self.zone is None:
+            self.zone = zones.find(front)
+        else:
+            self.zone = zones.advance(self.zone, front)
+        self.voies = zones.lane_list[self.zone]
+        self.v0 = zones.speed_list[self.zone]
 
     def get_other_cars(self, new_road):
         """
@@ -159,24 +162,10 @@ class Car(pygame.sprite.Sprite):
             voiture potentielle qu'on suivrait sur cette nouvelle voie
         """
 
-        cars_sort = self.simu.cars_sort
-
-        indexcar = cars_sort.index(self)
-        ps, pl = None, None
-        i = indexcar
-        # on récupère ps (potentiel suiveur)
-        while i > 0 and (ps is None):
-            i -= 1
-            specimen = cars_sort[i]
-            if specimen.road == new_road:
-                ps = specimen
-        i = indexcar
-        # on récupère pl (potentiel leader)
-        while i + 1< len(cars_sort) and (pl is None):
-            i += 1
-            if cars_sort[i].road == new_road:
-                pl = cars_sort[i]
-        return ps, pl
+        # l'index des voies donne directement les voisines de notre abscisse
+        if self.simu.stats is not None:
+            self.simu.stats.count("neighbor_lookups")
+        return self.simu.lanes.neighbors(self.pos[0], new_road)
 
     def get_all_acceleration(self, new_road, s, l, ps, pl, LvR):
         """
@@ -219,8 +208,9 @@ class Car(pygame.sprite.Sprite):
 
         ca = self.get_acceleration(self, l)
         tca = self.get_acceleration(self, pl)
+        vcrit = self.scenario.VCRIT
         # modèle MOBIL symétrique
-        if SYMETRIQUE:
+        if self.scenario.SYMETRIQUE:
             if s is None:
                 sa = 0
                 tsa = 0
@@ -248,7 +238,7 @@ class Car(pygame.sprite.Sprite):
             else:
                 tpsa = self.get_acceleration(ps, self)
 
-            if l is None or self.velocity <= l.velocity or l.velocity <= VCRIT:
+            if l is None or self.velocity <= l.velocity or l.velocity <= vcrit:
                 tceura =tca
             else:
                 tceura = min(tca, ca)
@@ -263,7 +253,7 @@ class Car(pygame.sprite.Sprite):
                 psa = self.get_acceleration(ps, pl)
                 tpsa = self.get_acceleration(ps, self)
 
-            if pl is None or self.velocity <= pl.velocity or pl.velocity <= VCRIT:
+            if pl is None or self.velocity <= pl.velocity or pl.velocity <= vcrit:
                 ceura =ca
             else:
                 ceura = min(tca, ca)
@@ -291,44 +281,46 @@ class Car(pygame.sprite.Sprite):
             s'il y a un changement de voie ou non
         """
 
+        if self.simu.stats is not None:
+            self.simu.stats.count("lane_tests")
         ps, pl = self.get_other_cars(new_road)
+        sc = self.scenario
+        length = sc.CAR_LENGTH
 
         # on récupère la position de tps et ts
         if ps is None:
-            pspos = - CAR_DIM[0] * ALPHA
+            pspos = - length
         else:
             pspos = ps.pos[0]
         if pl is None:
-            plpos = DISTANCE + CAR_DIM[0] * ALPHA
+            plpos = sc.DISTANCE + length
         else:
             plpos = pl.pos[0]
 
         # on regarde si les dimensions des voitures permettent le changement de voie
-        if self.pos[0] - pspos <= CAR_DIM[0]*ALPHA or plpos - self.pos[0] <= CAR_DIM[0]*ALPHA:
+        if self.pos[0] - pspos <= length or plpos - self.pos[0] <= length:
             return False
 
 
-        if SYMETRIQUE:
+        if sc.SYMETRIQUE:
             # pour route symétrique (ex: Amérique)
             tca, ca, tpsa, psa, tsa, sa =self.get_all_acceleration(new_road, s, l, ps, pl, LvR)
-            change = tpsa >= - Bsafe and (tca - ca +P * ((tpsa - psa) + (tsa - sa)) > Dath)
+            change = tpsa >= - sc.Bsafe and (tca - ca + self.P * ((tpsa - psa) + (tsa - sa)) > sc.Dath)
 
         else:
             # pour route asymétrique (ex: France)
             if LvR: # de la gauche vers la droite
                 tpsa, tceura, ca, tsa, sa= self.get_all_acceleration(new_road, s, l, ps, pl, LvR)
-                change = tpsa >= - Bsafe and (tceura - ca + self.P * (tsa - sa) > Dath - Dabias)
+                change = tpsa >= - sc.Bsafe and (tceura - ca + self.P * (tsa - sa) > sc.Dath - sc.Dabias)
             else:   # de la droite vers la gauche
                 tca, ceura, tpsa, psa = self.get_all_acceleration(new_road, s, l, ps, pl, LvR)
-                change = tpsa >= - Bsafe and (tca - ceura + self.P * (tpsa - psa) > Dath + Dabias)
+                change = tpsa >= - sc.Bsafe and (tca - ceura + self.P * (tpsa - psa) > sc.Dath + sc.Dabias)
 
         if change:
             # on fait le changement des meneurs des différents véhicules
-            self.leader = pl
-            if not(ps is None):
-                ps.leader = self
-            if not(s is None):
-                s.leader = l
+            link(self, pl)
+            link(ps, self)
+            link(s, l)
         return change
 
     def change_line(self):
@@ -347,19 +339,16 @@ class Car(pygame.sprite.Sprite):
         # si notre meneur a changé de voie on prend un temps d'observation
         if self.leader != self.old_leader:
             self.old_leader = self.leader
-            self.cooldown_time = pygame.time.get_ticks()
+            self.cooldown_time = self.simu.time
 
         # on regarde si on peut changer de voie
-        if self.voies!=1 and pygame.time.get_ticks()-self.cooldown_time> self.cooldown_change_line:
+        if self.voies!=1 and self.simu.time - self.cooldown_time > self.cooldown_change_line:
 
             change = False
             # on récupère notre meneur
             l = self.leader
             # on récupère la personne qui nous suit
-            s = None
-            for car in self.simu.cars_sort:
-                if car.leader == self:
-                    s = car
+            s = self.follower
             road = self.road
             # on teste les deux voies si on est au centre
             if self.road == 1:
@@ -383,10 +372,8 @@ class Car(pygame.sprite.Sprite):
                 road = 1
                 change = True
             if change:
-                self.cooldown_time = pygame.time.get_ticks()
-                self.road = road
-                self.pos[1] = Y_ROAD[road]*ALPHA
-                self.rect.centery = Y_ROAD[road]
+                self.cooldown_time = self.simu.time
+                self.simu.lanes.move(self, road)
                 self.simu.change_line()
 
     def get_acceleration(self, car, leader):
@@ -409,17 +396,18 @@ class Car(pygame.sprite.Sprite):
         if car is None:
             return 0
 
+        sc = self.scenario
         # on calcule le "s" et le "s*" de la formule
         if leader is None:  # cas où le meneur est loin
             deltav = 0
-            car.s = DISTANCE  # correspond à dire que son meneur est loin
-            setoile = S0
+            car.s = sc.DISTANCE  # correspond à dire que son meneur est loin
+            setoile = sc.S0
         else:
             deltav = car.velocity - leader.velocity
-            car.s = leader.pos[0] - car.pos[0] - CAR_DIM[0] * ALPHA  # on remet en mètre
-            setoile = S0 + max(0, car.velocity * (T + deltav * INVERTED2SQRTAB))
+            car.s = leader.pos[0] - car.pos[0] - sc.CAR_LENGTH  # distance entre les deux pare-chocs
+            setoile = sc.S0 + max(0, car.velocity * (sc.T + deltav * sc.INVERTED2SQRTAB))
 
-        return max(MB, A * (1 - (car.velocity / car.v0) ** D - (setoile / car.s) ** 2))
+        return max(sc.MB, sc.A * (1 - (car.velocity / car.v0) ** sc.D - (setoile / car.s) ** 2))
 
     def move(self):
         """
@@ -436,38 +424,17 @@ class Car(pygame.sprite.Sprite):
 
         dt = self.simu.dt
         # on fait bouger la position
-        self.pos[0] = self.pos[0] + self.velocity * dt / ALPHA + (self.acceleration * dt ** 2) / 2
+        self.pos[0] = self.pos[0] + self.velocity * dt + (self.acceleration * dt ** 2) / 2
+        self.simu.lanes.update(self)
         # puis la vitesse
         self.velocity = max(0,self.velocity + self.acceleration * dt)
         # et enfin l'accélération
         self.acceleration = self.get_acceleration(self, self.leader)
-        # on applique la position au rectangle associé
-        self.rect.centerx = self.pos[0] / ALPHA
-        # et on ajoute la dernière position dans la liste pour la visualiser
-        self.x.append(self.pos[0])
-        self.time.append(pygame.time.get_ticks() * 1e-3)
 
-        if self.rect.topleft[0] > WIDTH:
+        # la voiture est sortie quand son arrière dépasse le bout de la route
+        if self.pos[0] - self.scenario.CAR_LENGTH / 2 > self.scenario.DISTANCE:
             self.simu.remove(self)
 
-    def draw(self):
-        """
-        Permet d'afficher la voiture dans la fenêtre.
-
-        Parameters
-        ----------
-        None
-
-        Returns
-        -------
-        None
-        """
-
-        if self.name == "end":
-            pygame.draw.rect(self.display_surface, COLOR['end'], self.rect)
-        else:
-            pygame.draw.rect(self.display_surface, COLOR['car'], self.rect)
-
     def update(self):
         """
         Actualise à chaque image la voiture.
@@ -484,5 +451,4 @@ class Car(pygame.sprite.Sprite):
         if self.name != "end":
             self.apply_restrictions()
             self.change_line()
-            self.move()
-        self.draw()
\ No newline at end of file
+            self.move()
\ No newline at end of file
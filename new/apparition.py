@@ -1,67 +1,238 @@
-import pandas as pd
+import argparse
 import numpy as np
-import matplotlib.pyplot as plt
-
-
-# on lit le fichier csv
-location = pd.read_csv("location.csv" , delimiter =";")
-
-
-# on convertit le dataframe en un fichier numpy
-X = location.to_numpy()
-
-# tableau multidimensionnel vide
-# L'élément Y[a,b,:] de Y contiendra le tableau de nombres situé en X[a,b]
-Y = np.ndarray((X.shape[0],X.shape[1],3))
-
-# tableau de densité
-densite = np.zeros(X.shape[0])
-
-"""
-la variable data contient pour chaque véhicule :
- - la frame d'apparition
- - la vitesse instannée lors de l'apparition
- - la voie sur laquelle elle se trouve lors de l'apparition
- - le 1er véhicule sera supprimé car hors champ
-"""
-
-data = np.zeros((3,X.shape[1]-1))
-
-for j in range(0,X.shape[1]):
-    retour = False
-    apparition = False      # la voiture est-elle déjà à l'écran
-    for i in range(0,X.shape[0]):
-        txt = (X[i,j].strip("[]")).split(",")
-        abscisse = float(txt[0])
-        cote = float(txt[2])
-        marge = 123
-
-        if abscisse < 5 :
-            Y[i,j,:] = [0,0,0]
-
-        elif cote >1 or abscisse > marge or retour:
-            Y[i,j,:] = [marge+30,j,0]
-            retour = True
-
-        elif not(retour) and abscisse <= marge:
-            Y[i,j,:] = [float(txt[0]),float(txt[1]),float(txt[2])]
-            densite[i] = densite[i] + 1
-            # on met j>0 pour supprimer le véhicule 0 qui est hors champ
-            # puis on décale tout d'une unité
-            if not(apparition) and Y[i-1,j,0] != 0 and j >0:
-                data[0,j-1] = int(i-1)
-                data[1,j-1] = 30 * (Y[i,j,0] - Y[i-1,j,0])
-                if Y[i-1,j,1] < 5 :
-                    data[2,j-1] = 0 # voie 0
-                elif Y[i-1,j,1] < 8.5:
-                    data[2,j-1] = 1 # voie 1
-                else :
-                    data[2,j-1] = 2 # voie 2
-                apparition = True
-        else :
-            Y[i,j,:] = [marge+30,j,0]
-            retour = True
-
-
-
-
+from tracks import CHUNK, read_chunks
+
+
+# abscisse en dessous de laquelle la voiture n'est pas encore dans le champ
+ENTREE = 5
+# abscisse au-delà de laquelle la voiture est sortie du champ
+MARGE = 123
+# ordonnées séparant les voies 0, 1 et 2
+VOIES = (5, 8.5)
+# images par seconde de la vidéo
+FPS = 30
+# images ignorées au début : l'ancienne lecture avec pandas prenait la première ligne pour un en-tête
+SKIP = 1
+
+
+class Extraction:
+    """
+    Extraction des apparitions des voitures, image par image ou par morceaux.
+
+    Tout est calculé par opérations sur les tableaux, avec les mêmes règles
+    que la boucle image par image d'origine :
+     - une voiture avant ENTREE est hors champ : position (0, 0, 0)
+     - dès qu'elle dépasse MARGE ou que z > 1 elle est sortie pour de bon :
+       position (MARGE + 30, j, 0) sauf si elle repasse avant ENTREE
+     - sinon elle est visible et compte dans la densité
+    Une voiture apparaît à la première image visible dont l'image précédente
+    n'était pas avant ENTREE. Le véhicule 0 est hors champ et n'est pas gardé.
+    L'état de chaque voiture (sortie, dernière image vue, apparition) est
+    gardé d'un morceau à l'autre : on n'a jamais toute la capture en mémoire.
+
+    ...
+
+    Attributes
+    ----------
+    frames : int
+        nombre d'images traitées
+    retour : numpy.ndarray
+        True pour les voitures sorties pour de bon
+    last : numpy.ndarray
+        coordonnées de la dernière image traitée (None au début)
+    found : numpy.ndarray
+        True pour les voitures dont l'apparition est trouvée
+    data : numpy.ndarray
+        (3, véhicules) : image d'apparition, vitesse d'apparition en m/s et
+        voie de chaque voiture (0 si elle n'apparaît jamais)
+    densite : list
+        nombre de voitures visibles à chaque image, par morceau
+
+    Methods
+    -------
+    feed(P):
+        Traite un morceau d'images.
+    result():
+        Donne la densité et les apparitions.
+    """
+
+    def __init__(self, vehicles):
+        """
+        Construit tous les  attributs nécessaires pour l'extraction.
+
+        Parameters
+        ----------
+        vehicles : int
+            nombre de véhicules de la capture
+        """
+
+        self.frames = 0
+        self.retour = np.zeros(vehicles, bool)
+        self.last = None
+        self.found = np.zeros(vehicles, bool)
+        self.data = np.zeros((3, vehicles))
+        self.densite = []
+
+    def feed(self, P):
+        """
+        Traite un morceau d'images.
+
+        Parameters
+        ----------
+        P : numpy.ndarray
+            tableau (images, véhicules, 3) des coordonnées du morceau
+
+        Returns
+        -------
+        numpy.ndarray
+            positions gardées du morceau, même forme que P
+        """
+
+        x, y, z = P[:, :, 0], P[:, :, 1], P[:, :, 2]
+        entered = x >= ENTREE
+        # une fois sortie la voiture ne revient plus
+        retour = np.logical_or.accumulate(entered & ((z > 1) | (x > MARGE)), axis=0) | self.retour
+        visible = entered & ~retour
+        gone = entered & retour
+
+        Y = np.zeros(P.shape)
+        Y[visible] = P[visible]
+        Y[:, :, 0][gone] = MARGE + 30
+        Y[:, :, 1][gone] = np.broadcast_to(np.arange(P.shape[1]), gone.shape)[gone]
+        self.densite.append(visible.sum(axis=1).astype(np.float64))
+
+        # première image visible précédée d'une image où la voiture était déjà entrée,
+        # l'image précédant le morceau est la dernière du morceau d'avant
+        before = P[:0] if self.last is None else self.last[None]
+        previous = np.concatenate((before, P[:-1]))
+        appear = visible[len(P) - len(previous):] & (previous[:, :, 0] >= ENTREE)
+        appear[:, 0] = False
+        appear[:, self.found] = False
+        new = appear.any(axis=0)
+        if new.any():
+            j = np.nonzero(new)[0]
+            i = appear[:, j].argmax(axis=0)
+            first = len(P) - len(previous)
+            self.data[0, j] = self.frames + first + i - 1
+            self.data[1, j] = FPS * (x[first + i, j] - previous[i, j, 0])
+            self.data[2, j] = np.searchsorted(VOIES, previous[i, j, 1], side="right")
+            self.found |= new
+
+        self.retour = retour[-1]
+        self.last = P[-1]
+        self.frames += len(P)
+        return Y
+
+    def result(self):
+        """
+        Donne la densité et les apparitions.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        densite : numpy.ndarray
+            nombre de voitures visibles à chaque image
+        data : numpy.ndarray
+            (3, véhicules - 1) : image d'apparition, vitesse et voie de
+            chaque voiture, sans le véhicule 0
+        """
+
+        densite = np.concatenate(self.densite) if self.densite else np.zeros(0)
+        return densite, self.data[:, 1:]
+
+
+def extract(P):
+    """
+    Calcule les positions gardées, la densité et les apparitions des voitures.
+
+    Parameters
+    ----------
+    P : numpy.ndarray
+        tableau (images, véhicules, 3) de toutes les coordonnées
+
+    Returns
+    -------
+    Y : numpy.ndarray
+        positions gardées, même forme que P
+    densite : numpy.ndarray
+        nombre de voitures visibles à chaque image
+    data : numpy.ndarray
+        (3, véhicules - 1) : image d'apparition, vitesse et voie
+    """
+
+    extraction = Extraction(P.shape[1])
+    Y = extraction.feed(P)
+    return (Y,) + extraction.result()
+
+
+def extract_file(path, chunk=CHUNK, skip=SKIP):
+    """
+    Calcule la densité et les apparitions d'un fichier, morceau par morceau.
+
+    Parameters
+    ----------
+    path : str
+        positions au format binaire de position.py ou au format texte
+    chunk : int
+        nombre d'images lues à la fois
+    skip : int
+        nombre d'images ignorées au début
+
+    Returns
+    -------
+    densite : numpy.ndarray
+        nombre de voitures visibles à chaque image
+    data : numpy.ndarray
+        (3, véhicules - 1) : image d'apparition, vitesse et voie
+    """
+
+    extraction = None
+    for P in read_chunks(path, chunk, skip):
+        if extraction is None:
+            extraction = Extraction(P.shape[1])
+        extraction.feed(P)
+    if extraction is None:
+        raise ValueError(f"{path} ne contient aucune image")
+    return extraction.result()
+
+
+def write(data, path="assets/apparition.csv"):
+    """
+    Écrit le fichier d'apparition lu par schedule.load.
+
+    Parameters
+    ----------
+    data : numpy.ndarray
+        (3, voitures) : image d'apparition, vitesse et voie
+    path : str
+        chemin du fichier
+
+    Returns
+    -------
+    None
+    """
+
+    rows = (
+        ",".join(str(int(t)) for t in data[0]),
+        ",".join(repr(float(v)) for v in data[1]),
+        ",".join(str(int(r)) for r in data[2]),
+    )
+    with open(path, "w", newline="\r\n") as f:
+        for row in rows:
+            f.write(row + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extrait les apparitions des voitures des positions de Blender.")
+    parser.add_argument("--location", default="location.bin",
+                        help="positions exportées par position.py (binaire, ou texte de l'ancienne version)")
+    parser.add_argument("--out", default="assets/apparition.csv", help="fichier d'apparition écrit")
+    parser.add_argument("--chunk", type=int, default=CHUNK, help="nombre d'images lues à la fois")
+    parser.add_argument("--skip", type=int, default=SKIP, help="nombre d'images ignorées au début")
+    args = parser.parse_args()
+
+    densite, data = extract_file(args.location, args.chunk, args.skip)
+    write(data, args.out)
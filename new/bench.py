@@ -0,0 +1,292 @@
+import argparse
+import cProfile
+import json
+import os
+import platform
+import pstats
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+from config import Scenario
+from engine import Engine
+from vector import VectorEngine
+
+
+ENGINES = {"object": Engine, "vector": VectorEngine}
+# pas de calendrier d'apparition : toutes les voitures sont placées au début
+NO_DEMAND = {"time": (), "speed": (), "road": ()}
+# fonctions dont le temps cumulé donne chaque phase d'un pas (fichier, fonction)
+PHASES = {
+    "spawn": (("engine.py", "spawn"), ("vector.py", "spawn")),
+    "restrictions": (("Car.py", "apply_restrictions"), ("vector.py", "apply_restrictions")),
+    "mobil": (("Car.py", "change_line"), ("vector.py", "change_lines")),
+    "idm": (("Car.py", "move"), ("vector.py", "integrate"), ("vector.py", "update_acceleration")),
+}
+# fonctions de rangement appelées depuis une phase, comptées à part
+BOOKKEEPING = {"idm": (("lanes.py", "update"), ("engine.py", "remove"))}
+
+
+def build(kind, vehicles, density, seed):
+    """
+    Construit un moteur dont la route est déjà remplie de voitures.
+
+    Les voitures sont réparties régulièrement sur les 3 voies et roulent à
+    la vitesse désirée, la longueur de la route donne la densité voulue.
+
+    Parameters
+    ----------
+    kind : str
+        "object" (Engine) ou "vector" (VectorEngine)
+    vehicles : int
+        nombre de voitures
+    density : float
+        nombre de voitures par km (toutes voies confondues)
+    seed : int
+        graine du hasard
+
+    Returns
+    -------
+    BaseEngine
+        moteur prêt à avancer
+    """
+
+    length = vehicles / density * 1000
+    scenario = Scenario(DISTANCE=length, RESTRICTIONS=[(0, Scenario().V0, 3)], RECORD_MODE="off")
+    engine = ENGINES[kind](scenario, NO_DEMAND, seed=seed)
+    lane = np.arange(vehicles) % 3
+    spacing = 3 * length / vehicles
+    # les voies sont décalées d'un tiers d'espacement pour ne pas avoir des voitures côte à côte
+    x = (np.arange(vehicles) // 3 + lane / 3) * spacing
+    engine.place(x, lane, np.full(vehicles, scenario.V0))
+    return engine
+
+
+def count(engine):
+    """Nombre de voitures sur la route (fins de voie comprises)."""
+
+    return len(engine.cars) if isinstance(engine, Engine) else len(engine.fleet)
+
+
+def timing(engine, steps):
+    """
+    Mesure la vitesse de la simulation.
+
+    Parameters
+    ----------
+    engine : BaseEngine
+        moteur à faire avancer
+    steps : int
+        nombre de pas mesurés
+
+    Returns
+    -------
+    dict
+        durée, pas par seconde et mises à jour de voiture par seconde
+    """
+
+    updates = 0
+    start = time.perf_counter()
+    for _ in range(steps):
+        updates += count(engine)
+        engine.step()
+    seconds = time.perf_counter() - start
+    return {"seconds": seconds, "steps_per_s": steps / seconds, "updates_per_s": updates / seconds}
+
+
+def memory(build_engine, steps):
+    """
+    Mesure la mémoire maximale utilisée par un moteur (en Mo).
+
+    La mémoire des tableaux NumPy est aussi suivie par tracemalloc.
+
+    Parameters
+    ----------
+    build_engine : callable
+        fonction sans argument qui construit le moteur
+    steps : int
+        nombre de pas
+
+    Returns
+    -------
+    float
+        mémoire maximale allouée pour construire le moteur et faire les pas
+    """
+
+    tracemalloc.start()
+    build_engine().run(steps)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 2 ** 20
+
+
+def phases(engine, steps):
+    """
+    Répartit le temps d'un pas entre les phases avec cProfile.
+
+    Parameters
+    ----------
+    engine : BaseEngine
+        moteur à faire avancer
+    steps : int
+        nombre de pas profilés
+
+    Returns
+    -------
+    dict
+        part du temps de chaque phase ("spawn", "restrictions", "mobil",
+        "idm", et "bookkeeping" pour le reste : index, sorties, horloge...)
+    """
+
+    profile = cProfile.Profile()
+    profile.runcall(engine.run, steps)
+    stats = pstats.Stats(profile).stats
+    cumulated = {}
+    for (path, _, name), (_, _, _, cumtime, _) in stats.items():
+        key = (os.path.basename(path), name)
+        cumulated[key] = cumulated.get(key, 0) + cumtime
+    total = sum(cumtime for (path, _, name), (_, _, _, cumtime, _) in stats.items()
+                if os.path.basename(path) in ("engine.py", "vector.py") and name == "step")
+    shares = {}
+    for phase, roots in PHASES.items():
+        shares[phase] = sum(cumulated.get(root, 0) for root in roots)
+        shares[phase] -= sum(cumulated.get(nested, 0) for nested in BOOKKEEPING.get(phase, ()))
+    shares["bookkeeping"] = total - sum(shares.values())
+    return {phase: value / total for phase, value in shares.items()}
+
+
+def run_case(kind, vehicles, density, steps, warmup, seed):
+    """
+    Mesure un moteur sur un cas (temps, mémoire et phases).
+
+    Chaque mesure part d'un moteur neuf pour que les autres ne la faussent
+    pas. Les voitures placées attendent COOLDOWN secondes avant de pouvoir
+    changer de voie, "warmup" doit donc dépasser ce temps pour mesurer MOBIL.
+
+    Parameters
+    ----------
+    kind : str
+        "object" ou "vector"
+    vehicles : int
+        nombre de voitures
+    density : float
+        nombre de voitures par km
+    steps : int
+        nombre de pas mesurés
+    warmup : int
+        nombre de pas avant la mesure du temps
+    seed : int
+        graine du hasard
+
+    Returns
+    -------
+    dict
+        résultats du cas
+    """
+
+    result = {"engine": kind, "vehicles": vehicles, "density": density,
+              "length": vehicles / density * 1000, "steps": steps}
+    start = time.perf_counter()
+    engine = build(kind, vehicles, density, seed)
+    result["build_s"] = time.perf_counter() - start
+
+    def warm():
+        engine = build(kind, vehicles, density, seed)
+        engine.run(warmup)
+        return engine
+
+    engine.run(warmup)
+    result.update(timing(engine, steps))
+    result["peak_mb"] = memory(warm, steps)
+    result["phases"] = phases(warm(), steps)
+    return result
+
+
+def metadata():
+    """Description de la machine et de la version du code mesuré."""
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ""
+    return {"commit": commit, "python": platform.python_version(), "numpy": np.__version__,
+            "machine": platform.platform(), "date": time.strftime("%Y-%m-%d %H:%M:%S")}
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare des résultats à une référence et donne les régressions.
+
+    Parameters
+    ----------
+    results : list
+        résultats mesurés
+    baseline : list
+        résultats de référence
+    tolerance : float
+        baisse relative de pas par seconde tolérée
+
+    Returns
+    -------
+    list
+        description de chaque régression
+    """
+
+    reference = {(r["engine"], r["vehicles"], r["density"]): r for r in baseline}
+    regressions = []
+    for result in results:
+        old = reference.get((result["engine"], result["vehicles"], result["density"]))
+        if old is None:
+            continue
+        ratio = result["steps_per_s"] / old["steps_per_s"]
+        if ratio < 1 - tolerance:
+            regressions.append(f"{result['engine']} {result['vehicles']} voitures {result['density']}/km : "
+                               f"{old['steps_per_s']:.1f} -> {result['steps_per_s']:.1f} pas/s ({ratio:.0%})")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Banc d'essai de la vitesse de simulation.")
+    parser.add_argument("--engines", nargs="+", choices=tuple(ENGINES), default=list(ENGINES))
+    parser.add_argument("--vehicles", nargs="+", type=int, default=[100, 1000, 10000, 100000])
+    parser.add_argument("--density", nargs="+", type=float, default=[15, 45],
+                        help="voitures par km, toutes voies confondues")
+    parser.add_argument("--steps", type=int, default=20, help="nombre de pas mesurés")
+    parser.add_argument("--warmup", type=int, default=70,
+                        help="nombre de pas avant de mesurer (plus que COOLDOWN pour mesurer MOBIL)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-object", type=int, default=10000,
+                        help="nombre maximal de voitures pour le moteur objet (trop lent au-delà)")
+    parser.add_argument("--out", help="fichier JSON des résultats")
+    parser.add_argument("--compare", help="fichier JSON de référence")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="baisse relative tolérée")
+    args = parser.parse_args()
+
+    results = []
+    for vehicles in args.vehicles:
+        for density in args.density:
+            for kind in args.engines:
+                if kind == "object" and vehicles > args.max_object:
+                    continue
+                result = run_case(kind, vehicles, density, args.steps, args.warmup, args.seed)
+                results.append(result)
+                shares = " ".join(f"{phase} {share:.0%}" for phase, share in result["phases"].items())
+                print(f"{kind:6} {vehicles:7} voitures {density:5.0f}/km : {result['steps_per_s']:9.1f} pas/s "
+                      f"{result['updates_per_s']:11.0f} voitures/s {result['peak_mb']:8.1f} Mo   {shares}",
+                      file=sys.stderr)
+
+    report = {"meta": metadata(), "results": results}
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f)["results"], args.tolerance)
+        for line in regressions:
+            print("régression :", line, file=sys.stderr)
+        if regressions:
+            sys.exit(1)
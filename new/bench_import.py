@@ -0,0 +1,81 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+
+# modules du cœur de la simulation, qui ne doivent charger que NumPy et la bibliothèque standard
+# (tous sauf main.py, display.py et position.py, qui servent à l'affichage)
+CORE = ("settings", "config", "Car", "clock", "lanes", "restrictions", "apparition", "tracks", "demand",
+        "schedule", "engine", "vector", "domain", "recorder", "store", "raster", "stats", "sweep", "ensemble")
+# modules de l'affichage, qui ne doivent être chargés que par la visualisation
+DISPLAY = ("pygame", "pyautogui", "matplotlib")
+
+# mesuré dans un nouveau processus pour partir d'un cache d'import vide
+SNIPPET = """
+import sys, time, json
+t = time.perf_counter()
+import numpy
+t_numpy = time.perf_counter() - t
+t = time.perf_counter()
+{imports}
+t_core = time.perf_counter() - t
+print(json.dumps({{"numpy": t_numpy, "core": t_core,
+                  "display": sorted(m for m in {display!r} if m in sys.modules)}}))
+"""
+
+
+def measure(modules, repeat=5):
+    """
+    Mesure le temps d'import de modules dans des processus neufs.
+
+    NumPy est importé à part avant les modules : son temps dépend de la
+    machine et pas de ce projet, on le donne séparément.
+
+    Parameters
+    ----------
+    modules : sequence
+        noms des modules à importer
+    repeat : int
+        nombre de processus lancés, on garde la médiane
+
+    Returns
+    -------
+    dict
+        temps médians en milliseconde ("numpy" et "core") et modules
+        d'affichage chargés ("display")
+    """
+
+    code = SNIPPET.format(imports="\n".join(f"import {name}" for name in modules), display=DISPLAY)
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {
+        "numpy": statistics.median(run["numpy"] for run in runs) * 1000,
+        "core": statistics.median(run["core"] for run in runs) * 1000,
+        "display": runs[0]["display"],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Temps d'import du cœur de la simulation.")
+    parser.add_argument("--repeat", type=int, default=5, help="nombre de processus par mesure")
+    parser.add_argument("--limit", type=float, default=100, help="temps maximal en ms (hors NumPy)")
+    parser.add_argument("--json", action="store_true", help="écrit les résultats en JSON")
+    args = parser.parse_args()
+
+    results = {name: measure([name], args.repeat) for name in CORE}
+    results["tout"] = measure(CORE, args.repeat)
+    failed = [name for name, result in results.items() if result["core"] > args.limit or result["display"]]
+
+    if args.json:
+        print(json.dumps(results, indent=4))
+    else:
+        for name, result in results.items():
+            loaded = ", ".join(result["display"]) or "-"
+            print(f"{name:12} {result['core']:7.1f} ms (+ numpy {result['numpy']:6.1f} ms)   affichage chargé : {loaded}")
+    if failed:
+        print(f"trop lent ou affichage chargé : {', '.join(failed)}")
+        sys.exit(1)
@@ -0,0 +1,152 @@
+from time import perf_counter, sleep
+from settings import *
+
+
+class SimClock:
+    """
+    Horloge de simulation à pas fixe.
+
+    Le temps simulé ne dépend que du nombre de pas effectués, deux simulations
+    lancées avec les mêmes données donnent donc les mêmes résultats quelle que
+    soit la charge de la machine. Par défaut l'horloge avance aussi vite que
+    possible, on peut lui demander de suivre le temps réel (ou un multiple de
+    celui-ci) pour la visualisation.
+
+    ...
+
+    Attributes
+    ----------
+    dt : float
+        pas de temps fixe en seconde
+    speed : float
+        nombre de secondes simulées par seconde réelle, aussi vite que
+        possible si None
+    frame : int
+        nombre de pas effectués
+    origin : float
+        instant réel (perf_counter) correspondant à "anchor"
+    anchor : int
+        pas à partir duquel on suit le temps réel
+
+    Methods
+    -------
+    reset():
+        Remet l'horloge à zéro.
+    set_speed(speed):
+        Change la vitesse par rapport au temps réel.
+    tick():
+        Avance l'horloge d'un pas.
+    ticks():
+        Donne le temps simulé en millisecondes.
+    """
+
+    def __init__(self, dt=STEP, speed=None):
+        """
+        Construit tous les  attributs nécessaires pour l'horloge.
+
+        Parameters
+        ----------
+        dt : float
+            pas de temps fixe en seconde
+        speed : float
+            nombre de secondes simulées par seconde réelle, aussi vite que
+            possible si None
+        """
+
+        self.dt = dt
+        self.speed = speed
+        self.reset()
+
+    @property
+    def time(self):
+        """
+        Temps simulé en seconde.
+
+        On le recalcule à partir du nombre de pas pour ne pas accumuler
+        d'erreurs d'arrondi.
+        """
+
+        return self.frame * self.dt
+
+    def reset(self):
+        """
+        Remet l'horloge à zéro.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        self.frame = 0
+        self.origin = None
+        self.anchor = 0
+
+    def set_speed(self, speed):
+        """
+        Change la vitesse par rapport au temps réel.
+
+        Parameters
+        ----------
+        speed : float
+            nombre de secondes simulées par seconde réelle, aussi vite que
+            possible si None
+
+        Returns
+        -------
+        None
+        """
+
+        self.speed = speed
+        self.origin = None
+
+    def tick(self):
+        """
+        Avance l'horloge d'un pas.
+
+        En mode temps réel on attend que l'instant réel corresponde au temps
+        simulé, si on a trop de retard on repart de l'instant actuel au lieu
+        d'essayer de le rattraper.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        self.frame += 1
+        if self.speed is None:
+            return None
+
+        now = perf_counter()
+        if self.origin is None:
+            self.origin = now
+            self.anchor = self.frame
+        delay = self.origin + (self.frame - self.anchor) * self.dt / self.speed - now
+        if delay > 0:
+            sleep(delay)
+        elif delay < - MAX_LAG:
+            self.origin = now
+            self.anchor = self.frame
+
+    def ticks(self):
+        """
+        Donne le temps simulé en millisecondes.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        float
+            temps simulé en millisecondes
+        """
+
+        return self.time * 1e3
@@ -0,0 +1,180 @@
+import json
+import settings
+
+
+# paramètres d'une simulation, avec les mêmes noms que dans settings.py
+FIELDS = (
+    # route
+    "DISTANCE",         # m: longueur de la route
+    "CAR_LENGTH",       # m: longueur d'une voiture
+    "RESTRICTIONS",     # ensemble des (abscisse en m, vitesse en m/s, nombre de voies)
+    "RING",             # route en anneau (densité fixe, sans apparition ni sortie)
+    # IDM
+    "V0", "VCRIT", "T", "S0", "A", "D", "B", "MB",
+    # MOBIL
+    "SYMETRIQUE", "MOYP", "SIGMA", "Bsafe", "Dath", "Dabias", "COOLDOWN",
+    # temps
+    "STEP",             # s: pas de temps fixe
+    "CAPTURE_FPS",      # images par seconde des données d'apparition
+    # apparition des voitures
+    "DEMAND",           # fichier des données d'apparition
+    "CROP",             # nombre de voitures à ignorer au début du fichier
+    "PREFILL",          # véhicules par km et par voie placés au début (cf BaseEngine.prefill)
+    # enregistrement des trajectoires
+    "RECORD_MODE", "RECORD_INTERVAL", "RECORD_CHUNK", "RECORD_PATH",
+    # mesure du temps de chaque phase
+    "STATS", "STATS_INTERVAL",
+)
+
+
+class Scenario:
+    """
+    Configuration complète d'une simulation, passée au moteur.
+
+    Toutes les grandeurs physiques sont en mètre et en seconde, elles ne
+    dépendent pas de la taille de l'écran (c'est la fenêtre qui convertit en
+    pixels pour l'affichage). Les valeurs par défaut sont celles de
+    settings.py. Un scénario ne lit ni l'écran ni le clavier : on peut en
+    créer autant qu'on veut dans un même processus, les envoyer à d'autres
+    processus (pickle) ou les enregistrer en JSON.
+
+    ...
+
+    Attributes
+    ----------
+    DISTANCE, CAR_LENGTH, RESTRICTIONS, V0, ... : object
+        un attribut par nom de FIELDS (cf settings.py)
+    INVERTED2SQRTAB : float
+        1 / (2 * sqrt(A * B)), calculé une fois pour toutes
+
+    Methods
+    -------
+    replace(**values):
+        Donne une copie du scénario avec quelques valeurs changées.
+    to_dict():
+        Donne les valeurs du scénario.
+    from_dict(values):
+        Construit un scénario à partir de ses valeurs.
+    save(path):
+        Écrit le scénario dans un fichier JSON.
+    load(path):
+        Lit un scénario dans un fichier JSON.
+    """
+
+    def __init__(self, **values):
+        """
+        Construit tous les  attributs nécessaires pour le scénario.
+
+        Parameters
+        ----------
+        **values : object
+            valeurs qui changent de celles de settings.py, ex: Scenario(T=1.2)
+        """
+
+        unknown = set(values) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"paramètres inconnus : {sorted(unknown)}")
+        for name in FIELDS:
+            setattr(self, name, values.get(name, getattr(settings, name)))
+        self.RESTRICTIONS = [(float(x), float(v), int(lanes)) for x, v, lanes in self.RESTRICTIONS]
+        # limite le calcul de racines
+        self.INVERTED2SQRTAB = 1 / (2 * (self.A * self.B) ** 0.5)
+
+    def __eq__(self, other):
+        return isinstance(other, Scenario) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        # on n'affiche que ce qui change de settings.py
+        default = Scenario().to_dict()
+        changed = [f"{name}={value!r}" for name, value in self.to_dict().items() if value != default[name]]
+        return f"Scenario({', '.join(changed)})"
+
+    def replace(self, **values):
+        """
+        Donne une copie du scénario avec quelques valeurs changées.
+
+        Parameters
+        ----------
+        **values : object
+            nouvelles valeurs
+
+        Returns
+        -------
+        Scenario
+            nouveau scénario
+        """
+
+        return Scenario(**dict(self.to_dict(), **values))
+
+    def to_dict(self):
+        """
+        Donne les valeurs du scénario.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        dict
+            valeur de chaque nom de FIELDS (types simples, sérialisables en JSON)
+        """
+
+        values = {name: getattr(self, name) for name in FIELDS}
+        values["RESTRICTIONS"] = [list(rest) for rest in self.RESTRICTIONS]
+        return values
+
+    @classmethod
+    def from_dict(cls, values):
+        """
+        Construit un scénario à partir de ses valeurs.
+
+        Parameters
+        ----------
+        values : dict
+            valeurs comme données par "to_dict" (celles qui manquent sont
+            prises dans settings.py)
+
+        Returns
+        -------
+        Scenario
+            nouveau scénario
+        """
+
+        return cls(**values)
+
+    def save(self, path):
+        """
+        Écrit le scénario dans un fichier JSON.
+
+        Parameters
+        ----------
+        path : str
+            chemin du fichier
+
+        Returns
+        -------
+        None
+        """
+
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=4)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Lit un scénario dans un fichier JSON.
+
+        Parameters
+        ----------
+        path : str
+            chemin du fichier
+
+        Returns
+        -------
+        Scenario
+            scénario lu
+        """
+
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
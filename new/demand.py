@@ -0,0 +1,226 @@
+import argparse
+import numpy as np
+from settings import *
+from schedule import load, save_binary
+
+
+# profil de pointe : (fraction de la durée, multiplicateur du débit), interpolé linéairement
+PEAK = ((0, 0.5), (0.3, 0.8), (0.45, 1.6), (0.55, 1.6), (0.7, 0.8), (1, 0.5))
+# plus petite vitesse d'apparition tirée en m/s
+MIN_SPEED = 1.0
+
+
+def fit_speeds(path=DEMAND, crop=CROP):
+    """
+    Ajuste une loi normale des vitesses d'apparition sur chaque voie.
+
+    Parameters
+    ----------
+    path : str
+        données d'apparition mesurées
+    crop : int
+        nombre de voitures à ignorer au début
+
+    Returns
+    -------
+    dict
+        (moyenne, écart type) de la vitesse en m/s pour chaque voie
+    """
+
+    data = load(path, crop)
+    speed = np.asarray(data["speed"], np.float64)
+    road = np.asarray(data["road"])
+    fitted = {}
+    for lane in range(3):
+        values = speed[road == lane] if (road == lane).any() else speed
+        fitted[lane] = (float(values.mean()), float(values.std()))
+    return fitted
+
+
+def arrivals(rate, duration, rng, profile=None):
+    """
+    Tire les instants d'arrivée d'un processus de Poisson.
+
+    Avec un profil le débit varie dans le temps : on tire au débit maximal
+    puis on garde chaque arrivée avec la probabilité débit(t) / maximum.
+
+    Parameters
+    ----------
+    rate : float
+        débit moyen en véhicules par seconde (multiplié par le profil)
+    duration : float
+        durée en seconde
+    rng : numpy.random.Generator
+        générateur de nombres aléatoires
+    profile : sequence
+        (fraction de la durée, multiplicateur) du débit, constant si None
+
+    Returns
+    -------
+    numpy.ndarray
+        instants d'arrivée triés en seconde
+    """
+
+    if rate <= 0 or duration <= 0:
+        return np.zeros(0)
+    peak = 1.0 if profile is None else max(factor for _, factor in profile)
+    top = rate * peak
+    # on tire un peu plus que le nombre moyen pour n'avoir presque jamais à compléter
+    count = int(top * duration + 5 * (top * duration) ** 0.5 + 10)
+    times = np.cumsum(rng.exponential(1 / top, count))
+    while times[-1] < duration:
+        times = np.concatenate((times, times[-1] + np.cumsum(rng.exponential(1 / top, count))))
+    times = times[times < duration]
+    if profile is not None:
+        fraction, factor = np.asarray(profile, np.float64).T
+        keep = rng.random(len(times)) * peak < np.interp(times / duration, fraction, factor)
+        times = times[keep]
+    return times
+
+
+def platoons(rate, duration, rng, size, headway, profile=None):
+    """
+    Tire des arrivées groupées en pelotons.
+
+    Les têtes de peloton arrivent selon un processus de Poisson, chaque
+    peloton a une taille géométrique de moyenne "size" et ses voitures se
+    suivent à "headway" secondes. Le débit moyen reste "rate".
+
+    Parameters
+    ----------
+    rate : float
+        débit moyen en véhicules par seconde
+    duration : float
+        durée en seconde
+    rng : numpy.random.Generator
+        générateur de nombres aléatoires
+    size : float
+        nombre moyen de voitures par peloton (au moins 1)
+    headway : float
+        temps entre deux voitures d'un même peloton en seconde
+    profile : sequence
+        (fraction de la durée, multiplicateur) du débit, constant si None
+
+    Returns
+    -------
+    numpy.ndarray
+        instants d'arrivée triés en seconde
+    """
+
+    heads = arrivals(rate / size, duration, rng, profile)
+    sizes = rng.geometric(1 / size, len(heads))
+    rank = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    times = np.repeat(heads, sizes) + rank * headway
+    return np.sort(times[times < duration])
+
+
+def separate(times, headway):
+    """
+    Retarde les arrivées trop proches d'une même voie.
+
+    Deux voitures ne peuvent pas apparaître à moins de "headway" secondes
+    l'une de l'autre sans se chevaucher. On calcule sans boucle
+    t'_i = max(t_i, t'_(i-1) + headway) = i * headway + max_(j<=i) (t_j - j * headway).
+
+    Parameters
+    ----------
+    times : numpy.ndarray
+        instants d'arrivée triés en seconde
+    headway : float
+        temps minimal entre deux arrivées en seconde
+
+    Returns
+    -------
+    numpy.ndarray
+        instants d'arrivée décalés
+    """
+
+    shift = np.arange(len(times)) * headway
+    return np.maximum.accumulate(times - shift) + shift
+
+
+def generate(flows, duration, pattern="poisson", profile=None, speeds=None, size=4, headway=1.5,
+             min_headway=1.0, fps=CAPTURE_FPS, seed=None):
+    """
+    Génère des données d'apparition synthétiques.
+
+    Le résultat a la même forme que celui de schedule.load : on le donne
+    directement au moteur (Engine(scenario, apparition=generate(...))) ou on
+    l'écrit avec schedule.save_binary.
+
+    Parameters
+    ----------
+    flows : sequence
+        débit de chaque voie (0, 1, 2) en véhicules par heure
+    duration : float
+        durée pendant laquelle les voitures arrivent en seconde
+    pattern : str
+        "poisson" (arrivées indépendantes) ou "platoon" (pelotons)
+    profile : sequence
+        (fraction de la durée, multiplicateur) du débit, PEAK pour une
+        heure de pointe, constant si None
+    speeds : dict
+        (moyenne, écart type) de la vitesse de chaque voie, ajustées sur
+        DEMAND si None
+    size : float
+        nombre moyen de voitures par peloton
+    headway : float
+        temps entre deux voitures d'un peloton en seconde
+    min_headway : float
+        temps minimal entre deux apparitions sur une voie en seconde
+    fps : float
+        images par seconde utilisées pour les instants (cf SpawnSchedule)
+    seed : int
+        graine du générateur
+
+    Returns
+    -------
+    dict
+        "time" (numéro d'image), "speed" (m/s) et "road" de chaque voiture,
+        triés par instant
+    """
+
+    if pattern not in ("poisson", "platoon"):
+        raise ValueError(f"type d'arrivées inconnu : {pattern}")
+    rng = np.random.default_rng(seed)
+    if speeds is None:
+        speeds = fit_speeds()
+    time, speed, road = [], [], []
+    for lane, flow in enumerate(flows):
+        rate = flow / 3600
+        if pattern == "poisson":
+            times = arrivals(rate, duration, rng, profile)
+        else:
+            times = platoons(rate, duration, rng, size, headway, profile)
+        times = separate(times, min_headway)
+        mean, std = speeds[lane]
+        time.append(times)
+        speed.append(np.maximum(rng.normal(mean, std, len(times)), MIN_SPEED))
+        road.append(np.full(len(times), lane, np.int8))
+
+    time, speed, road = np.concatenate(time), np.concatenate(speed), np.concatenate(road)
+    order = np.argsort(time, kind="stable")
+    return {"time": time[order] * fps, "speed": speed[order], "road": road[order]}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Génère des données d'apparition synthétiques.")
+    parser.add_argument("--flow", nargs=3, type=float, default=[1200, 1200, 1200],
+                        help="débit des voies 0, 1 et 2 en véhicules par heure")
+    parser.add_argument("--duration", type=float, default=3600, help="durée en seconde")
+    parser.add_argument("--pattern", choices=("poisson", "platoon"), default="poisson")
+    parser.add_argument("--peak", action="store_true", help="débit variable en heure de pointe (PEAK)")
+    parser.add_argument("--size", type=float, default=4, help="nombre moyen de voitures par peloton")
+    parser.add_argument("--headway", type=float, default=1.5, help="temps entre deux voitures d'un peloton (s)")
+    parser.add_argument("--min-headway", type=float, default=1.0, help="temps minimal entre deux apparitions (s)")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--out", help="fichier binaire écrit (cf schedule.save_binary)")
+    args = parser.parse_args()
+
+    data = generate(args.flow, args.duration, args.pattern, PEAK if args.peak else None, size=args.size,
+                    headway=args.headway, min_headway=args.min_headway, seed=args.seed)
+    counts = np.bincount(data["road"], minlength=3)
+    print(f"{len(data['time'])} voitures ({', '.join(str(c) for c in counts)} par voie), "
+          f"{len(data['time']) / args.duration * 3600:.0f} véhicules par heure")
+    if args.out:
+        save_binary(args.out, data["time"], data["speed"], data["road"])
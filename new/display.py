@@ -0,0 +1,38 @@
+import pygame
+import pyautogui
+from settings import *
+
+# paramètres de la fenêtre de visualisation, importés seulement par main.py :
+# lire la taille de l'écran et charger pygame prend du temps et demande un écran
+pygame.init()
+
+WIDTH, HEIGHT = pyautogui.size()[0], 400
+FPS = 30
+CHECKPOINT = "checkpoint.npz"  # point de reprise écrit avec 's' et relu avec 'l'
+
+ALPHA = DISTANCE / WIDTH    # distance_mètre = ALPHA * distance_pixel
+SIZE_ROAD = int(5 / ALPHA)  # largeur de la route en pixels
+CAR_DIM = (CAR_LENGTH / ALPHA, SIZE_ROAD + 1)  # dimensions d'une voiture ramenées en pixels
+
+
+# y des différentes routes
+Y_ROAD= [HEIGHT // 2 + SIZE_ROAD * 1.5, HEIGHT // 2, HEIGHT // 2 - SIZE_ROAD * 1.5]
+
+# distance pour le repère
+if DISTANCE >=800:
+    DIST_REP = max(1,int(DISTANCE/1000))* 100
+else:
+    DIST_REP = max(1,int(DISTANCE/100)) * 10
+
+# visuel
+COLOR = {
+    'road': (250, 250, 250),
+    'background': (25, 25, 25),
+    'car': (250, 25, 27),
+    'end':(25,27,250),
+    'linechange' : "#606060"
+}
+SLICE = "\n_.~~~~~~~~~~~~~~~~~~~~~---------------~~~~~~~~~~~~~~~~~~~~~._"
+ERREUR = "                         /!\ ERREUR"
+
+FONT = pygame.font.Font(None, 30)
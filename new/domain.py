@@ -0,0 +1,786 @@
+import argparse
+import multiprocessing as mp
+import os
+import random as rd
+import time
+from multiprocessing import shared_memory
+from threading import BrokenBarrierError
+import numpy as np
+from config import Scenario
+from recorder import TrajectoryRecorder
+from schedule import load
+from vector import NO_LEADER, Fleet, VectorEngine, get_leaders, integrate, update_acceleration
+
+
+# colonnes échangées entre processus, toutes rangées en float64 (exact pour les entiers utilisés)
+COLUMNS = tuple(name for name, _ in Fleet.COLUMNS)
+WIDTH = len(COLUMNS)
+# nombre maximal de voitures qui passent d'une portion à la suivante en un pas
+MIGRANTS = 256
+
+
+def layout(count):
+    """
+    Donne la forme des tampons partagés par "count" portions.
+
+    Pour chaque portion :
+     - ghosts[k, phase, côté, voie] : sa voiture la plus en arrière (côté 0)
+       et la plus en avant (côté 1) de chaque voie, avant et après le
+       déplacement (phase 0 et 1), avec une dernière case à 1 si elle existe
+     - migrants[k] : les voitures qui entrent dans la portion suivante
+     - moving[k] : leur nombre
+
+    Parameters
+    ----------
+    count : int
+        nombre de portions
+
+    Returns
+    -------
+    dict
+        forme de chaque tampon
+    """
+
+    return {"ghosts": (count, 2, 2, 3, WIDTH + 1), "migrants": (count, MIGRANTS, WIDTH), "moving": (count,)}
+
+
+def buffers(shm, count):
+    """
+    Vues NumPy sur la mémoire partagée.
+
+    Parameters
+    ----------
+    shm : multiprocessing.shared_memory.SharedMemory
+        mémoire partagée par tous les processus
+    count : int
+        nombre de portions
+
+    Returns
+    -------
+    dict
+        tableau de chaque tampon (cf layout)
+    """
+
+    views = {}
+    offset = 0
+    for name, shape in layout(count).items():
+        size = int(np.prod(shape)) * 8
+        views[name] = np.ndarray(shape, np.float64, shm.buf, offset)
+        offset += size
+    return views
+
+
+class SegmentEngine(VectorEngine):
+    """
+    Moteur vectoriel qui ne fait avancer qu'une portion de la route.
+
+    La portion possède les voitures dont l'abscisse est entre "begin" et
+    "end". À chaque pas elle reçoit des portions voisines des "fantômes" :
+    la voiture la plus proche de chaque voie de part et d'autre de la
+    frontière. Ils sont ajoutés comme des fins de voie (ils ne bougent pas,
+    ne changent pas de voie et ne sont ni enregistrés ni sortis) pour que
+    IDM et MOBIL voient les meneurs et suiveurs de l'autre côté, puis
+    enlevés. Tous les tirages au hasard (fins de voie, voitures placées) sont
+    faits comme pour la route entière pour garder la même suite de nombres.
+
+    ...
+
+    Attributes
+    ----------
+    index : int
+        numéro de la portion
+    begin : float
+        début de la portion en mètre (-inf pour la première)
+    end : float
+        fin de la portion en mètre (+inf pour la dernière)
+    lines : int
+        nombre de fins de voie créées sur toute la route
+    lead_name : numpy.ndarray
+        numéro du meneur de chaque voiture avant le déplacement
+
+    Methods
+    -------
+    initialise(restrictions):
+        Créée tous les attributs à chaque début de simulation.
+    end_line(x, road):
+        Créée une fin de voie si elle est dans la portion.
+    place(x, road, velocity):
+        Place les voitures qui sont dans la portion.
+    spawn():
+        Fait apparaître les voitures, seulement dans la première portion.
+    publish(out):
+        Écrit les voitures au bord de la portion.
+    add_ghosts(behind, ahead):
+        Ajoute les fantômes des portions voisines.
+    move(behind, ahead):
+        Première moitié du pas : changements de voie et déplacement.
+    find_leaders(owned):
+        Retrouve les meneurs gardés par "move".
+    accelerate(behind, ahead):
+        Seconde moitié du pas : nouvelles accélérations et sorties (dernière portion).
+    emigrate(out):
+        Enlève les voitures passées dans la portion suivante.
+    immigrate(rows):
+        Ajoute les voitures venues de la portion précédente.
+    partial():
+        Donne les indicateurs de la portion.
+    """
+
+    def __init__(self, scenario, apparition, index, begin, end, seed):
+        """
+        Construit tous les  attributs nécessaires pour la portion.
+
+        Parameters
+        ----------
+        scenario : Scenario
+            configuration de toute la route
+        apparition : dict
+            données d'apparition de toute la route
+        index : int
+            numéro de la portion
+        begin : float
+            début de la portion en mètre
+        end : float
+            fin de la portion en mètre
+        seed : int
+            graine commune à toutes les portions
+        """
+
+        self.index = index
+        self.begin = begin
+        self.end = end
+        VectorEngine.__init__(self, scenario, apparition, recorder=TrajectoryRecorder("off"), seed=seed)
+
+    def initialise(self, restrictions=None):
+        """
+        Créée tous les attributs à chaque début de simulation.
+
+        Parameters
+        ----------
+        restrictions : list
+            nouvelles restrictions, on garde les précédentes si None
+
+        Returns
+        -------
+        None
+        """
+
+        self.lines = 0
+        self.lead_name = np.zeros(0, np.int64)
+        VectorEngine.initialise(self, restrictions)
+
+    def inside(self, pos):
+        """Indique quelles abscisses sont dans la portion."""
+
+        return (pos >= self.begin) & (pos < self.end)
+
+    def end_line(self, x, road):
+        """
+        Créée une fin de voie si elle est dans la portion.
+
+        Parameters
+        ----------
+        x : float
+            abscisse de la fin de voie en mètre
+        road : int
+            voie sur laquelle on voudrait la positionner
+
+        Returns
+        -------
+        None
+        """
+
+        sc = self.scenario
+        # numéro et facteur de politesse tirés comme pour la route entière
+        name = -1 - self.lines
+        self.lines += 1
+        P = self.random.normalvariate(sc.MOYP, sc.SIGMA)
+        pos = x + sc.CAR_LENGTH / 2
+        if self.inside(pos):
+            self.fleet.add(name=name, road=road, velocity=1, v0=1, voies=3, end=True, pos=pos, P=P,
+                           cooldown_time=self.time, old_leader=NO_LEADER)
+
+    def place(self, x, road, velocity):
+        """
+        Place les voitures qui sont dans la portion.
+
+        Parameters
+        ----------
+        x : sequence
+            abscisse de chaque voiture en mètre
+        road : sequence
+            voie de chaque voiture
+        velocity : sequence
+            vitesse de chaque voiture en m/s
+
+        Returns
+        -------
+        None
+        """
+
+        before = len(self.fleet)
+        VectorEngine.place(self, x, road, velocity)
+        outside = np.zeros(len(self.fleet), bool)
+        outside[before:] = ~self.inside(self.fleet["pos"][before:])
+        self.fleet.remove(outside)
+
+    def spawn(self):
+        """
+        Fait apparaître les voitures, seulement dans la première portion.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        if self.index == 0:
+            VectorEngine.spawn(self)
+
+    def publish(self, out):
+        """
+        Écrit les voitures au bord de la portion.
+
+        Parameters
+        ----------
+        out : numpy.ndarray
+            tampon (côté, voie, colonnes + 1) : la plus en arrière puis la
+            plus en avant de chaque voie
+
+        Returns
+        -------
+        None
+        """
+
+        out[...] = 0
+        fleet = self.fleet
+        pos, road = fleet["pos"], fleet["road"]
+        for lane in range(3):
+            members = np.nonzero(road == lane)[0]
+            if len(members) == 0:
+                continue
+            for side, i in enumerate((members[np.argmin(pos[members])], members[np.argmax(pos[members])])):
+                out[side, lane, :WIDTH] = [fleet[name][i] for name in COLUMNS]
+                out[side, lane, WIDTH] = 1
+
+    def add_ghosts(self, behind, ahead):
+        """
+        Ajoute les fantômes des portions voisines.
+
+        Parameters
+        ----------
+        behind : numpy.ndarray
+            tampon publié par la portion précédente (None s'il n'y en a pas)
+        ahead : numpy.ndarray
+            tampon publié par la portion suivante (None s'il n'y en a pas)
+
+        Returns
+        -------
+        int
+            nombre de voitures de la portion (les fantômes sont après)
+        """
+
+        owned = len(self.fleet)
+        rows = []
+        # les plus en avant de la portion précédente, les plus en arrière de la suivante
+        if behind is not None:
+            rows.append(behind[1])
+        if ahead is not None:
+            rows.append(ahead[0])
+        if rows:
+            rows = np.concatenate(rows)
+            rows = rows[rows[:, WIDTH] == 1]
+            values = {name: rows[:, j] for j, name in enumerate(COLUMNS)}
+            values["end"] = True
+            self.fleet.extend(len(rows), **values)
+        return owned
+
+    def move(self, behind, ahead):
+        """
+        Première moitié du pas : apparitions, restrictions, changements de voie et déplacement.
+
+        Parameters
+        ----------
+        behind : numpy.ndarray
+            fantômes de la portion précédente avant le déplacement
+        ahead : numpy.ndarray
+            fantômes de la portion suivante avant le déplacement
+
+        Returns
+        -------
+        None
+        """
+
+        self.spawn()
+        self.apply_restrictions()
+        owned = self.add_ghosts(behind, ahead)
+        fleet = self.fleet
+        self.leader = get_leaders(fleet["pos"], fleet["road"])
+        if self.change_lines():
+            self.leader = get_leaders(fleet["pos"], fleet["road"])
+        # comme VectorEngine.step, les accélérations se calculent avec les meneurs
+        # d'avant le déplacement : on garde leur numéro pour les retrouver ensuite
+        leader = self.leader[:owned]
+        self.lead_name = np.where(leader >= 0, fleet["name"][leader], NO_LEADER)
+        # les fantômes ne bougent pas, on les enlève avant de déplacer les voitures
+        fleet.n = owned
+        integrate(fleet, self.dt)
+
+    def accelerate(self, behind, ahead):
+        """
+        Seconde moitié du pas : nouvelles accélérations et sorties (dernière portion).
+
+        Parameters
+        ----------
+        behind : numpy.ndarray
+            fantômes de la portion précédente après le déplacement
+        ahead : numpy.ndarray
+            fantômes de la portion suivante après le déplacement
+
+        Returns
+        -------
+        None
+        """
+
+        owned = self.add_ghosts(behind, ahead)
+        fleet = self.fleet
+        self.leader = self.find_leaders(owned)
+        # comme VectorEngine.step : une voiture sortie n'est plus le meneur de personne
+        gone = self.exited_mask() if ahead is None else np.zeros(len(fleet), bool)
+        self.leader[(self.leader >= 0) & gone[self.leader]] = -1
+        update_acceleration(self.scenario, fleet, self.leader)
+        fleet.n = owned
+        self.remove(gone[:owned])
+        self.clock.tick()
+
+    def find_leaders(self, owned):
+        """
+        Retrouve les meneurs gardés par "move" parmi les voitures et les fantômes.
+
+        Un meneur qui n'est plus un fantôme (il a changé de voie ou de portion
+        dans la portion voisine) est remplacé par le plus proche devant.
+
+        Parameters
+        ----------
+        owned : int
+            nombre de voitures de la portion (les fantômes sont après)
+
+        Returns
+        -------
+        numpy.ndarray
+            indice du meneur de chaque véhicule, -1 s'il n'en a pas
+        """
+
+        fleet = self.fleet
+        names = fleet["name"]
+        leader = get_leaders(fleet["pos"], fleet["road"])
+        if len(names) == 0:
+            return leader
+        order = np.argsort(names)
+        k = order[np.searchsorted(names[order], self.lead_name).clip(0, len(names) - 1)]
+        found = names[k] == self.lead_name
+        leader[:owned] = np.where(self.lead_name == NO_LEADER, -1, np.where(found, k, leader[:owned]))
+        return leader
+
+    def emigrate(self, out):
+        """
+        Enlève les voitures passées dans la portion suivante.
+
+        Parameters
+        ----------
+        out : numpy.ndarray
+            tampon (MIGRANTS, colonnes) où les écrire
+
+        Returns
+        -------
+        int
+            nombre de voitures parties
+        """
+
+        fleet = self.fleet
+        gone = ~fleet["end"] & (fleet["pos"] >= self.end)
+        count = int(gone.sum())
+        if count > len(out):
+            raise RuntimeError(f"{count} voitures quittent la portion {self.index} en un pas (max {len(out)})")
+        for j, name in enumerate(COLUMNS):
+            out[:count, j] = fleet[name][gone]
+        fleet.remove(gone)
+        return count
+
+    def immigrate(self, rows):
+        """
+        Ajoute les voitures venues de la portion précédente.
+
+        Parameters
+        ----------
+        rows : numpy.ndarray
+            tableau (voitures, colonnes)
+
+        Returns
+        -------
+        None
+        """
+
+        if len(rows):
+            self.fleet.extend(len(rows), **{name: rows[:, j] for j, name in enumerate(COLUMNS)})
+
+    def partial(self):
+        """
+        Donne les indicateurs de la portion.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        dict
+            temps parcours des voitures sorties, nombre de changements de voie
+            et colonnes des voitures de la portion
+        """
+
+        fleet = self.fleet
+        moving = ~fleet["end"]
+        return {"travel_times": self.travel_times, "lane_changes": len(self.changeline),
+                "columns": {name: fleet[name][moving].copy() for name in COLUMNS}}
+
+
+def work(index, bounds, scenario, apparition, seed, name, barrier, conn):
+    """
+    Boucle d'un processus : fait avancer sa portion en même temps que les autres.
+
+    Chaque pas passe trois barrières : après la publication des voitures au
+    bord avant le déplacement, après celle d'après le déplacement, puis après
+    l'écriture des voitures qui changent de portion. Chaque tampon n'est
+    réécrit qu'une fois que les voisines ont passé la barrière suivante.
+    Chaque commande reçoit une réponse ("done", indicateurs) ou ("error",
+    exception) si la portion a échoué, le processus s'arrête alors.
+
+    Parameters
+    ----------
+    index : int
+        numéro de la portion
+    bounds : list
+        (début, fin) de chaque portion
+    scenario : Scenario
+        configuration de toute la route
+    apparition : dict
+        données d'apparition de toute la route
+    seed : int
+        graine du générateur, la même pour toutes les portions
+    name : str
+        nom de la mémoire partagée
+    barrier : multiprocessing.Barrier
+        barrière commune à tous les processus
+    conn : multiprocessing.connection.Connection
+        liaison avec le processus principal
+
+    Returns
+    -------
+    None
+    """
+
+    count = len(bounds)
+    shm = shared_memory.SharedMemory(name=name)
+    shared = buffers(shm, count)
+    ghosts, migrants, moving = shared["ghosts"], shared["migrants"], shared["moving"]
+    engine = SegmentEngine(scenario, apparition, index, *bounds[index], seed)
+    first, last = index == 0, index == count - 1
+
+    def neighbours(phase):
+        return (None if first else ghosts[index - 1, phase], None if last else ghosts[index + 1, phase])
+
+    try:
+        while True:
+            command, steps = conn.recv()
+            if command == "close":
+                break
+            for _ in range(steps):
+                engine.publish(ghosts[index, 0])
+                barrier.wait()
+                engine.move(*neighbours(0))
+                engine.publish(ghosts[index, 1])
+                barrier.wait()
+                engine.accelerate(*neighbours(1))
+                if not last:
+                    moving[index] = engine.emigrate(migrants[index])
+                barrier.wait()
+                if not first:
+                    engine.immigrate(migrants[index - 1, :int(moving[index - 1])].copy())
+            conn.send(("done", engine.partial()))
+    except Exception as err:
+        # les autres processus ne resteront pas bloqués à la barrière
+        barrier.abort()
+        # l'erreur est relancée par le processus principal (cf Corridor.run)
+        try:
+            conn.send(("error", err))
+        except Exception:
+            conn.send(("error", RuntimeError(f"portion {index} : {err!r}")))
+    except BaseException:
+        barrier.abort()
+        raise
+    finally:
+        del shared, ghosts, migrants, moving
+        shm.close()
+
+
+class Corridor:
+    """
+    Simulation d'une longue route découpée en portions, une par processus.
+
+    La route est coupée en portions de même longueur, chacune avancée par un
+    SegmentEngine dans son propre processus. Les processus avancent ensemble
+    pas par pas et s'échangent par mémoire partagée les voitures au bord de
+    chaque portion (meneurs et suiveurs de l'autre côté de la frontière) et
+    celles qui passent d'une portion à la suivante. Les changements de voie
+    simultanés de part et d'autre d'une frontière ne sont pas départagés
+    entre eux, et seul le plus proche véhicule de chaque voie de la portion
+    voisine est vu : les résultats sont en général ceux d'un seul
+    VectorEngine au bit près, sans que ce soit garanti. Les trajectoires ne
+    sont pas enregistrées et la route en anneau n'est pas prise en charge.
+    Chaque pas coûte trois barrières entre processus : le découpage n'est
+    rentable qu'avec un cœur par portion et des portions bien remplies
+    ("python domain.py" mesure l'accélération des pas).
+
+    ...
+
+    Attributes
+    ----------
+    scenario : Scenario
+        configuration de la simulation
+    bounds : list
+        (début, fin) de chaque portion en mètre
+    frame : int
+        nombre de pas effectués
+    results : list
+        derniers indicateurs de chaque portion
+
+    Methods
+    -------
+    run(steps):
+        Fait avancer toutes les portions.
+    columns():
+        Donne les voitures de toute la route.
+    summary():
+        Donne les indicateurs globaux de la simulation.
+    close():
+        Arrête les processus.
+    """
+
+    def __init__(self, scenario=None, apparition=None, workers=None, seed=None):
+        """
+        Construit tous les  attributs nécessaires et lance les processus.
+
+        Parameters
+        ----------
+        scenario : Scenario
+            configuration de la simulation, celle de settings.py si None
+        apparition : dict
+            données d'apparition, lues dans le fichier du scénario si None
+        workers : int
+            nombre de portions (et de processus), un par cœur si None
+        seed : int
+            graine du générateur (cf BaseEngine), tirée du générateur global
+            random si None
+        """
+
+        if scenario is None:
+            scenario = Scenario()
+        if scenario.RING:
+            raise ValueError("la route en anneau n'est pas découpable en portions")
+        if apparition is None:
+            apparition = load(scenario.DEMAND, scenario.CROP)
+        count = workers or os.cpu_count()
+        self.scenario = scenario
+        cuts = [scenario.DISTANCE * k / count for k in range(1, count)]
+        self.bounds = list(zip([- np.inf] + cuts, cuts + [np.inf]))
+        self.frame = 0
+        self.results = []
+
+        size = sum(int(np.prod(shape)) * 8 for shape in layout(count).values())
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        barrier = mp.Barrier(count)
+        if seed is None:
+            seed = rd.getrandbits(64)
+        self.conns = []
+        self.processes = []
+        try:
+            for index in range(count):
+                parent, child = mp.Pipe()
+                process = mp.Process(target=work, args=(index, self.bounds, scenario, apparition, seed,
+                                                        self.shm.name, barrier, child), daemon=True)
+                self.conns.append(parent)
+                self.processes.append(process)
+                process.start()
+                # seul le processus de la portion garde ce bout : sa fin est vue comme EOFError
+                child.close()
+        except BaseException:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def time(self):
+        """Temps simulé en seconde."""
+
+        return self.frame * self.scenario.STEP
+
+    def run(self, steps):
+        """
+        Fait avancer toutes les portions.
+
+        Si une portion échoue, les processus sont arrêtés, la mémoire
+        partagée est libérée et l'erreur de la portion est relancée.
+
+        Parameters
+        ----------
+        steps : int
+            nombre de pas
+
+        Returns
+        -------
+        None
+        """
+
+        try:
+            for conn in self.conns:
+                conn.send(("run", steps))
+            replies = [conn.recv() for conn in self.conns]
+        except BaseException:
+            self.close()
+            raise
+        errors = [value for status, value in replies if status == "error"]
+        if errors:
+            self.close()
+            # les barrières cassées ne sont que la conséquence de l'erreur d'une portion
+            raise next((err for err in errors if not isinstance(err, BrokenBarrierError)), errors[0])
+        self.results = [value for _, value in replies]
+        self.frame += steps
+
+    def columns(self):
+        """
+        Donne les voitures de toute la route (sans les fins de voie).
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        dict
+            tableau de chaque colonne de Fleet, portion par portion
+        """
+
+        return {name: np.concatenate([result["columns"][name] for result in self.results])
+                for name in COLUMNS} if self.results else {}
+
+    def summary(self):
+        """
+        Donne les indicateurs globaux de la simulation (cf BaseEngine.summary).
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        dict
+            temps simulé, nombre de voitures sorties, débit, temps de
+            parcours moyen et nombre de changements de voie
+        """
+
+        travel_times = [t for result in self.results for t in result["travel_times"]]
+        exited = len(travel_times)
+        return {
+            "time": self.time,
+            "exited": exited,
+            "throughput": exited / self.time * 3600 if self.time > 0 else 0.0,
+            "travel_time": sum(travel_times) / exited if exited else float("nan"),
+            "lane_changes": sum(result["lane_changes"] for result in self.results),
+        }
+
+    def close(self):
+        """
+        Arrête les processus et libère la mémoire partagée.
+
+        Sans effet si c'est déjà fait.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        if self.shm is None:
+            return None
+        for conn, process in zip(self.conns, self.processes):
+            try:
+                conn.send(("close", 0))
+            except OSError:
+                # processus déjà arrêté
+                pass
+        for conn, process in zip(self.conns, self.processes):
+            if process.pid is not None:
+                process.join(5)
+                if process.is_alive():
+                    process.terminate()
+                    process.join()
+            conn.close()
+        self.shm.close()
+        self.shm.unlink()
+        self.shm = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare une longue route découpée en portions à un seul moteur.")
+    parser.add_argument("--km", type=float, default=50, help="longueur de la route en km")
+    parser.add_argument("--density", type=float, default=20, help="véhicules par km et par voie au départ")
+    parser.add_argument("--steps", type=int, default=300)
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # le lancement des processus et le remplissage de chaque portion sont mesurés à part :
+    # l'accélération est celle des pas, la seule qui compte pour une longue simulation
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    print(f"{cores} cœur(s) disponible(s), {args.km:g} km, {args.steps} pas")
+    scenario = Scenario(DISTANCE=args.km * 1000, PREFILL=args.density, RECORD_MODE="off")
+    start = time.perf_counter()
+    engine = VectorEngine(scenario, seed=args.seed)
+    setup = time.perf_counter() - start
+    start = time.perf_counter()
+    engine.run(args.steps)
+    reference_time = time.perf_counter() - start
+    print(f"1 moteur     : départ {setup:6.2f} s  pas {reference_time:7.2f} s  {engine.summary()}")
+    cars = ~engine.fleet["end"]
+    reference = dict(zip(engine.fleet["name"][cars].tolist(), engine.fleet["pos"][cars].tolist()))
+    for workers in args.workers:
+        start = time.perf_counter()
+        with Corridor(scenario, workers=workers, seed=args.seed) as corridor:
+            # un premier pas attend que chaque processus ait rempli sa portion
+            corridor.run(1)
+            setup = time.perf_counter() - start
+            start = time.perf_counter()
+            corridor.run(args.steps - 1)
+            elapsed = time.perf_counter() - start
+            columns = corridor.columns()
+            pos = dict(zip(columns["name"].astype(np.int64).tolist(), columns["pos"].tolist()))
+            if pos.keys() == reference.keys():
+                gap = max((abs(pos[name] - x) for name, x in reference.items()), default=0.0)
+            else:
+                gap = float("nan")
+            speedup = reference_time * (args.steps - 1) / args.steps / elapsed if elapsed > 0 else float("nan")
+            note = "  (plus de processus que de cœurs)" if workers > cores else ""
+            print(f"{workers} processus : départ {setup:6.2f} s  pas {elapsed:7.2f} s  accélération x{speedup:.2f}  "
+                  f"{corridor.summary()}  écart max {gap:.3g} m{note}")
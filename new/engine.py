@@ -0,0 +1,1045 @@
+import json
+import random as rd
+from time import perf_counter
+import numpy as np
+from settings import *
+from Car import Car
+from clock import SimClock
+from config import Scenario
+from lanes import LaneIndex, link
+from schedule import SpawnSchedule, load, queue_offsets
+from restrictions import Restrictions
+from recorder import TrajectoryRecorder
+from store import TrajectoryStore
+from stats import StepStats
+
+
+# version du format des points de reprise (cf BaseEngine.checkpoint)
+CHECKPOINT_VERSION = 1
+
+def equilibrium_speed(scenario, gap, v0):
+    """
+    Donne la vitesse d'équilibre du modèle IDM pour un écart entre voitures.
+
+    À l'équilibre l'accélération est nulle :
+    1 - (v / v0) ** D = ((S0 + v * T) / gap) ** 2. Le membre de gauche
+    décroît et celui de droite croît avec v, on trouve donc v par dichotomie
+    entre 0 et v0 (pour tous les écarts d'un coup).
+
+    Parameters
+    ----------
+    scenario : Scenario
+        paramètres du modèle IDM
+    gap : numpy.ndarray
+        écart entre le pare-chocs avant et celui du meneur en mètre
+    v0 : numpy.ndarray
+        vitesse désirée en m/s
+
+    Returns
+    -------
+    numpy.ndarray
+        vitesse d'équilibre en m/s (0 si l'écart est plus petit que S0)
+    """
+
+    sc = scenario
+    gap, v0 = np.broadcast_arrays(np.asarray(gap, np.float64), np.asarray(v0, np.float64))
+    low = np.zeros(gap.shape)
+    high = v0.copy()
+    jammed = gap <= sc.S0
+    gap = np.where(jammed, 1, gap)
+    for _ in range(50):
+        mid = (low + high) / 2
+        faster = 1 - (mid / v0) ** sc.D > ((sc.S0 + mid * sc.T) / gap) ** 2
+        low = np.where(faster, mid, low)
+        high = np.where(faster, high, mid)
+    return np.where(jammed, 0, low)
+
+
+class BaseEngine:
+    """
+    Partie commune aux moteurs de simulation sans affichage.
+
+    Un moteur fait avancer les voitures aussi vite que le permet le
+    processeur : il n'ouvre aucune fenêtre, ne lit aucun événement et ne
+    limite pas le nombre d'images par seconde. Une fenêtre de visualisation
+    peut s'y attacher comme observateur. Les moteurs dérivés définissent la
+    façon de ranger les voitures ("end_line", "spawn", "place", "step", "positions",
+    "vehicles", "load_vehicles", "clear_end_lines").
+    Tout ce qui décrit la simulation (route, modèles, pas de temps, données
+    d'apparition) vient du scénario, les positions sont en mètre. Si RING est
+    vrai la route est un anneau : personne n'apparaît ni ne sort, les voitures
+    placées avec "place" repartent du début quand elles arrivent au bout.
+
+    ...
+
+    Attributes
+    ----------
+    scenario : Scenario
+        configuration de la simulation
+    clock : SimClock
+        horloge à pas fixe lue par tout ce qui dépend du temps
+    dt : float
+        pas de temps de la simulation en seconde
+    time : float
+        temps simulé écoulé depuis le début en seconde
+    frame : int
+        nombre de pas effectués
+    running : bool
+        indique si la boucle "run" doit continuer
+    checking : bool
+        vérifie la cohérence interne à chaque pas (pour les tests)
+    observers : list
+        ensemble des observateurs prévenus à chaque pas
+    apparition : dict
+        ensemble des données d'apparition des voitures
+    schedule : SpawnSchedule
+        calendrier d'apparition trié des voitures
+    restrictions : list
+        ensemble des restrictions (abscisse en mètre, vitesse, nombre de voies)
+    zones : Restrictions
+        restrictions rangées en tableaux triés pour les retrouver vite
+    recorder : TrajectoryRecorder
+        enregistreur des trajectoires des voitures
+    random : random.Random
+        générateur des facteurs de politesse, propre au moteur
+    stats : StepStats
+        chronomètres et compteurs de chaque phase, None si STATS est faux
+    changeline : list
+        ensemble des instants où il y a un changement de voie
+    placed : int
+        nombre de voitures placées sans le calendrier (cf "place")
+    travel_times : list
+        temps de parcours de chaque voiture sortie de la route en seconde
+        (de chaque tour complet sur un anneau)
+    crossings : int
+        nombre de passages au bout de l'anneau
+    segments : list
+        portions de voies ouvertes (voie, début, fin) en mètre
+
+    Methods
+    -------
+    initialise(restrictions):
+        Créée tous les attributs à chaque début de simulation.
+    build_road():
+        Range les restrictions et place les fins de voie.
+    set_restrictions(restrictions):
+        Change les restrictions en cours de simulation.
+    prefill(density):
+        Remplit les voies ouvertes à l'équilibre IDM.
+    checkpoint(path):
+        Enregistre tout l'état de la simulation dans un fichier.
+    restore(path, restrictions):
+        Reprend la simulation enregistrée par "checkpoint".
+    attach(observer):
+        Ajoute un observateur prévenu à chaque pas.
+    detach(observer):
+        Retire un observateur.
+    notify():
+        Prévient les observateurs qu'un pas vient d'être fait.
+    change_line():
+        Enregistre un changement de voie.
+    run(steps):
+        Fait avancer la simulation tant qu'on ne l'arrête pas.
+    close():
+        Termine l'enregistrement des trajectoires.
+    summary():
+        Donne les indicateurs globaux de la simulation.
+    """
+
+    def __init__(self, scenario=None, apparition=None, speed=None, check=False, recorder=None, seed=None):
+        """
+        Construit tous les  attributs nécessaires pour le moteur.
+
+        Parameters
+        ----------
+        scenario : Scenario
+            configuration de la simulation, celle de settings.py si None
+        apparition : dict
+            données d'apparition des voitures, lues dans le fichier du
+            scénario si None
+        speed : float
+            nombre de secondes simulées par seconde réelle, aussi vite que
+            possible si None
+        check : bool
+            vérifie la cohérence interne à chaque pas (pour les tests)
+        recorder : TrajectoryRecorder
+            enregistreur des trajectoires, un selon les paramètres si None
+        seed : int
+            graine du générateur du moteur, tirée du générateur global
+            random si None (random.seed suffit alors à refaire la même
+            simulation)
+        """
+
+        if scenario is None:
+            scenario = Scenario()
+        self.scenario = scenario
+        self.clock = SimClock(scenario.STEP, speed)
+        self.checking = check
+        if recorder is None:
+            sink = None if scenario.RECORD_PATH is None else TrajectoryStore(scenario.RECORD_PATH)
+            recorder = TrajectoryRecorder(scenario.RECORD_MODE, scenario.RECORD_INTERVAL,
+                                          scenario.RECORD_CHUNK, sink)
+        self.recorder = recorder
+        # chaque moteur a son propre générateur : plusieurs simulations en
+        # parallèle ne se partagent pas les tirages
+        self.random = rd.Random(rd.getrandbits(64) if seed is None else seed)
+        self.stats = StepStats(scenario.STATS_INTERVAL) if scenario.STATS else None
+        self.running = False
+        self.observers = []
+
+        # gestion d'apparition des voitures (personne n'apparaît sur un anneau)
+        if scenario.RING:
+            apparition = {"time": (), "speed": (), "road": ()}
+        elif apparition is None:
+            apparition = load(scenario.DEMAND, scenario.CROP)
+        self.apparition = apparition
+        self.schedule = SpawnSchedule(apparition["time"], apparition["speed"], apparition["road"],
+                                      scenario.CAPTURE_FPS)
+
+        self.initialise(scenario.RESTRICTIONS)
+
+    def initialise(self, restrictions=None):
+        """
+        Créée tous les attributs à chaque début de simulation.
+
+        Les moteurs dérivés vident leurs voitures avant d'appeler cette
+        méthode, qui place les fins de voie avec "end_line".
+
+        Parameters
+        ----------
+        restrictions : list
+            nouvelles restrictions (abscisse en mètre, vitesse en m/s, nombre
+            de voies), on garde les précédentes si None
+
+        Returns
+        -------
+        None
+        """
+
+        if restrictions is not None:
+            self.scenario = self.scenario.replace(RESTRICTIONS=restrictions)
+        # lié au temps
+        self.clock.reset()
+        self.schedule.reset()
+        # pour le graphe
+        self.recorder.reset()
+        if self.stats is not None:
+            self.stats.reset()
+        self.changeline = []
+        self.travel_times = []
+        self.crossings = 0
+        self.placed = 0
+
+        self.build_road()
+        if self.scenario.PREFILL > 0:
+            self.prefill(self.scenario.PREFILL)
+
+    def build_road(self):
+        """
+        Range les restrictions du scénario et place les fins de voie.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        self.restrictions = list(self.scenario.RESTRICTIONS)
+        self.zones = Restrictions(self.restrictions)
+
+        # portions de voies ouvertes et fins de voie
+        distance = self.scenario.DISTANCE
+        self.segments = [(1, 0, distance)]
+        last_2 = True
+        dist_2 = 0
+        last_0 = True
+        dist_0 = 0
+        for rest in self.restrictions:
+            # si on passe de 3 à moins de voies
+            if rest[2]<3 and last_0:
+                self.end_line(rest[0],0)
+                last_0 = False
+                self.segments.append((0, dist_0, rest[0]))
+            # si on repasse à 3 voies
+            elif rest[2]==3 and not last_0:
+                last_0 = True
+                dist_0 = rest[0]
+            # si on passe de 2 à 1 voie
+            if rest[2] < 2 and last_2:
+                self.end_line(rest[0],2)
+                last_2  = False
+                self.segments.append((2, dist_2, rest[0]))
+            # si la 2ème voie est de nouveau présente
+            elif rest[2]>=2 and not last_2:
+                last_2 = True
+                dist_2 = rest[0]
+        if last_0:
+            self.segments.append((0, dist_0, distance))
+        if last_2:
+            self.segments.append((2, dist_2, distance))
+
+    def set_restrictions(self, restrictions):
+        """
+        Change les restrictions en cours de simulation.
+
+        Les fins de voie sont enlevées puis replacées selon les nouvelles
+        restrictions, les voitures restent où elles sont.
+
+        Parameters
+        ----------
+        restrictions : list
+            nouvelles restrictions (abscisse en mètre, vitesse en m/s, nombre de voies)
+
+        Returns
+        -------
+        None
+        """
+
+        self.scenario = self.scenario.replace(RESTRICTIONS=restrictions)
+        self.clear_end_lines()
+        self.build_road()
+
+    def prefill(self, density):
+        """
+        Remplit les voies ouvertes à l'équilibre IDM.
+
+        Les voitures sont régulièrement espacées sur chaque portion de voie
+        ouverte (les voies sont décalées d'un tiers d'espacement pour ne pas
+        avoir de voitures côte à côte) et roulent à la vitesse d'équilibre
+        pour cet espacement et la vitesse limite de leur zone. Sur un anneau
+        l'espacement est ajusté pour tomber juste sur un tour. Les facteurs
+        de politesse sont tirés par "place" comme à l'apparition.
+
+        Parameters
+        ----------
+        density : float
+            nombre de véhicules par km et par voie
+
+        Returns
+        -------
+        None
+        """
+
+        sc = self.scenario
+        x, road, gap = [], [], []
+        for lane, begin, end in self.segments:
+            spacing = 1000 / density
+            if sc.RING and begin == 0 and end == sc.DISTANCE:
+                count = max(1, round(sc.DISTANCE / spacing))
+                spacing = sc.DISTANCE / count
+            else:
+                # on laisse la place de s'arrêter avant une fin de voie
+                last = end - sc.CAR_LENGTH / 2 - sc.S0
+                count = max(0, int(np.floor((last - begin - sc.CAR_LENGTH / 2) / spacing - lane / 3)) + 1)
+            x.append(begin + sc.CAR_LENGTH / 2 + (np.arange(count) + lane / 3) * spacing)
+            road.append(np.full(count, lane))
+            gap.append(np.full(count, spacing - sc.CAR_LENGTH))
+        x, road, gap = np.concatenate(x), np.concatenate(road), np.concatenate(gap)
+        if sc.RING:
+            x = x % sc.DISTANCE
+        v0 = self.zones.speeds[self.zones.find_all(x + sc.CAR_LENGTH / 2)]
+        self.place(x, road, equilibrium_speed(sc, gap, v0))
+
+    def checkpoint(self, path):
+        """
+        Enregistre tout l'état de la simulation dans un fichier.
+
+        Le fichier NumPy compressé (.npz) contient le scénario, les données
+        d'apparition, les voitures (cf "vehicles"), l'état du générateur
+        du moteur, le pas de l'horloge, le curseur du calendrier, les
+        indicateurs et les tampons de l'enregistreur. "restore" repart
+        exactement du même point : la suite de la simulation est identique
+        au bit près.
+
+        Parameters
+        ----------
+        path : str
+            chemin du fichier (".npz" est ajouté s'il manque)
+
+        Returns
+        -------
+        None
+        """
+
+        version, internal, gauss = self.random.getstate()
+        meta = {
+            "version": CHECKPOINT_VERSION,
+            "engine": type(self).__name__,
+            "scenario": self.scenario.to_dict(),
+            "frame": self.frame,
+            "cursor": self.schedule.cursor,
+            "placed": self.placed,
+            "crossings": self.crossings,
+            "random": [version, gauss],
+        }
+        state = {"meta": np.array(json.dumps(meta)),
+                 "random": np.array(internal, np.int64),
+                 "changeline": np.array(self.changeline, np.float64),
+                 "travel_times": np.array(self.travel_times, np.float64)}
+        for name in ("time", "speed", "road"):
+            state["apparition." + name] = np.asarray(self.apparition[name])
+        for name, array in self.recorder.state().items():
+            state["recorder." + name] = array
+        state.update(self.vehicles())
+        np.savez_compressed(path, **state)
+
+    def restore(self, path, restrictions=None):
+        """
+        Reprend la simulation enregistrée par "checkpoint".
+
+        Le moteur doit être du même type que celui qui a été enregistré. On
+        garde ses observateurs, sa vitesse d'affichage et la destination de
+        son enregistreur. Celle-ci est ramenée au point de reprise : un
+        TrajectoryStore perd les lignes écrites depuis (cf
+        TrajectoryStore.truncate), un magasin neuf commence à l'instant du
+        point de reprise. Avec "restrictions" on part du même état avec
+        d'autres restrictions, pour comparer plusieurs scénarios sans
+        refaire le début de la simulation.
+
+        Parameters
+        ----------
+        path : str
+            fichier écrit par "checkpoint"
+        restrictions : list
+            nouvelles restrictions, celles enregistrées si None
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        ValueError
+            si le fichier n'a pas été écrit par ce type de moteur, ou si la
+            destination de l'enregistreur ne peut pas être ramenée au point
+            de reprise
+        """
+
+        with np.load(path) as data:
+            state = {name: data[name] for name in data.files}
+        meta = json.loads(str(state["meta"]))
+        if meta["version"] != CHECKPOINT_VERSION or meta["engine"] != type(self).__name__:
+            raise ValueError(f"{path} : point de reprise {meta['engine']} (version {meta['version']}), "
+                             f"{type(self).__name__} attendu (version {CHECKPOINT_VERSION})")
+
+        self.scenario = Scenario.from_dict(meta["scenario"])
+        self.apparition = {name: state["apparition." + name] for name in ("time", "speed", "road")}
+        self.schedule = SpawnSchedule(self.apparition["time"], self.apparition["speed"], self.apparition["road"],
+                                      self.scenario.CAPTURE_FPS)
+        self.schedule.cursor = meta["cursor"]
+        self.clock.dt = self.scenario.STEP
+        self.clock.frame = meta["frame"]
+        # l'horloge temps réel repart de maintenant
+        self.clock.origin = None
+        self.recorder.load_state({name[len("recorder."):]: array for name, array in state.items()
+                                  if name.startswith("recorder.")})
+        if self.stats is not None:
+            self.stats.reset()
+        self.changeline = state["changeline"].tolist()
+        self.travel_times = state["travel_times"].tolist()
+        self.crossings = meta["crossings"]
+        self.placed = meta["placed"]
+
+        # les fins de voie créées ici sont remplacées par celles enregistrées
+        self.build_road()
+        self.load_vehicles(state)
+        # en dernier : créer les voitures a fait des tirages
+        version, gauss = meta["random"]
+        self.random.setstate((version, tuple(state["random"].tolist()), gauss))
+        if restrictions is not None:
+            self.set_restrictions(restrictions)
+
+    @property
+    def dt(self):
+        """Pas de temps fixe de l'horloge en seconde."""
+
+        return self.clock.dt
+
+    @property
+    def time(self):
+        """Temps simulé en seconde."""
+
+        return self.clock.time
+
+    @property
+    def frame(self):
+        """Nombre de pas effectués."""
+
+        return self.clock.frame
+
+    def attach(self, observer):
+        """
+        Ajoute un observateur prévenu à chaque pas.
+
+        Parameters
+        ----------
+        observer : object
+            objet possédant une méthode "notify(engine)"
+
+        Returns
+        -------
+        None
+        """
+
+        self.observers.append(observer)
+
+    def detach(self, observer):
+        """
+        Retire un observateur.
+
+        Parameters
+        ----------
+        observer : object
+            observateur à retirer
+
+        Returns
+        -------
+        None
+        """
+
+        self.observers.remove(observer)
+
+    def notify(self):
+        """
+        Prévient les observateurs qu'un pas vient d'être fait.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        for observer in self.observers:
+            observer.notify(self)
+
+    def change_line(self):
+        """
+        Enregistre un changement de voie.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        self.changeline.append(self.time) # on enregistre un changement de voie
+        if self.stats is not None:
+            self.stats.count("lane_changes")
+
+    def run(self, steps=None):
+        """
+        Fait avancer la simulation tant qu'on ne l'arrête pas.
+
+        Parameters
+        ----------
+        steps : int
+            nombre de pas à effectuer, sans limite si None (il faut alors
+            qu'un observateur mette "running" à False)
+
+        Returns
+        -------
+        None
+        """
+
+        self.running = True
+        n = 0
+        while self.running and (steps is None or n < steps):
+            self.step()
+            n += 1
+        self.running = False
+
+    def close(self):
+        """
+        Termine l'enregistrement des trajectoires (écrit l'index sur le disque).
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        self.recorder.close()
+
+    def summary(self):
+        """
+        Donne les indicateurs globaux de la simulation.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        dict
+            temps simulé (s), nombre de voitures sorties, débit (véhicules par
+            heure), temps de parcours moyen (s, NaN si aucune sortie) et
+            nombre de changements de voie ; sur un anneau les sorties sont les
+            passages au bout et le temps de parcours celui d'un tour
+        """
+
+        exited = self.crossings if self.scenario.RING else len(self.travel_times)
+        return {
+            "time": self.time,
+            "exited": exited,
+            "throughput": exited / self.time * 3600 if self.time > 0 else 0.0,
+            "travel_time": sum(self.travel_times) / len(self.travel_times) if self.travel_times else float("nan"),
+            "lane_changes": len(self.changeline),
+        }
+
+
+class Engine(BaseEngine):
+    """
+    Moteur de simulation sans affichage utilisant les objets "Car".
+
+    Chaque voiture calcule elle-même ses modèles IDM et MOBIL, c'est le
+    moteur de référence (cf documentation BaseEngine).
+
+    ...
+
+    Attributes
+    ----------
+    cars : dict
+        ensemble des voitures et fin de voie (dans l'ordre d'apparition)
+    lanes : LaneIndex
+        voitures et fins de voie de chaque voie triées selon leur abscisse
+
+    Methods
+    -------
+    initialise(restrictions):
+        Créée tous les attributs à chaque début de simulation.
+    end_line(x, road):
+        Créée une voiture morte au bout d'une fin de voie
+    spawn():
+        Fait apparaître les voitures en fonction du jeu de données.
+    place(x, road, velocity):
+        Place des voitures directement sur la route.
+    get_leader(car):
+        On donne à la voiture qui vient d'être créée un meneur.
+    remove(car):
+        Enlève une voiture de la simulation.
+    positions():
+        Donne la position de chaque voiture pour l'affichage.
+    record():
+        Enregistre les positions des voitures si c'est le moment.
+    set_restrictions(restrictions):
+        Change les restrictions en cours de simulation.
+    clear_end_lines():
+        Enlève toutes les fins de voie.
+    vehicles():
+        Donne l'état de toutes les voitures en tableaux.
+    load_vehicles(state):
+        Remplace toutes les voitures par celles de "vehicles".
+    check():
+        Vérifie la cohérence des voitures, de l'index et des liens.
+    timed_update(stats):
+        Actualise les voitures en chronométrant chaque phase.
+    step():
+        Fait avancer la simulation d'un pas de temps.
+    """
+
+    def initialise(self, restrictions=None):
+        """
+        Créée tous les attributs à chaque début de simulation.
+
+        Parameters
+        ----------
+        restrictions : list
+            nouvelles restrictions, on garde les précédentes si None
+
+        Returns
+        -------
+        None
+        """
+
+        if self.scenario.RING:
+            raise ValueError("la route en anneau n'existe que pour VectorEngine")
+        # ensemble des voitures
+        self.cars = {}
+        self.lanes = LaneIndex()
+        BaseEngine.initialise(self, restrictions)
+
+    def end_line(self, x, road):
+        """
+        Créée une voiture morte au bout d'une fin de voie
+
+        Parameters
+        ----------
+        x : float
+            abscisse de la fin de voie en mètre
+        road : int
+            voie sur laquelle on voudrait la positionner
+
+        Returns
+        -------
+        None
+        """
+
+        end = Car("end", road, 1, 1, self, x + self.scenario.CAR_LENGTH / 2)
+        self.cars[end] = None
+        self.lanes.insert(end)
+
+    def spawn(self):
+        """
+        Fait apparaître les voitures en fonction du jeu de données.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        # on regarde quelles voitures doivent apparaitre
+        schedule = self.schedule
+        due = schedule.due(self.time)
+        if due.start == due.stop:
+            return None
+        if self.stats is not None:
+            self.stats.count("spawns", due.stop - due.start)
+        # celles qui apparaissent ensemble sur la même voie se suivent
+        scenario = self.scenario
+        offsets = queue_offsets(schedule.road[due], scenario.CAR_LENGTH + scenario.S0)
+        for name, road, speed, offset in zip(schedule.name[due].tolist(), schedule.road[due].tolist(),
+                                             schedule.speed[due].tolist(), offsets.tolist()):
+            car = Car(name, road, speed, scenario.V0, self, - scenario.CAR_LENGTH / 2 - offset)
+            self.cars[car] = None
+            self.lanes.insert(car)
+            self.get_leader(car)
+
+    def place(self, x, road, velocity):
+        """
+        Place des voitures directement sur la route, sans le calendrier d'apparition.
+
+        Sert à partir d'une route déjà remplie (bancs d'essai, conditions
+        initiales). Les voitures sont numérotées après celles du calendrier.
+
+        Parameters
+        ----------
+        x : sequence
+            abscisse de chaque voiture en mètre
+        road : sequence
+            voie de chaque voiture
+        velocity : sequence
+            vitesse de chaque voiture en m/s
+
+        Returns
+        -------
+        None
+        """
+
+        first = len(self.schedule) + self.placed
+        cars = [Car(first + i, int(lane), float(speed), self.scenario.V0, self, float(pos))
+                for i, (pos, lane, speed) in enumerate(zip(x, road, velocity))]
+        self.placed += len(cars)
+        # mises à jour de l'avant vers l'arrière, comme des voitures apparues les unes après les autres
+        ordered = sorted(cars, key=lambda car: car.pos[0])
+        for car in reversed(ordered):
+            self.cars[car] = None
+        # rangées de l'arrière vers l'avant, chaque insertion se fait en bout de liste
+        for car in ordered:
+            self.lanes.insert(car)
+        for car in cars:
+            self.get_leader(car)
+
+    def get_leader(self, car):
+        """
+        On donne à la voiture qui vient d'être créée un meneur (et un suiveur).
+
+        Parameters
+        ----------
+        car : Car
+            voiture pour laquelle on cherche un meneur
+
+        Returns
+        -------
+        None
+        """
+
+        link(car, self.lanes.leader(car))
+        link(self.lanes.follower(car), car)
+        if self.stats is not None:
+            self.stats.count("neighbor_lookups", 2)
+
+    def remove(self, car):
+        """
+        Enlève une voiture de la simulation.
+
+        Parameters
+        ----------
+        car : Car
+            voiture qu'on souhaiterait supprimer
+
+        Returns
+        -------
+        None
+        """
+
+        # on la supprime de l'ensemble des voitures
+        del self.cars[car]
+        if car.name != "end":
+            self.travel_times.append(self.time - car.birth)
+            if self.stats is not None:
+                self.stats.count("removals")
+        # on la supprime de l'index des voies
+        self.lanes.remove(car)
+
+        # son suiveur suit maintenant son meneur (personne si elle était en tête)
+        link(car.follower, car.leader)
+
+    def positions(self):
+        """
+        Donne la position de chaque voiture pour l'affichage.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        list
+            ensemble des (abscisse en mètre, voie, fin de voie)
+        """
+
+        return [(car.pos[0], car.road, car.name == "end") for car in self.cars]
+
+    def record(self):
+        """
+        Enregistre les positions des voitures si c'est le moment.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        if not self.recorder.due(self.frame):
+            return None
+        cars = [car for car in self.cars if car.name != "end"]
+        self.recorder.record([car.name for car in cars], self.time, [car.pos[0] for car in cars],
+                             [car.road for car in cars], [car.velocity for car in cars])
+
+    def set_restrictions(self, restrictions):
+        """
+        Change les restrictions en cours de simulation (cf BaseEngine.set_restrictions).
+
+        Parameters
+        ----------
+        restrictions : list
+            nouvelles restrictions (abscisse en mètre, vitesse en m/s, nombre de voies)
+
+        Returns
+        -------
+        None
+        """
+
+        BaseEngine.set_restrictions(self, restrictions)
+        for car in self.cars:
+            if car.name == "end":
+                # la voiture juste derrière la nouvelle fin de voie la suit
+                self.get_leader(car)
+            else:
+                # les zones ont changé, on les recherche par dichotomie
+                car.zone = None
+
+    def clear_end_lines(self):
+        """
+        Enlève toutes les fins de voie.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        for car in [car for car in self.cars if car.name == "end"]:
+            self.remove(car)
+
+    def vehicles(self):
+        """
+        Donne l'état de toutes les voitures en tableaux (cf BaseEngine.checkpoint).
+
+        Les liens entre voitures (meneur, suiveur, ancien meneur) sont donnés
+        par l'indice de la voiture dans "cars", -1 pour aucune et -2 pour une
+        voiture déjà sortie. La place de chaque voiture dans sa voie garde
+        l'ordre de l'index pour les voitures à la même abscisse.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        dict
+            un tableau par attribut, dans l'ordre de "cars"
+        """
+
+        cars = list(self.cars)
+        index = {car: i for i, car in enumerate(cars)}
+        slot = {car: i for lane in self.lanes.lanes for i, car in enumerate(lane)}
+
+        def ref(other):
+            return -1 if other is None else index.get(other, -2)
+
+        end = [car.name == "end" for car in cars]
+        return {
+            "car.name": np.array([-1 if e else car.name for car, e in zip(cars, end)], np.int64),
+            "car.end": np.array(end, np.bool_),
+            "car.road": np.array([car.road for car in cars], np.int8),
+            "car.pos": np.array([car.pos[0] for car in cars], np.float64),
+            "car.velocity": np.array([car.velocity for car in cars], np.float64),
+            "car.acceleration": np.array([car.acceleration for car in cars], np.float64),
+            "car.v0": np.array([car.v0 for car in cars], np.float64),
+            "car.voies": np.array([car.voies for car in cars], np.int8),
+            "car.zone": np.array([-1 if car.zone is None else car.zone for car in cars], np.int64),
+            "car.P": np.array([car.P for car in cars], np.float64),
+            "car.cooldown_time": np.array([car.cooldown_time for car in cars], np.float64),
+            "car.birth": np.array([car.birth for car in cars], np.float64),
+            "car.key": np.array([car.key for car in cars], np.float64),
+            "car.s": np.array([car.s for car in cars], np.float64),
+            "car.leader": np.array([ref(car.leader) for car in cars], np.int64),
+            "car.follower": np.array([ref(car.follower) for car in cars], np.int64),
+            "car.old_leader": np.array([ref(car.old_leader) for car in cars], np.int64),
+            "car.slot": np.array([slot[car] for car in cars], np.int64),
+        }
+
+    def load_vehicles(self, state):
+        """
+        Remplace toutes les voitures par celles données par "vehicles".
+
+        Parameters
+        ----------
+        state : dict
+            tableaux donnés par "vehicles"
+
+        Returns
+        -------
+        None
+        """
+
+        columns = {name[len("car."):]: array.tolist() for name, array in state.items() if name.startswith("car.")}
+        cars = []
+        for i, end in enumerate(columns["end"]):
+            car = Car("end" if end else columns["name"][i], columns["road"][i], columns["velocity"][i],
+                      columns["v0"][i], self, columns["pos"][i])
+            for name in ("acceleration", "voies", "P", "cooldown_time", "birth", "key", "s"):
+                setattr(car, name, columns[name][i])
+            car.zone = None if columns["zone"][i] < 0 else columns["zone"][i]
+            cars.append(car)
+        # n'importe quel objet qui n'est aucune voiture tient lieu de voiture sortie
+        gone = object()
+
+        def car_at(i):
+            return None if i == -1 else gone if i == -2 else cars[i]
+
+        for car, leader, follower, old_leader in zip(cars, columns["leader"], columns["follower"], columns["old_leader"]):
+            car.leader, car.follower, car.old_leader = car_at(leader), car_at(follower), car_at(old_leader)
+        self.cars = dict.fromkeys(cars)
+        self.lanes = LaneIndex()
+        for car, slot in sorted(zip(cars, columns["slot"]), key=lambda pair: pair[1]):
+            self.lanes.lanes[car.road].append(car)
+
+    def check(self):
+        """
+        Vérifie la cohérence des voitures, de l'index et des liens.
+
+        Appelée à chaque pas quand le moteur est créé avec check=True (pour
+        les tests), elle coûte O(n log n) et ne doit pas servir en production.
+        Un index abîmé au milieu d'un pas est signalé avant elle par
+        LaneIndex.index (ValueError).
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        AssertionError
+            si une incohérence est trouvée
+        """
+
+        problems = self.lanes.check(self.cars)
+        if problems:
+            raise AssertionError(f"pas {self.frame} :\n" + "\n".join(problems))
+
+    def timed_update(self, stats):
+        """
+        Actualise les voitures comme "Car.update" en chronométrant chaque phase.
+
+        Parameters
+        ----------
+        stats : StepStats
+            mesures à compléter
+
+        Returns
+        -------
+        None
+        """
+
+        start = perf_counter()
+        for car in list(self.cars):
+            if car.name != "end":
+                car.apply_restrictions()
+                start = stats.lap("restrictions", start)
+                car.change_line()
+                start = stats.lap("mobil", start)
+                car.move()
+                start = stats.lap("idm", start)
+
+    def step(self):
+        """
+        Fait avancer la simulation d'un pas de temps.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        stats = self.stats
+        if stats is None:
+            self.spawn()
+            # une voiture peut sortir pendant la boucle, on parcourt une copie
+            for car in list(self.cars):
+                car.update()
+            self.record()
+        else:
+            start = perf_counter()
+            self.spawn()
+            stats.lap("spawn", start)
+            self.timed_update(stats)
+            start = perf_counter()
+            self.record()
+            stats.lap("record", start)
+        if self.checking:
+            self.check()
+        self.clock.tick()
+        self.notify()
+        if stats is not None:
+            stats.end_step(self)
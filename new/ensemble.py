@@ -0,0 +1,342 @@
+import argparse
+import csv
+import math
+import os
+import numpy as np
+from config import Scenario
+from engine import Engine
+from recorder import TrajectoryRecorder
+from vector import VectorEngine
+
+
+# indicateurs agrégés (cf BaseEngine.summary)
+METRICS = ("throughput", "travel_time", "lane_changes")
+FIELDS = ("replicate", "seed", "time", "exited") + METRICS
+
+
+def seeds(seed, count):
+    """
+    Dérive des graines indépendantes à partir d'une seule.
+
+    numpy.random.SeedSequence mélange la graine et le numéro de chaque
+    réplique : les suites de nombres obtenues ne se recouvrent pas, même
+    pour des graines de départ voisines.
+
+    Parameters
+    ----------
+    seed : int
+        graine de l'ensemble (entropie du système si None)
+    count : int
+        nombre de graines
+
+    Returns
+    -------
+    list
+        graine (entier de 64 bits) de chaque réplique
+    """
+
+    return [int(child.generate_state(1, np.uint64)[0]) for child in np.random.SeedSequence(seed).spawn(count)]
+
+
+def student(level, df):
+    """
+    Quantile de la loi de Student pour un intervalle de confiance bilatéral.
+
+    Pour un nombre entier de degrés de liberté, P(|T| < t) a une forme
+    fermée en θ = atan(t / sqrt(df)) (Abramowitz et Stegun, 26.7.3 et
+    26.7.4) croissante en θ : on l'inverse par dichotomie sur θ, jusqu'à la
+    précision des flottants.
+
+    Parameters
+    ----------
+    level : float
+        niveau de confiance (ex: 0.95)
+    df : int
+        nombre de degrés de liberté
+
+    Returns
+    -------
+    float
+        t tel que P(|T| < t) = level
+    """
+
+    def probability(theta):
+        # P(|T| < sqrt(df) tan(theta)), somme des termes en cos(theta) ** (2k (+ 1))
+        even = df % 2 == 0
+        c2 = math.cos(theta) ** 2
+        term = 1.0 if even else math.cos(theta)
+        total = term
+        for k in range(1, df // 2):
+            term *= c2 * (2 * k - 1) / (2 * k) if even else c2 * (2 * k) / (2 * k + 1)
+            total += term
+        if even:
+            return math.sin(theta) * total
+        return 2 / math.pi * (theta + (math.sin(theta) * total if df > 1 else 0.0))
+
+    low, high = 0.0, math.pi / 2
+    for _ in range(100):
+        theta = (low + high) / 2
+        if probability(theta) < level:
+            low = theta
+        else:
+            high = theta
+    return math.sqrt(df) * math.tan((low + high) / 2)
+
+
+def interval(values, level=0.95):
+    """
+    Moyenne et intervalle de confiance de la moyenne.
+
+    Parameters
+    ----------
+    values : sequence
+        valeur de l'indicateur pour chaque réplique (les NaN sont ignorés)
+    level : float
+        niveau de confiance
+
+    Returns
+    -------
+    dict
+        "n", "mean", "std" (écart type des répliques), "half" (demi-largeur
+        de l'intervalle, infinie avec moins de 2 valeurs), "low" et "high"
+    """
+
+    values = np.asarray(values, np.float64)
+    values = values[~np.isnan(values)]
+    n = len(values)
+    mean = float(values.mean()) if n else math.nan
+    std = float(values.std(ddof=1)) if n > 1 else math.nan
+    half = student(level, n - 1) * std / n ** 0.5 if n > 1 else math.inf
+    return {"n": n, "mean": mean, "std": std, "half": half, "low": mean - half, "high": mean + half}
+
+
+def replicate(config):
+    """
+    Fait tourner une réplique et donne ses indicateurs.
+
+    Parameters
+    ----------
+    config : dict
+        "scenario" (valeurs de Scenario.to_dict), "replicate" (numéro),
+        "seed", "steps" et "engine" ("vector" ou "object")
+
+    Returns
+    -------
+    dict
+        ligne de résultats (cf FIELDS)
+    """
+
+    scenario = Scenario.from_dict(config["scenario"])
+    kind = VectorEngine if config["engine"] == "vector" else Engine
+    engine = kind(scenario, recorder=TrajectoryRecorder("off"), seed=config["seed"])
+    engine.run(config["steps"])
+    row = {"replicate": config["replicate"], "seed": config["seed"]}
+    row.update({name: value for name, value in engine.summary().items() if name in FIELDS})
+    return row
+
+
+class Ensemble:
+    """
+    Répliques d'un même scénario lancées en parallèle, avec arrêt anticipé.
+
+    Chaque réplique a son propre générateur, initialisé avec une graine
+    dérivée de celle de l'ensemble (cf "seeds"). Les répliques sont lancées
+    par vagues d'autant que de processus, mais l'arrêt se décide réplique
+    par réplique dans l'ordre des graines : on garde le plus court début de
+    la suite pour lequel toutes les demi-largeurs des intervalles de
+    confiance sont sous "tolerance" fois la moyenne, et les répliques
+    suivantes de la vague sont jetées. Les résultats ne dépendent donc ni
+    du nombre de processus ni de l'ordre dans lequel les répliques se
+    terminent.
+
+    ...
+
+    Attributes
+    ----------
+    scenario : Scenario
+        configuration simulée
+    steps : int
+        nombre de pas de chaque réplique
+    seeds : list
+        graine de chaque réplique possible
+    minimum : int
+        nombre de répliques avant de regarder les intervalles
+    tolerance : float
+        demi-largeur relative visée pour chaque indicateur
+    level : float
+        niveau de confiance des intervalles
+    engine : str
+        "vector" (VectorEngine) ou "object" (Engine)
+    workers : int
+        nombre de processus, autant que de cœurs si None
+    rows : list
+        indicateurs de chaque réplique terminée, dans l'ordre des répliques
+
+    Methods
+    -------
+    statistics():
+        Donne la moyenne et l'intervalle de confiance de chaque indicateur.
+    converged():
+        Indique si tous les intervalles sont assez étroits.
+    run(log):
+        Lance les répliques jusqu'à convergence ou jusqu'au maximum.
+    save(path):
+        Écrit les indicateurs de chaque réplique dans un fichier CSV.
+    """
+
+    def __init__(self, scenario=None, steps=3600, replicates=100, minimum=5, tolerance=0.02, level=0.95,
+                 seed=None, engine="vector", workers=None):
+        """
+        Construit tous les  attributs nécessaires pour l'ensemble.
+
+        Parameters
+        ----------
+        scenario : Scenario
+            configuration simulée, celle de settings.py si None
+        steps : int
+            nombre de pas de chaque réplique
+        replicates : int
+            nombre maximal de répliques
+        minimum : int
+            nombre de répliques avant de regarder les intervalles (au moins 2)
+        tolerance : float
+            demi-largeur relative visée (ex: 0.02 pour ±2 % de la moyenne),
+            jamais d'arrêt anticipé si 0
+        level : float
+            niveau de confiance des intervalles
+        seed : int
+            graine de l'ensemble, entropie du système si None
+        engine : str
+            "vector" (VectorEngine) ou "object" (Engine)
+        workers : int
+            nombre de processus, autant que de cœurs si None
+        """
+
+        self.scenario = Scenario() if scenario is None else scenario
+        self.steps = steps
+        self.seeds = seeds(seed, replicates)
+        self.minimum = max(2, minimum)
+        self.tolerance = tolerance
+        self.level = level
+        self.engine = engine
+        self.workers = workers
+        self.rows = []
+
+    def statistics(self):
+        """
+        Donne la moyenne et l'intervalle de confiance de chaque indicateur.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        dict
+            résultat de "interval" pour chaque nom de METRICS
+        """
+
+        return {name: interval([row[name] for row in self.rows], self.level) for name in METRICS}
+
+    def converged(self):
+        """
+        Indique si tous les intervalles sont assez étroits.
+
+        Un indicateur de moyenne nulle (aucun changement de voie) est
+        considéré comme connu dès que toutes les répliques valent 0.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        bool
+            True s'il y a au moins "minimum" répliques et que chaque
+            demi-largeur est sous "tolerance" fois la moyenne
+        """
+
+        if len(self.rows) < self.minimum or self.tolerance <= 0:
+            return False
+        return all(stats["half"] <= self.tolerance * abs(stats["mean"]) for stats in self.statistics().values())
+
+    def run(self, log=print):
+        """
+        Lance les répliques jusqu'à convergence ou jusqu'au maximum.
+
+        Parameters
+        ----------
+        log : callable
+            reçoit une ligne d'avancement après chaque vague, rien si None
+
+        Returns
+        -------
+        dict
+            statistiques finales (cf "statistics")
+        """
+
+        # multiprocessing est long à charger, seul le processus principal en a besoin
+        from concurrent.futures import ProcessPoolExecutor
+
+        wave = self.workers or os.cpu_count()
+        configs = [{"scenario": self.scenario.to_dict(), "replicate": i, "seed": seed, "steps": self.steps,
+                    "engine": self.engine} for i, seed in enumerate(self.seeds)]
+        with ProcessPoolExecutor(self.workers) as pool:
+            while len(self.rows) < len(configs) and not self.converged():
+                # au moins "minimum" répliques dans la première vague
+                size = max(wave, self.minimum - len(self.rows))
+                todo = configs[len(self.rows):len(self.rows) + size]
+                # la vague est finie dans tous les cas, mais on s'arrête à la même réplique qu'en série
+                for row in pool.map(replicate, todo):
+                    self.rows.append(row)
+                    if self.converged():
+                        break
+                if log is not None:
+                    parts = [f"{name} {stats['mean']:.4g} ± {stats['half']:.2g}"
+                             for name, stats in self.statistics().items()]
+                    log(f"{len(self.rows)} répliques : " + ", ".join(parts))
+        return self.statistics()
+
+    def save(self, path):
+        """
+        Écrit les indicateurs de chaque réplique dans un fichier CSV.
+
+        Parameters
+        ----------
+        path : str
+            chemin du fichier
+
+        Returns
+        -------
+        None
+        """
+
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, FIELDS)
+            writer.writeheader()
+            writer.writerows(self.rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Répliques d'un scénario avec intervalles de confiance.")
+    parser.add_argument("--scenario", help="fichier JSON du scénario (cf Scenario.save), settings.py sinon")
+    parser.add_argument("--steps", type=int, default=3600, help="nombre de pas de chaque réplique")
+    parser.add_argument("--replicates", type=int, default=100, help="nombre maximal de répliques")
+    parser.add_argument("--min", type=int, default=5, help="nombre de répliques avant de pouvoir s'arrêter")
+    parser.add_argument("--tolerance", type=float, default=0.02, help="demi-largeur relative visée (0 : jamais d'arrêt)")
+    parser.add_argument("--level", type=float, default=0.95, help="niveau de confiance")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--engine", choices=("vector", "object"), default="vector")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", help="fichier CSV des indicateurs de chaque réplique")
+    args = parser.parse_args()
+
+    scenario = Scenario.load(args.scenario) if args.scenario else None
+    ensemble = Ensemble(scenario, args.steps, args.replicates, args.min, args.tolerance, args.level,
+                        args.seed, args.engine, args.workers)
+    results = ensemble.run()
+    print("convergé" if ensemble.converged() else "nombre maximal de répliques atteint")
+    for name, stats in results.items():
+        print(f"{name:>13} : {stats['mean']:.4g}  [{stats['low']:.4g}, {stats['high']:.4g}]  ({stats['n']} répliques)")
+    if args.out:
+        ensemble.save(args.out)
@@ -0,0 +1,321 @@
+from bisect import bisect_left, insort
+
+
+def link(follower, leader):
+    """
+    Fait de leader le meneur de follower en gardant les liens dans les deux sens.
+
+    Chaque voiture connaît son meneur ("leader") et son suiveur ("follower"),
+    les anciens liens qui ne sont plus valables sont défaits. Ainsi, pour
+    enlever une voiture ou changer de voie, on n'a plus à chercher qui la suit.
+
+    Parameters
+    ----------
+    follower : Car
+        voiture qui suit, None pour aucune
+    leader : Car
+        voiture suivie, None pour aucune
+
+    Returns
+    -------
+    None
+    """
+
+    if follower is not None:
+        old = follower.leader
+        if old is not None and old.follower is follower:
+            old.follower = None
+        follower.leader = leader
+    if leader is not None:
+        old = leader.follower
+        if old is not None and old is not follower and old.leader is leader:
+            old.leader = None
+        leader.follower = follower
+
+
+def key(car):
+    """Abscisse de la voiture au moment où elle a été rangée dans l'index."""
+
+    return car.key
+
+
+class LaneIndex:
+    """
+    Index des voitures de chaque voie triées par abscisse.
+
+    Chaque voie est une liste triée selon "car.key", l'abscisse de la voiture
+    lors de son dernier rangement. Les clés restent donc toujours triées même
+    pendant qu'un pas est en cours, ce qui permet de retrouver une voiture et
+    ses voisines par dichotomie (O(log n)) au lieu de parcourir toutes les
+    voitures. L'index est mis à jour à chaque apparition, déplacement,
+    changement de voie et sortie.
+
+    ...
+
+    Attributes
+    ----------
+    lanes : list
+        liste triée des voitures (et fins de voie) de chaque voie
+
+    Methods
+    -------
+    insert(car):
+        Range une voiture dans sa voie.
+    index(car):
+        Donne la place d'une voiture dans sa voie.
+    remove(car):
+        Enlève une voiture de l'index.
+    move(car, road):
+        Fait passer une voiture sur une autre voie.
+    update(car):
+        Met à jour la place d'une voiture qui vient de bouger.
+    leader(car):
+        Donne la voiture juste devant sur la même voie.
+    follower(car):
+        Donne la voiture juste derrière sur la même voie.
+    neighbors(x, road):
+        Donne les voitures juste derrière et juste devant une abscisse sur une voie.
+    check(cars):
+        Vérifie que l'index et les liens meneur/suiveur sont cohérents.
+    """
+
+    def __init__(self, count=3):
+        """
+        Construit tous les  attributs nécessaires pour l'index.
+
+        Parameters
+        ----------
+        count : int
+            nombre de voies
+        """
+
+        self.lanes = [[] for _ in range(count)]
+
+    def __len__(self):
+        return sum(len(lane) for lane in self.lanes)
+
+    def insert(self, car):
+        """
+        Range une voiture dans sa voie.
+
+        Parameters
+        ----------
+        car : Car
+            voiture à ranger
+
+        Returns
+        -------
+        None
+        """
+
+        car.key = car.pos[0]
+        insort(self.lanes[car.road], car, key=key)
+
+    def index(self, car):
+        """
+        Donne la place d'une voiture dans sa voie.
+
+        Parameters
+        ----------
+        car : Car
+            voiture rangée dans l'index
+
+        Returns
+        -------
+        int
+            indice de la voiture dans la liste de sa voie
+
+        Raises
+        ------
+        ValueError
+            si la voiture n'est pas trouvée (voie mal triée ou voiture absente)
+        """
+
+        lane = self.lanes[car.road]
+        i = bisect_left(lane, car.key, key=key)
+        # plusieurs voitures peuvent avoir la même clé
+        while i < len(lane) and lane[i] is not car:
+            i += 1
+        if i == len(lane):
+            raise ValueError(f"{car.name} introuvable voie {car.road} à la clé {car.key} "
+                             f"(voie mal triée ou voiture absente, cf check)")
+        return i
+
+    def remove(self, car):
+        """
+        Enlève une voiture de l'index.
+
+        Parameters
+        ----------
+        car : Car
+            voiture à enlever
+
+        Returns
+        -------
+        None
+        """
+
+        lane = self.lanes[car.road]
+        # une voiture qui sort de la route est en tête de sa voie
+        if lane[-1] is car:
+            lane.pop()
+        else:
+            del lane[self.index(car)]
+
+    def move(self, car, road):
+        """
+        Fait passer une voiture sur une autre voie.
+
+        Parameters
+        ----------
+        car : Car
+            voiture qui change de voie
+        road : int
+            nouvelle voie
+
+        Returns
+        -------
+        None
+        """
+
+        self.remove(car)
+        car.road = road
+        self.insert(car)
+
+    def update(self, car):
+        """
+        Met à jour la place d'une voiture qui vient de bouger.
+
+        Les voitures ne se doublent pas sur une même voie, la voiture reste donc
+        presque toujours à sa place et on n'a qu'à changer sa clé. Si elle a
+        tout de même dépassé sa voisine, ou si elle a reculé derrière sa
+        suiveuse (presque arrêtée en freinant, la position est avancée avant
+        que la vitesse soit ramenée à 0), on refait les liens meneur/suiveur.
+
+        Parameters
+        ----------
+        car : Car
+            voiture qui a bougé
+
+        Returns
+        -------
+        None
+        """
+
+        lane = self.lanes[car.road]
+        i = start = self.index(car)
+        car.key = car.pos[0]
+        while i + 1 < len(lane) and lane[i + 1].key < car.key:
+            lane[i], lane[i + 1] = lane[i + 1], lane[i]
+            i += 1
+        while i > 0 and lane[i - 1].key > car.key:
+            lane[i], lane[i - 1] = lane[i - 1], lane[i]
+            i -= 1
+        if i != start:
+            for j in range(max(0, min(i, start) - 1), min(max(i, start) + 1, len(lane))):
+                link(lane[j], lane[j + 1] if j + 1 < len(lane) else None)
+
+    def leader(self, car):
+        """
+        Donne la voiture juste devant sur la même voie.
+
+        Parameters
+        ----------
+        car : Car
+            voiture rangée dans l'index
+
+        Returns
+        -------
+        Car
+            voiture devant, None s'il n'y en a pas
+        """
+
+        lane = self.lanes[car.road]
+        i = self.index(car) + 1
+        return lane[i] if i < len(lane) else None
+
+    def follower(self, car):
+        """
+        Donne la voiture juste derrière sur la même voie.
+
+        Parameters
+        ----------
+        car : Car
+            voiture rangée dans l'index
+
+        Returns
+        -------
+        Car
+            voiture derrière, None s'il n'y en a pas
+        """
+
+        i = self.index(car)
+        return self.lanes[car.road][i - 1] if i > 0 else None
+
+    def neighbors(self, x, road):
+        """
+        Donne les voitures juste derrière et juste devant une abscisse sur une voie.
+
+        Parameters
+        ----------
+        x : float
+            abscisse en mètre
+        road : int
+            voie dans laquelle on cherche
+
+        Returns
+        -------
+        behind : Car
+            voiture juste derrière x, None s'il n'y en a pas
+        ahead : Car
+            voiture juste devant x (ou au même niveau), None s'il n'y en a pas
+        """
+
+        lane = self.lanes[road]
+        k = bisect_left(lane, x, key=key)
+        behind = lane[k - 1] if k > 0 else None
+        ahead = lane[k] if k < len(lane) else None
+        return behind, ahead
+
+    def check(self, cars):
+        """
+        Vérifie que l'index et les liens meneur/suiveur sont cohérents.
+
+        Les fins de voie ne suivent personne, on ne vérifie donc pas leur meneur.
+
+        Parameters
+        ----------
+        cars : iterable
+            ensemble des voitures et fins de voie de la simulation
+
+        Returns
+        -------
+        list
+            description de chaque incohérence trouvée (vide si tout va bien)
+        """
+
+        problems = []
+        cars = list(cars)
+        if len(cars) != len(self):
+            problems.append(f"{len(cars)} voitures mais {len(self)} dans l'index")
+        for road, lane in enumerate(self.lanes):
+            for i, car in enumerate(lane):
+                if car.road != road:
+                    problems.append(f"{car.name} rangée voie {road} mais roule voie {car.road}")
+                if i > 0 and lane[i - 1].key > car.key:
+                    problems.append(f"voie {road} mal triée en {car.name}")
+        # meneur d'après la place dans la liste, l'index peut être mal trié
+        leaders = {id(car): lane[i + 1] if i + 1 < len(lane) else None
+                   for lane in self.lanes for i, car in enumerate(lane)}
+        for car in cars:
+            if car.name == "end":
+                continue
+            if id(car) not in leaders:
+                problems.append(f"{car.name} absente de l'index")
+                continue
+            leader = leaders[id(car)]
+            if car.leader is not leader:
+                problems.append(f"{car.name} suit {getattr(car.leader, 'name', None)} au lieu de {getattr(leader, 'name', None)}")
+            if leader is not None and leader.follower is not car:
+                problems.append(f"{getattr(leader, 'name', None)} est suivie par {getattr(leader.follower, 'name', None)} au lieu de {car.name}")
+        return problems
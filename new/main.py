@@ -1,247 +1,132 @@
+from time import perf_counter
 import pygame
-import matplotlib.pyplot as plt
-from settings import *
-from Car import Car
+import numpy as np
+from display import *
+from config import Scenario
+from engine import Engine
+from raster import TimeSpaceDiagram
 pygame.init()
 
 
+def restriction():
+    """
+    Permet de définir les restrictions sur la route.
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    res: list
+        ensemble de listes contenant la distance, la vitesse et le nombre de
+        voies de chaque changement ex: [[0m, 90km/h, 3],[200m, 120km/h, 2]]
+        (distance en mètre, vitesse en m/s)
+    """
+
+    res = list(RESTRICTIONS)
+    print(SLICE)
+    restr = int(input("voulez-vous des restrictions sur la route ?\n1- oui\n0- non\n"))
+    if restr == 1:
+        finish = False
+        while not finish:
+            print(SLICE)
+            dist = int(input("à quelle distance ? (en mêtres)\n"))
+            print(SLICE)
+            change_vit = int(input("changer la vitesse ?\n1-oui\n0-non\n"))
+            print(SLICE)
+            change_road = int(input("changer le nombre de voies ?\n1-oui\n0-non\n"))
+            if dist < DISTANCE:
+                if change_vit == 1:
+                    print(SLICE)
+                    vit = float(input("nouvelle vitesse en km/h :\n"))
+                else:
+                    vit = res[-1][1] *3.6
+                if change_road == 1:
+                    print(SLICE)
+                    road = int(input("nombre de voies (entre 1 et 3) :\n"))
+                else:
+                    road = res[-1][2]
+                res.append((dist, vit / 3.6, road))
+            finish = not(bool(input("si fini pressez entrée, sinon écrivez n'importe quoi\n")))
+    res.sort(key=lambda x: x[0])
+    print("la simulation se lance")
+    return res
+
+
 class Simulation:
     """
     Classe prennant en charge l'affichage et génère le rendu
 
+    La fenêtre est un observateur du moteur (cf documentation Engine) : elle
+    est prévenue à chaque pas et dessine la route et les voitures, c'est
+    l'horloge du moteur qui suit alors le temps réel. Le moteur travaille en
+    mètre, la fenêtre convertit en pixels avec ALPHA.
+
     ...
 
     Attributes
     ----------
+    engine : Engine
+        moteur de simulation observé
     screen : pygame.display
         fenêtre d'affichage
-    clock : pygame.time.Clock
-        horloge de la simulation
-    frame : int
-        nombre d'actualisation de la page
-    dt : float
-        temps entre chaque actualisation de la fenêtre de visualisation
-    apparition : list
-        ensemble  des données d'apparition des voitures
     rest : bool
         correspond à l'application de restrictions ou non
-    list_x : list
-        ensemble des listes de position des voitures (cf documentation Car)
-    list_t : list
-        ensemble des listes en temps des voitures (cf doccumentation Car)
-    changeline : list
-        ensemble des instants où il y a un changement de voie
-    cars : pygame.sprite.Group
-        groupe des voitures et fin de voie
-    cars_sort : list
-        ensemble des voitures et fin de voie triées selon leur abscisse
     road : list
         permet de décrire les portions de routes en fonction des restrictions
-    end_line :
-        ensemble des descriptions de fin de voie
+    cooldown : float
+        temps minimal entre deux relancements de la simulation (ms)
+    reset_time : float
+        instant du dernier relancement de la simulation (ms)
+    drawn : float
+        instant du dernier dessin (s, cf time.perf_counter)
 
     Methods
     -------
     initialise():
-        Créée tous les attributs à chaque début de simulation.
-    end_line():
-        Créée une voiture morte au bout d'une fin de voie
-    spawn():
-        Fait apparaître les voitures en fonction du jeu de données.
-    get_leader(car):
-        On donne à la voiture qui vient d'être créée un meneur.
-    remove(car):
-        Enlève une voiture de la simulation.
-    change_line():
-        Enregistre un changement de voie.
+        Calcule le tracé des routes à chaque début de simulation.
     show_graph():
         Affiche la courbe en position des voitures ainsi que les changements de voies.
     draw():
         Affiche l'environnement, un repère ainsi que les voitures dans la fenêtre.
-    update():
-        Actualise à chaque image les voitures.
+    events():
+        Acquisition des différents événements.
+    notify(engine):
+        Actualise la fenêtre après chaque pas du moteur.
     run():
-        Boucle permettant l'affichage et l'acquisition des différents événements.
+        Lance le moteur avec l'affichage.
     """
 
-    def  __init__(self):
+    def  __init__(self, engine=None):
         """
-        Construit tous les  attributs nécessaires pour l'objet voiture.
+        Construit tous les  attributs nécessaires pour la fenêtre.
 
         Parameters
         ----------
-        None
+        engine : Engine
+            moteur à observer, on en crée un si None
         """
 
         # affichage
         self.screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.RESIZABLE)
-        self.clock = pygame.time.Clock()
-        self.frame = 0
-        self.dt = 0
-
-        # gestion d'apparition des voitures
-        time, speed, road = load()
-        self.apparition = {"time": time, "speed": speed, "road": road}
         self.rest = True
+        self.cooldown = 1e3
+        self.reset_time = 0
+        self.drawn = - np.inf
+
+        if engine is None:
+            engine = Engine(None if DEFAULT else Scenario(RESTRICTIONS=restriction()))
+        self.engine = engine
+        self.engine.attach(self)
+        # la fenêtre suit le temps réel (ou un multiple avec SPEED)
+        self.engine.clock.set_speed(SPEED)
 
         self.initialise()
 
     def initialise(self):
         """
-        Créée tous les attributs à chaque début de simulation.
-
-        Parameters
-        ----------
-        None
-
-        Returns
-        -------
-        None
-        """
-
-        # lié au temps
-        self.clock = pygame.time.Clock()
-        self.frame = 0
-        # pour le graphe
-        self.list_x = []
-        self.list_t = []
-        self.changeline = []
-
-        # groupe de cars
-        self.cars = pygame.sprite.Group()  # groupe des voitures
-        self.cars_sort = []
-        if self.rest:
-            if DEFAULT:
-                self.restrictions = ROAD_BEG
-            else:
-                self.restrictions = restriction()
-
-        # pour le tracer des routes
-        self.road = [((0, Y_ROAD[1]),(WIDTH, Y_ROAD[1]))]
-        last_2 = True
-        dist_2 = 0
-        last_0 = True
-        dist_0 = 0
-        for rest in self.restrictions:
-            # si on passe de 3 à moins de voies
-            if rest[2]<3 and last_0:
-                self.end_line(rest[0],0)
-                last_0 = False
-                self.road.append(((dist_0, Y_ROAD[0]), (rest[0], Y_ROAD[0])))
-            # si on repasse à 3 voies
-            elif rest[2]==3 and not last_0:
-                last_0 = True
-                dist_0 = rest[0]
-            # si on passe de 2 à 1 voie
-            if rest[2] < 2 and last_2:
-                self.end_line(rest[0],2)
-                last_2  = False
-                self.road.append(((dist_2, Y_ROAD[2]), (rest[0], Y_ROAD[2])))
-            # si la 2ème voie est de nouveau présente
-            elif rest[2]>=2 and not last_2:
-                last_2 = True
-                dist_2 = rest[0]
-        if last_0:
-            self.road.append(((dist_0, Y_ROAD[0]), (WIDTH, Y_ROAD[0])))
-        if last_2:
-            self.road.append(((dist_2, Y_ROAD[2]), (WIDTH, Y_ROAD[2])))
-
-    def end_line(self, x, road):
-        """
-        Créée une voiture morte au bout d'une fin de voie
-
-        Parameters
-        ----------
-        x : float
-            abscisse de la voiture
-        road : int
-            voie sur laquelle on voudrait la positionner
-
-        Returns
-        -------
-        None
-        """
-
-        end = Car("end",road, 1, 1, self,[self.cars], (x + CAR_DIM[0] / 2) * ALPHA)
-        self.cars_sort.append(end)
-
-    def spawn(self):
-        """
-        Fait apparaître les voitures en fonction du jeu de données.
-
-        Parameters
-        ----------
-        None
-
-        Returns
-        -------
-        None
-        """
-
-        # on regarde si on doit faire apparaitre une voiture
-        if not self.frame in self.apparition["time"]:
-            return None
-        name = self.apparition["time"].index(self.frame)
-        car = Car(name,
-                  self.apparition["road"][name],
-                  self.apparition["speed"][name],
-                  V0,
-                  self,
-                  [self.cars])
-        self.cars_sort.append(car)
-        self.get_leader(car)
-
-    def get_leader(self, car):
-        """
-        On donne à la voiture qui vient d'être créée un meneur.
-
-        Parameters
-        ----------
-        car : Car
-            voiture pour laquelle on cherche un meneur
-
-        Returns
-        -------
-        None
-        """
-
-        i = 0
-        while i < len(self.cars_sort) and car.leader is None:
-            specimen = self.cars_sort[i]
-            if specimen.road == car.road and car!=specimen: # on n'a pas besoin de vérifier si le spécimen est devant
-                car.leader = specimen
-            i+=1
-
-    def remove(self, car):
-        """
-        Enlève une voiture de la simulation.
-
-        Parameters
-        ----------
-        car : Car
-            voiture qu'on souhaiterait supprimer
-
-        Returns
-        -------
-        None
-        """
-
-        self.list_x.append([car.x[i] for i in range(len(car.x)) if i % 5 == 0])
-        self.list_t.append((car.name, [car.time[i] for i in range(len(car.time)) if i % 5 == 0]))
-
-        # on la supprime de l'ensemble des voitures
-        self.cars.remove(car)
-        # on la supprime dans la liste des voitures classées
-        del self.cars_sort[self.cars_sort.index(car)]
-
-        # on l'enlève comme meneur pour la voiture qui l'avait
-        for car2 in self.cars:
-            if car2.leader == car:
-                car2.leader = None
-
-    def change_line(self):
-        """
-        Enregistre un changement de voie.
+        Calcule le tracé des routes à chaque début de simulation.
 
         Parameters
         ----------
@@ -252,11 +137,15 @@ class Simulation:
         None
         """
 
-        self.changeline.append(pygame.time.get_ticks()*1e-3) # on enregistre un changement de voie
+        self.road = [((beg / ALPHA, Y_ROAD[road]), (end / ALPHA, Y_ROAD[road]))
+                     for road, beg, end in self.engine.segments]
 
     def show_graph(self):
         """
-        Affiche la courbe en position des voitures ainsi que les changements de voies.
+        Affiche le diagramme espace-temps des voitures ainsi que les changements de voies.
+
+        Les trajectoires sont tramées en une image (vitesse moyenne de chaque
+        case) au lieu d'une courbe par voiture, cf TimeSpaceDiagram.
 
         Parameters
         ----------
@@ -267,19 +156,25 @@ class Simulation:
         None
         """
 
-        # on affiche la position (x) en fonction du temps
-        for i in self.changeline:
-            plt.figure(1)
-            plt.plot([i,i], [0, DISTANCE], "--", color= COLOR["linechange"], alpha=0.5)
-        for i in range(len(self.list_t)):
-            plt.figure(1)
-            plt.plot(self.list_t[i][1], self.list_x[i], '-', label=self.list_t[i][0])
-        for car in self.cars:
-            plt.figure(1)
-            plt.plot(car.time, car.x, '-', label=car.name)
-        plt.ylim(0, DISTANCE)
-        plt.grid()
-        plt.legend()
+        # matplotlib est long à charger, on ne l'importe que pour afficher le graphe
+        import matplotlib.pyplot as plt
+
+        engine = self.engine
+        recorder = engine.recorder
+        distance = engine.scenario.DISTANCE
+        diagram = TimeSpaceDiagram.from_data(recorder.data(), engine.changeline,
+                                             recorder.interval * engine.dt, x_max=distance)
+        t_max = diagram.shape[0] * diagram.dt
+        # on affiche la vitesse moyenne en fonction du temps et de la position (x)
+        fig, (top, bottom) = plt.subplots(2, 1, sharex=True, num=1, height_ratios=(4, 1))
+        picture = top.imshow(diagram.speed().T, origin="lower", aspect="auto", cmap="RdYlGn",
+                             vmin=0, vmax=engine.scenario.V0, extent=(0, t_max, 0, diagram.shape[1] * diagram.dx))
+        fig.colorbar(picture, ax=top, label="vitesse (m/s)")
+        top.set_ylim(0, distance)
+        # et le nombre de changements de voie au cours du temps
+        bottom.bar(np.arange(diagram.shape[0]) * diagram.dt, diagram.changes, diagram.dt,
+                   align="edge", color=COLOR["linechange"])
+        bottom.set_xlim(0, t_max)
         plt.show()
 
     def draw(self):
@@ -310,24 +205,98 @@ class Simulation:
         for pos in self.road:
             pygame.draw.line(self.screen, COLOR['road'],*pos, SIZE_ROAD)
 
-    def update(self):
+        # et enfin les voitures
+        rect = pygame.Rect(0, 0, *CAR_DIM)
+        for x, road, end in self.engine.positions():
+            rect.center = (x / ALPHA, Y_ROAD[road])
+            if end:
+                pygame.draw.rect(self.screen, COLOR['end'], rect)
+            else:
+                pygame.draw.rect(self.screen, COLOR['car'], rect)
+
+    def events(self):
         """
-        Actualise à chaque image les voitures.
+        Acquisition des différents événements.
 
         Parameters
         ----------
         None
 
+        Returns
+        -------
+        bool
+            False si la fenêtre a été fermée
+        """
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or pygame.key.get_pressed()[pygame.K_ESCAPE]:
+                self.engine.running = False
+                self.engine.close()
+                pygame.quit()
+                return False
+            elif pygame.key.get_pressed()[pygame.K_SPACE]:
+                print(SLICE)
+                print("/!\ les résultats suivant ceux-ci seront inutilisables,")
+                print("il est conseillé de relancer la simulation (appuyer sur 'r')")
+                self.show_graph()
+            elif pygame.key.get_pressed()[pygame.K_r]:
+                if pygame.time.get_ticks()-self.reset_time > self.cooldown:
+                    if not DEFAULT:
+                        print(SLICE)
+                        self.rest = bool(input("si vous voulez les mêmes restrictions appuyez sur entrée sinon écrivez n'importe quoi\n"))
+                    self.engine.initialise(restriction() if self.rest and not DEFAULT else None)
+                    self.initialise()
+                    self.reset_time = pygame.time.get_ticks()
+            elif pygame.key.get_pressed()[pygame.K_s]:
+                if pygame.time.get_ticks()-self.reset_time > self.cooldown:
+                    self.engine.checkpoint(CHECKPOINT)
+                    print(f"simulation enregistrée dans {CHECKPOINT} ({self.engine.time:.1f} s)")
+                    self.reset_time = pygame.time.get_ticks()
+            elif pygame.key.get_pressed()[pygame.K_l]:
+                if pygame.time.get_ticks()-self.reset_time > self.cooldown:
+                    try:
+                        self.engine.restore(CHECKPOINT)
+                    except (OSError, ValueError) as error:
+                        print(ERREUR)
+                        print(error)
+                    else:
+                        self.initialise()
+                        print(f"simulation reprise à {self.engine.time:.1f} s")
+                    self.reset_time = pygame.time.get_ticks()
+        return True
+
+    def notify(self, engine):
+        """
+        Actualise la fenêtre après chaque pas du moteur.
+
+        Les événements sont lus à chaque pas, mais la fenêtre n'est
+        redessinée qu'au plus FPS fois par seconde : le moteur peut faire
+        plusieurs pas entre deux images.
+
+        Parameters
+        ----------
+        engine : Engine
+            moteur qui vient d'avancer d'un pas
+
         Returns
         -------
         None
         """
 
-        self.cars.update()
+        if not self.events():
+            return None
+        start = perf_counter()
+        if start - self.drawn < 1 / FPS:
+            return None
+        self.drawn = start
+        self.draw()
+        pygame.display.update()  # rafraîchissement de la page
+        if engine.stats is not None:
+            engine.stats.lap("draw", start)
 
     def run(self):
         """
-        Boucle permettant l'affichage et l'acquisition des différents événements.
+        Lance le moteur avec l'affichage.
 
         Parameters
         ----------
@@ -337,38 +306,16 @@ class Simulation:
         -------
         None
         """
-        cooldown = 1e3
-        time = 0
+
         print(SLICE)
         print("pour quitter la simulation:          échap")
         print("pour relancer la simulation:         r")
+        print("pour enregistrer la simulation:      s")
+        print("pour reprendre l'enregistrement:     l")
         print("pour voir les résultats et autre:    espace")
-        while True:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT or pygame.key.get_pressed()[pygame.K_ESCAPE]:
-                    pygame.quit()
-                elif pygame.key.get_pressed()[pygame.K_SPACE]:
-                    print(SLICE)
-                    print("/!\ les résultats suivant ceux-ci seront inutilisables,")
-                    print("il est conseillé de relancer la simulation (appuyer sur 'r')")
-                    self.show_graph()
-                elif pygame.key.get_pressed()[pygame.K_r]:
-                    if pygame.time.get_ticks()-time > cooldown:
-                        if not DEFAULT:
-                            print(SLICE)
-                            self.rest = bool(input("si vous voulez les mêmes restrictions appuyez sur entrée sinon écrivez n'importe quoi\n"))
-                        self.initialise()
-                        time = pygame.time.get_ticks()
-            self.spawn()
-            self.cars_sort.sort(key=lambda x: x.pos[0]) # on trie la liste
-            self.draw()
-            self.update()
-            pygame.display.update()  # rafraîchissement de la page
-            self.dt = self.clock.tick(FPS) * 1e-3  # temps entre chaque actualisation en seconde
-            self.frame +=1
+        self.engine.run()
 
 if __name__ == '__main__':
     # lancement du programme
     simu = Simulation()
     simu.run()
-
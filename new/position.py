@@ -1,37 +1,35 @@
+import struct
+import sys
+from array import array
 import bpy
 from mathutils import Vector
 
-L=[]
+# même format que tracks.py (écrit sans NumPy pour tourner dans Blender) :
+# signature et nombre de véhicules, puis les (x, y, z) en float32 de chaque image
+MAGIC = b"TRK1"
+HEADER = struct.Struct("<4sI")
+CHUNK = 256  # nombre d'images gardées en mémoire avant d'écrire
+FRAMES = range(1, 3712)
+PATH = "C:/Users/pubti/Documents/mp/location.bin"
 
-# Boucler à travers tous les objets dans la scène
-for obj in bpy.context.scene.objects:
-    # Sélectionner l'objet
-    bpy.ops.object.select_all(action='DESELECT')
-    obj.select_set(True)
+# les voitures suivies sont les objets dont le nom fait 9 caractères
+cars = [obj for obj in bpy.context.scene.objects if len(obj.name) == 9]
 
-    # Mettre à jour la vue 3D
-    if len(obj.name) == 9:
-        bpy.context.view_layer.objects.active = obj
-        num = int(obj.name[-3:])
-        if num %10 == 0 :
-            print(num)  # pour connaître l'avancement du programme
-        T = []
-        for frame in range(1, 3712):
-            bpy.context.scene.frame_current = frame
-            bbox = obj.bound_box
-            center = sum((Vector(b) for b in bbox), Vector()) / 8
-
-            # Placer le 3D curseur au centre géométrique de l'objet
-            bpy.context.scene.cursor.location = obj.matrix_world @ center
-            T.append(bpy.context.scene.cursor.location[:3])
-        L.append(T)
-
-with open("C:/Users/pubti/Documents/mp/location.txt", "w") as f :
-    for i in range(len(L[0])):
-        if i%100 == 0:
-            print(f"{i}/ {len(L[0])}")
-        line = ""
-        for j in range(len(L)):
-            line += str(L[j][i]) + ";"
-        line = line[:-1] + "\n"
-        f.write(line)
\ No newline at end of file
+with open(PATH, "wb") as f:
+    f.write(HEADER.pack(MAGIC, len(cars)))
+    values = array("f")
+    # on change d'image une seule fois pour toutes les voitures
+    for n, frame in enumerate(FRAMES):
+        if n % 100 == 0:
+            print(f"{n}/ {len(FRAMES)}")  # pour connaître l'avancement du programme
+        bpy.context.scene.frame_current = frame
+        for obj in cars:
+            # centre géométrique de l'objet dans le repère de la scène
+            center = sum((Vector(b) for b in obj.bound_box), Vector()) / 8
+            values.extend((obj.matrix_world @ center)[:3])
+        # on écrit par morceaux pour ne jamais garder toute la capture en mémoire
+        if (n + 1) % CHUNK == 0 or n == len(FRAMES) - 1:
+            if sys.byteorder != "little":
+                values.byteswap()
+            values.tofile(f)
+            values = array("f")
@@ -0,0 +1,345 @@
+import struct
+import zlib
+import numpy as np
+from settings import *
+
+
+# couleurs de la vitesse moyenne (rouge : bouchon, vert : fluide)
+SPEED_COLORS = np.array([(200, 30, 30), (240, 200, 40), (40, 170, 60)], np.float64)
+# couleurs de la densité (blanc : vide, noir : saturé)
+DENSITY_COLORS = np.array([(255, 255, 255), (0, 0, 0)], np.float64)
+# couleur des cases sans voiture et des barres de changement de voie
+EMPTY_COLOR = (255, 255, 255)
+CHANGE_COLOR = (40, 60, 200)
+
+
+def write_png(path, image):
+    """
+    Écrit une image RGB dans un fichier PNG avec la seule bibliothèque standard.
+
+    Parameters
+    ----------
+    path : str
+        chemin du fichier
+    image : numpy.ndarray
+        image (hauteur, largeur, 3) en uint8
+
+    Returns
+    -------
+    None
+    """
+
+    image = np.ascontiguousarray(image, np.uint8)
+    height, width = image.shape[:2]
+    # chaque ligne commence par le filtre 0 (aucun)
+    raw = np.zeros((height, width * 3 + 1), np.uint8)
+    raw[:, 1:] = image.reshape(height, width * 3)
+
+    def chunk(kind, data):
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body) & 0xffffffff)
+
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(raw.tobytes(), 6)))
+        f.write(chunk(b"IEND", b""))
+
+
+def colorize(values, colors, vmax):
+    """
+    Passe des valeurs à des couleurs par interpolation linéaire.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        valeurs à colorer, NaN pour une case vide
+    colors : numpy.ndarray
+        couleurs réparties régulièrement entre 0 et vmax
+    vmax : float
+        valeur de la dernière couleur
+
+    Returns
+    -------
+    numpy.ndarray
+        image (..., 3) en uint8
+    """
+
+    empty = np.isnan(values)
+    level = np.clip(np.where(empty, 0, values) / vmax, 0, 1) * (len(colors) - 1)
+    steps = np.arange(len(colors))
+    image = np.stack([np.interp(level, steps, colors[:, c]) for c in range(3)], axis=-1)
+    image[empty] = EMPTY_COLOR
+    return image.astype(np.uint8)
+
+
+class TimeSpaceDiagram:
+    """
+    Diagramme espace-temps tramé des trajectoires.
+
+    Au lieu de tracer une courbe par voiture, les échantillons sont rangés en
+    une seule passe dans une grille (temps, abscisse) avec "np.bincount" : on
+    garde le nombre d'échantillons et la somme des vitesses de chaque case,
+    d'où la densité et la vitesse moyenne. Les données peuvent venir de
+    l'enregistreur ou d'un TrajectoryStore ouvert sur le disque (tableaux
+    numpy.memmap lus par morceaux). Les changements de voie forment un
+    histogramme dessiné sous le diagramme.
+
+    ...
+
+    Attributes
+    ----------
+    t_max : float
+        durée couverte en seconde
+    x_max : float
+        longueur de route couverte en mètre
+    dt : float
+        durée d'une case en seconde
+    dx : float
+        longueur d'une case en mètre
+    period : float
+        temps entre deux prélèvements d'une même voiture en seconde
+    count : numpy.ndarray
+        nombre d'échantillons de chaque case (temps, abscisse)
+    speed_sum : numpy.ndarray
+        somme des vitesses des échantillons de chaque case
+    changes : numpy.ndarray
+        nombre de changements de voie de chaque intervalle de temps
+
+    Methods
+    -------
+    from_data(columns, changes, period, dt, dx, x_max):
+        Construit le diagramme de toutes les données d'un coup.
+    add(columns):
+        Ajoute des échantillons au diagramme.
+    add_changes(times):
+        Ajoute des changements de voie à l'histogramme.
+    density():
+        Donne la densité moyenne de chaque case en véhicule par km.
+    speed():
+        Donne la vitesse moyenne de chaque case en m/s.
+    image(layer, scale, strip, vmax):
+        Donne le diagramme comme une image RGB.
+    save(path, layer, scale, strip, vmax):
+        Écrit le diagramme dans un fichier PNG.
+    """
+
+    # nombre de lignes lues à la fois (borne la mémoire pour les fichiers sur le disque)
+    BLOCK = 1 << 20
+
+    def __init__(self, t_max, x_max=DISTANCE, dt=1.0, dx=10.0, period=RECORD_INTERVAL * STEP):
+        """
+        Construit tous les  attributs nécessaires pour le diagramme.
+
+        Parameters
+        ----------
+        t_max : float
+            durée couverte en seconde
+        x_max : float
+            longueur de route couverte en mètre
+        dt : float
+            durée d'une case en seconde
+        dx : float
+            longueur d'une case en mètre
+        period : float
+            temps entre deux prélèvements d'une même voiture en seconde
+        """
+
+        self.t_max = t_max
+        self.x_max = x_max
+        self.dt = dt
+        self.dx = dx
+        self.period = period
+        self.shape = (max(1, int(np.ceil(t_max / dt))), max(1, int(np.ceil(x_max / dx))))
+        self.count = np.zeros(self.shape, np.int64)
+        self.speed_sum = np.zeros(self.shape, np.float64)
+        self.changes = np.zeros(self.shape[0], np.int64)
+
+    @classmethod
+    def from_data(cls, columns, changes=(), period=RECORD_INTERVAL * STEP, dt=1.0, dx=10.0, x_max=DISTANCE):
+        """
+        Construit le diagramme de toutes les données d'un coup.
+
+        Parameters
+        ----------
+        columns : dict
+            colonnes "time", "x" et "velocity" (enregistreur ou TrajectoryStore)
+        changes : sequence
+            instants des changements de voie en seconde
+        period : float
+            temps entre deux prélèvements d'une même voiture en seconde
+        dt : float
+            durée d'une case en seconde
+        dx : float
+            longueur d'une case en mètre
+        x_max : float
+            longueur de route couverte en mètre
+
+        Returns
+        -------
+        TimeSpaceDiagram
+            diagramme rempli
+        """
+
+        time = columns["time"]
+        # les échantillons sont rangés par instant, le dernier est le plus tardif
+        t_max = float(time[-1]) + dt if len(time) else dt
+        if len(changes):
+            t_max = max(t_max, float(np.max(changes)) + dt)
+        diagram = cls(t_max, x_max, dt, dx, period)
+        diagram.add(columns)
+        diagram.add_changes(changes)
+        return diagram
+
+    def add(self, columns):
+        """
+        Ajoute des échantillons au diagramme.
+
+        Parameters
+        ----------
+        columns : dict
+            colonnes "time", "x" et "velocity", les échantillons hors du
+            diagramme sont ignorés
+
+        Returns
+        -------
+        None
+        """
+
+        size = self.count.size
+        for begin in range(0, len(columns["time"]), self.BLOCK):
+            part = slice(begin, begin + self.BLOCK)
+            t = np.floor(np.asarray(columns["time"][part]) / self.dt).astype(np.int64)
+            x = np.floor(np.asarray(columns["x"][part]) / self.dx).astype(np.int64)
+            inside = (t >= 0) & (t < self.shape[0]) & (x >= 0) & (x < self.shape[1])
+            cell = t[inside] * self.shape[1] + x[inside]
+            speed = np.asarray(columns["velocity"][part], np.float64)[inside]
+            self.count += np.bincount(cell, minlength=size).reshape(self.shape)
+            self.speed_sum += np.bincount(cell, speed, minlength=size).reshape(self.shape)
+
+    def add_changes(self, times):
+        """
+        Ajoute des changements de voie à l'histogramme.
+
+        Parameters
+        ----------
+        times : sequence
+            instants des changements de voie en seconde
+
+        Returns
+        -------
+        None
+        """
+
+        t = np.floor(np.asarray(times, np.float64) / self.dt).astype(np.int64)
+        t = t[(t >= 0) & (t < self.shape[0])]
+        self.changes += np.bincount(t, minlength=self.shape[0])
+
+    def density(self):
+        """
+        Donne la densité moyenne de chaque case en véhicule par km.
+
+        Un échantillon représente une voiture pendant "period" secondes.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        numpy.ndarray
+            densité de chaque case (temps, abscisse)
+        """
+
+        return self.count * (self.period / self.dt) / (self.dx / 1000)
+
+    def speed(self):
+        """
+        Donne la vitesse moyenne de chaque case en m/s.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        numpy.ndarray
+            vitesse de chaque case (temps, abscisse), NaN si elle est vide
+        """
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.count > 0, self.speed_sum / self.count, np.nan)
+
+    def image(self, layer="speed", scale=1, strip=40, vmax=None):
+        """
+        Donne le diagramme comme une image RGB.
+
+        Le temps va de gauche à droite et l'abscisse de bas en haut, comme
+        l'ancienne courbe. L'histogramme des changements de voie est ajouté
+        en dessous sur "strip" pixels de haut.
+
+        Parameters
+        ----------
+        layer : str
+            "speed" pour la vitesse moyenne, "density" pour la densité
+        scale : int
+            nombre de pixels de côté de chaque case
+        strip : int
+            hauteur de l'histogramme en pixel, pas d'histogramme si 0
+        vmax : float
+            haut de l'échelle de couleur : vitesse en m/s (V0 du scénario
+            simulé, ex: engine.scenario.V0, celui de settings.py si None)
+            ou densité en véhicule par km (la plus forte si None)
+
+        Returns
+        -------
+        numpy.ndarray
+            image (hauteur, largeur, 3) en uint8
+        """
+
+        if layer == "speed":
+            image = colorize(self.speed(), SPEED_COLORS, V0 if vmax is None else vmax)
+        else:
+            density = self.density()
+            if vmax is None:
+                vmax = density.max() if density.max() > 0 else 1
+            image = colorize(np.where(self.count > 0, density, np.nan), DENSITY_COLORS, vmax)
+        # (temps, abscisse) -> (abscisse vers le haut, temps vers la droite)
+        image = image.transpose(1, 0, 2)[::-1]
+        image = image.repeat(scale, axis=0).repeat(scale, axis=1)
+        if strip:
+            width = image.shape[1]
+            bars = np.full((strip, width, 3), 255, np.uint8)
+            most = self.changes.max()
+            if most > 0:
+                height = np.round(self.changes.repeat(scale) / most * strip).astype(np.int64)
+                filled = np.arange(strip)[::-1, None] < height[None, :]
+                bars[filled] = CHANGE_COLOR
+            image = np.concatenate([image, bars])
+        return image
+
+    def save(self, path, layer="speed", scale=1, strip=40, vmax=None):
+        """
+        Écrit le diagramme dans un fichier PNG.
+
+        Parameters
+        ----------
+        path : str
+            chemin du fichier
+        layer : str
+            "speed" pour la vitesse moyenne, "density" pour la densité
+        scale : int
+            nombre de pixels de côté de chaque case
+        strip : int
+            hauteur de l'histogramme en pixel, pas d'histogramme si 0
+        vmax : float
+            haut de l'échelle de couleur : vitesse en m/s (V0 du scénario
+            simulé, ex: engine.scenario.V0, celui de settings.py si None)
+            ou densité en véhicule par km (la plus forte si None)
+
+        Returns
+        -------
+        None
+        """
+
+        write_png(path, self.image(layer, scale, strip, vmax))
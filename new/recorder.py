@@ -0,0 +1,332 @@
+import numpy as np
+from settings import *
+
+
+class TrajectoryRecorder:
+    """
+    Enregistreur des trajectoires dans des tampons NumPy préalloués.
+
+    Tous les "interval" pas, la position de chaque voiture est copiée dans un
+    tampon (un tableau par colonne) de "chunk" lignes. On choisit donc le pas
+    d'échantillonnage au moment d'enregistrer au lieu de garder chaque image
+    puis de trier à la sortie de la voiture. Trois modes :
+     - "full" : quand un tampon est plein on en alloue un nouveau, tout est
+       gardé (ou envoyé à "sink" si on en donne un)
+     - "ring" : un seul tampon réutilisé en boucle, on ne garde que les
+       "chunk" derniers échantillons (pour un affichage en direct)
+     - "off" : rien n'est enregistré
+
+    ...
+
+    Attributes
+    ----------
+    mode : str
+        "full", "ring" ou "off"
+    interval : int
+        nombre de pas entre deux prélèvements
+    chunk : int
+        nombre de lignes de chaque tampon
+    sink : object
+        destination des tampons pleins (méthode "write(columns)"), on les
+        garde en mémoire si None
+    chunks : list
+        tampons pleins gardés en mémoire
+    buffer : dict
+        tampon en cours de remplissage, un tableau par colonne
+    fill : int
+        nombre de lignes écrites dans le tampon en cours
+    total : int
+        nombre total d'échantillons enregistrés
+
+    Methods
+    -------
+    reset():
+        Vide l'enregistreur.
+    due(frame):
+        Indique s'il faut prélever les positions à ce pas.
+    record(name, time, x, road, velocity):
+        Ajoute les échantillons d'un pas.
+    flush():
+        Envoie le tampon en cours à "sink".
+    close():
+        Envoie le dernier tampon et ferme "sink".
+    data():
+        Donne tous les échantillons gardés en mémoire, dans l'ordre.
+    trajectories():
+        Donne la trajectoire de chaque voiture.
+    state():
+        Donne le contenu de l'enregistreur en tableaux.
+    load_state(state):
+        Remet l'enregistreur dans l'état donné par "state".
+    """
+
+    # nom et type de chaque colonne
+    COLUMNS = (
+        ("name", np.int64),        # numéro de la voiture
+        ("time", np.float64),      # instant en seconde
+        ("x", np.float64),         # abscisse en mètre
+        ("road", np.int8),         # voie
+        ("velocity", np.float32),  # vitesse en m/s
+    )
+
+    def __init__(self, mode="full", interval=RECORD_INTERVAL, chunk=RECORD_CHUNK, sink=None):
+        """
+        Construit tous les  attributs nécessaires pour l'enregistreur.
+
+        Parameters
+        ----------
+        mode : str
+            "full", "ring" ou "off"
+        interval : int
+            nombre de pas entre deux prélèvements
+        chunk : int
+            nombre de lignes de chaque tampon (nombre d'échantillons gardés en mode "ring")
+        sink : object
+            destination des tampons pleins, gardés en mémoire si None
+        """
+
+        self.mode = mode
+        self.interval = interval
+        self.chunk = chunk
+        self.sink = sink
+        self.reset()
+
+    def new_buffer(self):
+        """Alloue un tampon vide."""
+
+        return {name: np.zeros(self.chunk, dtype) for name, dtype in self.COLUMNS}
+
+    def reset(self):
+        """
+        Vide l'enregistreur.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        self.chunks = []
+        self.buffer = None if self.mode == "off" else self.new_buffer()
+        self.fill = 0
+        self.total = 0
+
+    def due(self, frame):
+        """
+        Indique s'il faut prélever les positions à ce pas.
+
+        Parameters
+        ----------
+        frame : int
+            numéro du pas
+
+        Returns
+        -------
+        bool
+            True s'il faut appeler "record"
+        """
+
+        return self.mode != "off" and frame % self.interval == 0
+
+    def record(self, name, time, x, road, velocity):
+        """
+        Ajoute les échantillons d'un pas.
+
+        Parameters
+        ----------
+        name : array_like
+            numéro de chaque voiture
+        time : float
+            instant du prélèvement en seconde
+        x : array_like
+            abscisse de chaque voiture en mètre
+        road : array_like
+            voie de chaque voiture
+        velocity : array_like
+            vitesse de chaque voiture en m/s
+
+        Returns
+        -------
+        None
+        """
+
+        if self.mode == "off":
+            return None
+        values = {"name": np.asarray(name), "x": np.asarray(x),
+                  "road": np.asarray(road), "velocity": np.asarray(velocity)}
+        count = len(values["name"])
+        values["time"] = np.full(count, time)
+        self.total += count
+        done = 0
+        while done < count:
+            # on remplit le tampon en cours autant que possible
+            size = min(count - done, self.chunk - self.fill)
+            for column, array in self.buffer.items():
+                array[self.fill:self.fill + size] = values[column][done:done + size]
+            self.fill += size
+            done += size
+            if self.fill == self.chunk:
+                if self.mode == "ring":
+                    self.fill = 0
+                else:
+                    self.flush()
+
+    def flush(self):
+        """
+        Envoie le tampon en cours à "sink" (ou le garde en mémoire).
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        if self.mode != "full" or self.fill == 0:
+            return None
+        full = {column: array[:self.fill] for column, array in self.buffer.items()}
+        if self.sink is None:
+            self.chunks.append(full)
+        else:
+            self.sink.write(full)
+        self.buffer = self.new_buffer()
+        self.fill = 0
+
+    def close(self):
+        """
+        Envoie le dernier tampon et ferme "sink" s'il peut l'être.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        self.flush()
+        if self.sink is not None and hasattr(self.sink, "close"):
+            self.sink.close()
+
+    def data(self):
+        """
+        Donne tous les échantillons gardés en mémoire, dans l'ordre.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        dict
+            un tableau par colonne
+        """
+
+        if self.mode == "off":
+            return {column: np.zeros(0, dtype) for column, dtype in self.COLUMNS}
+        if self.mode == "ring":
+            if self.total < self.chunk:
+                return {column: array[:self.fill].copy() for column, array in self.buffer.items()}
+            # le tampon a fait le tour, les plus anciens sont juste après "fill"
+            return {column: np.roll(array, - self.fill) for column, array in self.buffer.items()}
+        parts = self.chunks + [{column: array[:self.fill] for column, array in self.buffer.items()}]
+        return {column: np.concatenate([part[column] for part in parts]) for column, dtype in self.COLUMNS}
+
+    def state(self):
+        """
+        Donne le contenu de l'enregistreur en tableaux (cf BaseEngine.checkpoint).
+
+        Les tampons déjà envoyés à "sink" restent sur le disque et ne sont
+        pas repris, seul leur nombre de lignes se déduit des compteurs.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        dict
+            réglages, compteurs, tampons pleins mis bout à bout (avec la
+            taille de chacun) et lignes utiles du tampon en cours
+        """
+
+        # en mode "ring" tout le tampon sert dès qu'il a fait le tour
+        rows = self.fill if self.mode == "full" else min(self.total, self.chunk)
+        state = {"mode": np.array(self.mode), "interval": np.array(self.interval), "chunk": np.array(self.chunk),
+                 "fill": np.array(self.fill), "total": np.array(self.total),
+                 "sizes": np.array([len(part["name"]) for part in self.chunks], np.int64)}
+        for column, dtype in self.COLUMNS:
+            parts = [part[column] for part in self.chunks]
+            state["chunks." + column] = np.concatenate(parts) if parts else np.zeros(0, dtype)
+            state["buffer." + column] = np.zeros(0, dtype) if self.buffer is None else self.buffer[column][:rows]
+        return state
+
+    def load_state(self, state):
+        """
+        Remet l'enregistreur dans l'état donné par "state" ("sink" est gardé).
+
+        Les lignes envoyées à "sink" après l'enregistrement de "state" en
+        sont retirées avec "sink.truncate(rows)" (cf TrajectoryStore), sans
+        quoi elles seraient suivies d'instants plus anciens.
+
+        Parameters
+        ----------
+        state : dict
+            tableaux donnés par "state"
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        ValueError
+            si "sink" n'a pas de méthode "truncate"
+        """
+
+        if self.sink is not None and not hasattr(self.sink, "truncate"):
+            raise ValueError(f"impossible de ramener {type(self.sink).__name__} au point de reprise (pas de truncate)")
+        self.mode = str(state["mode"])
+        self.interval = int(state["interval"])
+        self.chunk = int(state["chunk"])
+        self.reset()
+        cuts = np.cumsum(state["sizes"])[:-1]
+        parts = {column: np.split(state["chunks." + column], cuts) for column, _ in self.COLUMNS}
+        self.chunks = [{column: parts[column][k] for column, _ in self.COLUMNS} for k in range(len(state["sizes"]))]
+        if self.buffer is not None:
+            for column, array in self.buffer.items():
+                rows = state["buffer." + column]
+                array[:len(rows)] = rows
+        self.fill = int(state["fill"])
+        self.total = int(state["total"])
+        if self.sink is not None:
+            # tout ce qui n'est ni gardé en mémoire ni dans le tampon en cours était déjà envoyé
+            sent = self.total - self.fill - int(np.sum(state["sizes"])) if self.mode == "full" else 0
+            self.sink.truncate(sent)
+
+    def trajectories(self):
+        """
+        Donne la trajectoire de chaque voiture.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        list
+            ensemble des (numéro, temps, abscisses) de chaque voiture
+        """
+
+        data = self.data()
+        order = np.argsort(data["name"], kind="stable")
+        name = data["name"][order]
+        cut = np.nonzero(np.diff(name))[0] + 1
+        return [(int(data["name"][part[0]]), data["time"][part], data["x"][part])
+                for part in np.split(order, cut) if len(part)]
@@ -0,0 +1,119 @@
+from bisect import bisect_left
+import numpy as np
+
+
+class Restrictions:
+    """
+    Restrictions de la route rangées dans des tableaux triés.
+
+    La route est découpée en zones par les abscisses de début de chaque
+    restriction. Trouver la zone d'une voiture se fait par dichotomie, ou
+    mieux en partant de la zone où elle était au pas précédent : une voiture
+    n'avance que d'une fraction de zone à chaque pas, elle reste donc presque
+    toujours dans la même zone.
+
+    ...
+
+    Attributes
+    ----------
+    bounds : numpy.ndarray
+        abscisse de début de chaque zone (triées, même unité que les restrictions)
+    speeds : numpy.ndarray
+        vitesse limite de chaque zone en m/s
+    lanes : numpy.ndarray
+        nombre de voies de chaque zone
+
+    Methods
+    -------
+    find(front):
+        Donne la zone d'une voiture par dichotomie.
+    advance(zone, front):
+        Met à jour la zone d'une voiture à partir de sa zone précédente.
+    find_all(front):
+        Donne la zone de toutes les voitures d'un coup.
+    """
+
+    def __init__(self, restrictions):
+        """
+        Construit tous les  attributs nécessaires pour les restrictions.
+
+        Parameters
+        ----------
+        restrictions : list
+            ensemble des (distance, vitesse, nombre de voies)
+        """
+
+        restrictions = sorted(restrictions, key=lambda x: x[0])
+        self.bounds = np.array([rest[0] for rest in restrictions], np.float64)
+        self.speeds = np.array([rest[1] for rest in restrictions], np.float64)
+        self.lanes = np.array([rest[2] for rest in restrictions], np.int8)
+        # les mêmes en listes Python, plus rapides à lire une case à la fois
+        self.bound_list = self.bounds.tolist()
+        self.speed_list = self.speeds.tolist()
+        self.lane_list = self.lanes.tolist()
+
+    def __len__(self):
+        return len(self.bound_list)
+
+    def find(self, front):
+        """
+        Donne la zone d'une voiture par dichotomie.
+
+        Comme dans l'ancien parcours, une voiture entre dans une zone dès que
+        son avant dépasse strictement le début de celle-ci, la première zone
+        s'appliquant à tout ce qui est avant.
+
+        Parameters
+        ----------
+        front : float
+            abscisse de l'avant de la voiture
+
+        Returns
+        -------
+        int
+            indice de la zone
+        """
+
+        return bisect_left(self.bound_list, front, 1) - 1
+
+    def advance(self, zone, front):
+        """
+        Met à jour la zone d'une voiture à partir de sa zone précédente.
+
+        Parameters
+        ----------
+        zone : int
+            zone de la voiture au pas précédent
+        front : float
+            abscisse de l'avant de la voiture
+
+        Returns
+        -------
+        int
+            indice de la nouvelle zone
+        """
+
+        bounds = self.bound_list
+        # la voiture est revenue en arrière (route en boucle), on recherche
+        if zone > 0 and front <= bounds[zone]:
+            return self.find(front)
+        while zone + 1 < len(bounds) and front > bounds[zone + 1]:
+            zone += 1
+        return zone
+
+    def find_all(self, front):
+        """
+        Donne la zone de toutes les voitures d'un coup.
+
+        Parameters
+        ----------
+        front : numpy.ndarray
+            abscisse de l'avant de chaque voiture
+
+        Returns
+        -------
+        numpy.ndarray
+            indice de la zone de chaque voiture
+        """
+
+        return np.searchsorted(self.bounds[1:], front, side="left")
@@ -0,0 +1,303 @@
+import argparse
+import json
+import struct
+import numpy as np
+from settings import *
+
+
+# signature du format binaire des données d'apparition
+MAGIC = b"DEM1"
+# colonnes obligatoires du format binaire, d'autres peuvent suivre (v0, P...)
+COLUMNS = (("time", "<f8"), ("speed", "<f8"), ("road", "i1"))
+# les colonnes commencent à un multiple de cette taille
+ALIGN = 64
+
+
+def load(path=DEMAND, crop=CROP):
+    """
+    Lire le fichier d'apparition et renvoyer les différents paramètres.
+
+    Le format est reconnu à sa signature : binaire (cf save_binary) ou le
+    texte d'origine à trois lignes.
+
+    Parameters
+    ----------
+    path : str
+        chemin du fichier d'apparition
+    crop : int
+        nombre de voitures à ignorer au début (présentes avant le début de la vidéo)
+
+    Returns
+    -------
+    dict
+        "time" : numéros d'images où apparaît chaque voiture
+        "speed" : vitesse initiale de chaque voiture en m/s
+        "road" : voie sur laquelle la voiture apparaît
+        (et les colonnes facultatives du format binaire)
+    """
+
+    with open(path, "rb") as f:
+        binary = f.read(len(MAGIC)) == MAGIC
+    if binary:
+        return load_binary(path, crop)
+    with open(path, "r") as f:
+        # temps d'apparition des voitures
+        time = f.readline()[:-1]
+        time = [int(i) for i in time.split(",")]
+
+        # vitesse quand la voiture apparaît en mètres par seconde
+        speed = f.readline()[:-1]
+        speed = [float(i) for i in speed.split(",")]
+
+        # de quel côté la voiture apparaît
+        road =f.readline()
+        road = [int(i) for i in road.split(",")]
+    return {"time": tuple(time[crop:]), "speed": tuple(speed[crop:]), "road": tuple(road[crop:])}
+
+
+def save_binary(path, time, speed, road, **extra):
+    """
+    Écrit des données d'apparition au format binaire.
+
+    Le fichier contient MAGIC, la taille de l'en-tête (uint32), un en-tête
+    JSON (nombre de voitures, nom et type de chaque colonne) puis chaque
+    colonne à la suite, alignée sur ALIGN octets. On relit une colonne sans
+    la convertir avec numpy.memmap (ou numpy.fromfile).
+
+    Parameters
+    ----------
+    path : str
+        chemin du fichier
+    time : sequence
+        numéro de l'image où apparaît chaque voiture
+    speed : sequence
+        vitesse d'apparition de chaque voiture en m/s
+    road : sequence
+        voie d'apparition de chaque voiture
+    **extra : sequence
+        colonnes facultatives, une valeur par voiture (ex: v0=..., P=...)
+
+    Returns
+    -------
+    None
+    """
+
+    columns = {"time": time, "speed": speed, "road": road}
+    columns.update(extra)
+    types = dict(COLUMNS)
+    arrays = {}
+    for name, values in columns.items():
+        values = np.asarray(values)
+        dtype = np.dtype(types.get(name, values.dtype)).newbyteorder("<")
+        arrays[name] = np.ascontiguousarray(values, dtype)
+    count = len(arrays["time"])
+    if any(len(values) != count for values in arrays.values()):
+        raise ValueError("toutes les colonnes doivent avoir une valeur par voiture")
+
+    header = json.dumps({"count": count, "columns": [[name, values.dtype.str] for name, values in arrays.items()]})
+    header = header.encode()
+    start = len(MAGIC) + 4 + len(header)
+    header += b" " * (-start % ALIGN)
+    with open(path, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(header)) + header)
+        for values in arrays.values():
+            values.tofile(f)
+            f.write(b"\0" * (-values.nbytes % ALIGN))
+
+
+def load_binary(path, crop=CROP):
+    """
+    Lit des données d'apparition au format binaire sans les copier.
+
+    Parameters
+    ----------
+    path : str
+        chemin du fichier écrit par "save_binary"
+    crop : int
+        nombre de voitures à ignorer au début
+
+    Returns
+    -------
+    dict
+        tableau numpy.memmap de chaque colonne ("time", "speed", "road" et
+        les colonnes facultatives), sans les "crop" premières voitures
+    """
+
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} n'est pas un fichier d'apparition binaire")
+        size, = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(size))
+    count = header["count"]
+    offset = len(MAGIC) + 4 + size
+    columns = {}
+    for name, dtype in header["columns"]:
+        dtype = np.dtype(dtype)
+        if count:
+            columns[name] = np.memmap(path, dtype, "r", offset=offset, shape=(count,))[crop:]
+        else:
+            columns[name] = np.zeros(0, dtype)
+        offset += count * dtype.itemsize
+        offset += -offset % ALIGN
+    return columns
+
+
+def convert(source, destination):
+    """
+    Convertit un fichier d'apparition texte au format binaire.
+
+    Toutes les voitures sont gardées, "crop" s'applique à la lecture.
+
+    Parameters
+    ----------
+    source : str
+        fichier texte à trois lignes
+    destination : str
+        fichier binaire écrit
+
+    Returns
+    -------
+    int
+        nombre de voitures converties
+    """
+
+    data = load(source, crop=0)
+    save_binary(destination, data["time"], data["speed"], data["road"])
+    return len(data["time"])
+
+
+class SpawnSchedule:
+    """
+    Calendrier d'apparition des voitures trié une fois pour toutes.
+
+    Les apparitions sont triées par instant (l'ordre du fichier est gardé pour
+    un même instant) et un curseur avance au fur et à mesure de la simulation.
+    À chaque pas on ne regarde que la prochaine voiture (et une dichotomie
+    quand il y en a à faire apparaître), et toutes celles prévues au même
+    instant apparaissent.
+
+    ...
+
+    Attributes
+    ----------
+    name : numpy.ndarray
+        numéro de chaque voiture (indice dans les données d'apparition)
+    time : numpy.ndarray
+        instant d'apparition de chaque voiture en seconde
+    speed : numpy.ndarray
+        vitesse d'apparition de chaque voiture en m/s
+    road : numpy.ndarray
+        voie d'apparition de chaque voiture
+    cursor : int
+        nombre de voitures déjà apparues
+
+    Methods
+    -------
+    reset():
+        Remet le curseur au début.
+    due(t):
+        Donne les voitures qui doivent être apparues à l'instant t.
+    """
+
+    # marge pour comparer des instants calculés de deux façons différentes
+    EPS = 1e-9
+
+    def __init__(self, time, speed, road, fps=CAPTURE_FPS):
+        """
+        Construit tous les  attributs nécessaires pour le calendrier.
+
+        Parameters
+        ----------
+        time : sequence
+            numéro de l'image de la vidéo où apparaît chaque voiture
+        speed : sequence
+            vitesse d'apparition de chaque voiture en m/s
+        road : sequence
+            voie d'apparition de chaque voiture
+        fps : float
+            nombre d'images par seconde de la vidéo
+        """
+
+        time = np.asarray(time, np.float64) / fps
+        order = np.argsort(time, kind="stable")
+        self.name = order
+        self.time = time[order]
+        self.speed = np.asarray(speed, np.float64)[order]
+        self.road = np.asarray(road, np.int8)[order]
+        self.cursor = 0
+
+    def __len__(self):
+        return len(self.time)
+
+    def reset(self):
+        """
+        Remet le curseur au début.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        self.cursor = 0
+
+    def due(self, t):
+        """
+        Donne les voitures qui doivent être apparues à l'instant t.
+
+        Parameters
+        ----------
+        t : float
+            instant actuel de la simulation en seconde
+
+        Returns
+        -------
+        slice
+            voitures à faire apparaître, à appliquer à "name", "speed", "road"
+        """
+
+        begin = self.cursor
+        # la plupart du temps personne n'apparaît, on ne regarde que la suivante
+        if begin == len(self.time) or self.time[begin] > t + self.EPS:
+            return slice(begin, begin)
+        end = int(np.searchsorted(self.time, t + self.EPS, side="right"))
+        self.cursor = end
+        return slice(begin, end)
+
+
+def queue_offsets(road, spacing):
+    """
+    Décale les voitures qui apparaissent au même pas sur la même voie.
+
+    La première apparaît normalement, les suivantes sont placées les unes
+    derrière les autres (une longueur de voiture plus S0 à chaque fois).
+
+    Parameters
+    ----------
+    road : numpy.ndarray
+        voie de chaque voiture qui apparaît à ce pas
+    spacing : float
+        distance entre deux voitures de la file en mètre
+
+    Returns
+    -------
+    numpy.ndarray
+        décalage vers l'arrière de chaque voiture en mètre
+    """
+
+    rank = np.zeros(len(road))
+    for lane in np.unique(road):
+        same = road == lane
+        rank[same] = np.arange(same.sum())
+    return rank * spacing
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convertit un fichier d'apparition texte au format binaire.")
+    parser.add_argument("source", help="fichier texte (ex: assets/apparition.csv)")
+    parser.add_argument("destination", help="fichier binaire écrit (ex: assets/apparition.bin)")
+    args = parser.parse_args()
+    print(convert(args.source, args.destination), "voitures converties")
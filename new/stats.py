@@ -0,0 +1,220 @@
+from time import perf_counter
+
+
+class StepStats:
+    """
+    Chronomètres et compteurs de chaque phase d'un pas de simulation.
+
+    Le moteur n'en crée un que si STATS est vrai dans le scénario, sinon
+    "engine.stats" vaut None et le seul coût est un test "is None" par pas
+    (et par test de changement de voie pour le moteur objet). Les phases
+    sont chronométrées avec "lap" : on passe l'instant de fin de la phase
+    précédente et on récupère celui de fin de la phase en cours, ce qui ne
+    coûte qu'un appel à perf_counter par phase. Tous les "interval" pas une
+    ligne de résumé des derniers pas est donnée à "log".
+
+    ...
+
+    Attributes
+    ----------
+    interval : int
+        nombre de pas entre deux lignes de résumé, jamais si 0
+    log : callable
+        fonction qui reçoit chaque ligne de résumé (print par défaut)
+    steps : int
+        nombre de pas mesurés
+    seconds : dict
+        temps total passé dans chaque phase en seconde
+    counts : dict
+        total de chaque compteur
+    last : tuple
+        (steps, seconds, counts) lors de la dernière ligne de résumé
+
+    Methods
+    -------
+    reset():
+        Remet les chronomètres et compteurs à zéro.
+    lap(phase, start):
+        Ajoute le temps écoulé depuis "start" à une phase.
+    add(phase, seconds):
+        Ajoute une durée à une phase.
+    count(name, n):
+        Augmente un compteur.
+    end_step(engine):
+        Termine un pas et affiche le résumé si c'est le moment.
+    as_dict():
+        Donne toutes les mesures.
+    line():
+        Résume les pas depuis la dernière ligne.
+    """
+
+    # phases d'un pas, dans l'ordre ("draw" n'est mesurée que par la fenêtre)
+    PHASES = ("spawn", "restrictions", "mobil", "idm", "record", "draw")
+    # compteurs et leur nom dans la ligne de résumé
+    COUNTERS = {
+        "lane_tests": "tests",           # tests MOBIL d'un changement de voie
+        "lane_changes": "changements",   # changements de voie acceptés
+        "neighbor_lookups": "voisins",   # recherches des voisines sur une autre voie
+        "spawns": "apparitions",         # voitures apparues
+        "removals": "sorties",           # voitures sorties de la route
+    }
+
+    def __init__(self, interval=0, log=print):
+        """
+        Construit tous les  attributs nécessaires pour les mesures.
+
+        Parameters
+        ----------
+        interval : int
+            nombre de pas entre deux lignes de résumé, jamais si 0
+        log : callable
+            fonction qui reçoit chaque ligne de résumé
+        """
+
+        self.interval = interval
+        self.log = log
+        self.reset()
+
+    def reset(self):
+        """
+        Remet les chronomètres et compteurs à zéro.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        self.steps = 0
+        self.seconds = dict.fromkeys(self.PHASES, 0.0)
+        self.counts = dict.fromkeys(self.COUNTERS, 0)
+        self.last = (0, dict(self.seconds), dict(self.counts))
+
+    def lap(self, phase, start):
+        """
+        Ajoute le temps écoulé depuis "start" à une phase.
+
+        Parameters
+        ----------
+        phase : str
+            nom de la phase (cf PHASES)
+        start : float
+            instant (perf_counter) du début de la phase
+
+        Returns
+        -------
+        float
+            instant de fin de la phase, début de la suivante
+        """
+
+        now = perf_counter()
+        self.seconds[phase] += now - start
+        return now
+
+    def add(self, phase, seconds):
+        """
+        Ajoute une durée à une phase.
+
+        Parameters
+        ----------
+        phase : str
+            nom de la phase (cf PHASES)
+        seconds : float
+            durée en seconde
+
+        Returns
+        -------
+        None
+        """
+
+        self.seconds[phase] += seconds
+
+    def count(self, name, n=1):
+        """
+        Augmente un compteur.
+
+        Parameters
+        ----------
+        name : str
+            nom du compteur (cf COUNTERS)
+        n : int
+            valeur à ajouter
+
+        Returns
+        -------
+        None
+        """
+
+        self.counts[name] += n
+
+    def end_step(self, engine):
+        """
+        Termine un pas et affiche le résumé si c'est le moment.
+
+        Parameters
+        ----------
+        engine : BaseEngine
+            moteur qui vient de faire le pas
+
+        Returns
+        -------
+        None
+        """
+
+        self.steps += 1
+        if self.interval and self.steps % self.interval == 0:
+            self.log(f"pas {engine.frame} ({engine.time:.1f} s) : {self.line()}")
+            self.last = (self.steps, dict(self.seconds), dict(self.counts))
+
+    def as_dict(self):
+        """
+        Donne toutes les mesures.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        dict
+            nombre de pas ("steps"), temps total de chaque phase en seconde
+            ("seconds"), temps moyen d'un pas en milliseconde ("ms_per_step")
+            et total de chaque compteur ("counts")
+        """
+
+        total = sum(self.seconds.values())
+        return {
+            "steps": self.steps,
+            "seconds": dict(self.seconds),
+            "ms_per_step": total / self.steps * 1000 if self.steps else 0.0,
+            "counts": dict(self.counts),
+        }
+
+    def line(self):
+        """
+        Résume les pas depuis la dernière ligne.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        str
+            temps moyen d'un pas, part de chaque phase et compteurs par pas
+        """
+
+        steps, seconds, counts = self.last
+        steps = self.steps - steps
+        if steps == 0:
+            return "aucun pas"
+        spent = {phase: self.seconds[phase] - seconds[phase] for phase in self.PHASES}
+        total = sum(spent.values())
+        shares = " ".join(f"{phase} {value / total:.0%}" for phase, value in spent.items()
+                          if value > 0 and total > 0)
+        counters = " ".join(f"{label} {(self.counts[name] - counts[name]) / steps:.2f}"
+                            for name, label in self.COUNTERS.items())
+        return f"{total / steps * 1000:.3f} ms/pas ({shares}) | par pas : {counters}"
@@ -0,0 +1,305 @@
+import json
+import os
+import numpy as np
+from recorder import TrajectoryRecorder
+
+
+class TrajectoryStore:
+    """
+    Fichier de trajectoires sur le disque, une colonne par fichier binaire.
+
+    Le magasin sert de destination ("sink") à un TrajectoryRecorder : chaque
+    tampon plein est ajouté à la fin des fichiers de colonnes, la mémoire
+    utilisée ne dépend donc pas de la durée de la simulation. Les colonnes
+    sont des tableaux bruts que l'on relit sans copie avec numpy.memmap. Un
+    petit index permet de ne lire que les lignes d'une fenêtre de temps ou
+    d'une voiture. Dans chaque tampon, les lignes d'une même voiture forment
+    un segment de la permutation qui trie le tampon par voiture : une voiture
+    se lit en suivant ses segments, sans parcourir les lignes des autres. Le
+    dossier contient :
+     - "<colonne>.bin" : les valeurs de chaque colonne à la suite
+     - "order.bin" : lignes de chaque tampon triées par voiture
+     - "meta.json" : nombre de lignes et type de chaque colonne
+     - "blocks.npy" : première ligne et premier instant de chaque tampon
+     - "segments.npy" : début et taille de chaque segment dans "order.bin",
+       rangés par voiture
+     - "vehicles.npy" : premières/dernières lignes et instants de chaque
+       voiture, premier segment et nombre de segments
+
+    ...
+
+    Attributes
+    ----------
+    path : str
+        dossier du magasin
+    mode : str
+        "w" pour écrire, "r" pour lire
+    rows : int
+        nombre de lignes écrites
+    columns : dict
+        en lecture, tableau numpy.memmap de chaque colonne
+
+    Methods
+    -------
+    write(columns):
+        Ajoute un tampon à la fin des fichiers.
+    truncate(rows):
+        Enlève les tampons écrits à partir d'une ligne.
+    close():
+        Écrit l'index et ferme les fichiers.
+    open(path):
+        Ouvre un magasin existant en lecture.
+    window(t0, t1):
+        Donne les lignes entre deux instants sans les copier.
+    vehicle(name):
+        Donne les lignes d'une voiture.
+    """
+
+    # mêmes colonnes que l'enregistreur, rangées en petit-boutiste
+    DTYPES = {name: np.dtype(dtype).newbyteorder("<") for name, dtype in TrajectoryRecorder.COLUMNS}
+    # une entrée par voiture et par tampon
+    SEGMENT = np.dtype([("name", "<i8"), ("start", "<i8"), ("count", "<i8"), ("first_row", "<i8"),
+                        ("last_row", "<i8"), ("first_time", "<f8"), ("last_time", "<f8")])
+
+    def __init__(self, path, mode="w"):
+        """
+        Construit tous les  attributs nécessaires pour le magasin.
+
+        Parameters
+        ----------
+        path : str
+            dossier du magasin (créé en écriture)
+        mode : str
+            "w" pour écrire un nouveau magasin, "r" pour en lire un
+        """
+
+        self.path = path
+        self.mode = mode
+        if mode == "w":
+            os.makedirs(path, exist_ok=True)
+            self.files = {name: open(self.file(name), "wb") for name in self.DTYPES}
+            self.order = open(self.file("order"), "wb")
+            self.rows = 0
+            self.blocks = []
+            self.segments = []
+        else:
+            with open(os.path.join(path, "meta.json")) as f:
+                meta = json.load(f)
+            self.rows = meta["rows"]
+            self.columns = {}
+            for name, dtype in meta["columns"].items():
+                if self.rows:
+                    self.columns[name] = np.memmap(self.file(name), np.dtype(dtype), "r", shape=(self.rows,))
+                else:
+                    self.columns[name] = np.zeros(0, np.dtype(dtype))
+            if self.rows:
+                self.order = np.memmap(self.file("order"), "<i8", "r", shape=(self.rows,))
+            else:
+                self.order = np.zeros(0, "<i8")
+            self.blocks = np.load(os.path.join(path, "blocks.npy"))
+            self.segments = np.load(os.path.join(path, "segments.npy"))
+            self.vehicles = np.load(os.path.join(path, "vehicles.npy"))
+
+    @classmethod
+    def open(cls, path):
+        """
+        Ouvre un magasin existant en lecture.
+
+        Parameters
+        ----------
+        path : str
+            dossier du magasin
+
+        Returns
+        -------
+        TrajectoryStore
+            magasin en lecture
+        """
+
+        return cls(path, "r")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def file(self, name):
+        """Chemin du fichier d'une colonne."""
+
+        return os.path.join(self.path, name + ".bin")
+
+    def write(self, columns):
+        """
+        Ajoute un tampon à la fin des fichiers.
+
+        Parameters
+        ----------
+        columns : dict
+            un tableau par colonne, tous de même taille et triés par instant
+
+        Returns
+        -------
+        None
+        """
+
+        count = len(columns["name"])
+        if count == 0:
+            return None
+        for name, dtype in self.DTYPES.items():
+            self.files[name].write(np.ascontiguousarray(columns[name], dtype).tobytes())
+
+        # index par fenêtre de temps : début de chaque tampon
+        self.blocks.append((self.rows, columns["time"][0]))
+        # index par voiture : le tri stable garde les lignes d'une voiture dans l'ordre du temps
+        name, time = np.asarray(columns["name"]), np.asarray(columns["time"])
+        order = np.argsort(name, kind="stable")
+        self.order.write((self.rows + order).astype("<i8").tobytes())
+        unique, start, size = np.unique(name[order], return_index=True, return_counts=True)
+        first, last = order[start], order[start + size - 1]
+        segment = np.empty(len(unique), self.SEGMENT)
+        segment["name"] = unique
+        segment["start"] = self.rows + start
+        segment["count"] = size
+        segment["first_row"] = self.rows + first
+        segment["last_row"] = self.rows + last
+        segment["first_time"] = time[first]
+        segment["last_time"] = time[last]
+        self.segments.append(segment)
+        self.rows += count
+
+    def truncate(self, rows):
+        """
+        Enlève les tampons écrits à partir d'une ligne.
+
+        Sert à revenir à un point de reprise (cf BaseEngine.restore) : les
+        lignes écrites depuis sont retirées des fichiers et de l'index, pour
+        que le temps reste croissant. Rien n'est retiré d'un magasin qui a
+        moins de "rows" lignes (un magasin neuf commence au point de reprise).
+
+        Parameters
+        ----------
+        rows : int
+            nombre de lignes gardées, un début de tampon
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        ValueError
+            si le magasin n'est pas ouvert en écriture ou si "rows" tombe au
+            milieu d'un tampon
+        """
+
+        if self.mode != "w" or self.files is None:
+            raise ValueError(f"{self.path} : le magasin n'est pas ouvert en écriture")
+        if rows >= self.rows:
+            return None
+        starts = [row for row, _ in self.blocks]
+        if rows not in starts:
+            raise ValueError(f"{self.path} : la ligne {rows} n'est pas le début d'un tampon")
+        k = starts.index(rows)
+        files = [(f, self.DTYPES[name].itemsize) for name, f in self.files.items()] + [(self.order, 8)]
+        for f, size in files:
+            f.flush()
+            f.truncate(rows * size)
+            f.seek(rows * size)
+        self.blocks = self.blocks[:k]
+        self.segments = self.segments[:k]
+        self.rows = rows
+
+    def close(self):
+        """
+        Écrit l'index et ferme les fichiers.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        if self.mode != "w" or self.files is None:
+            return None
+        for f in self.files.values():
+            f.close()
+        self.order.close()
+        self.files = None
+        meta = {"rows": self.rows, "columns": {name: dtype.str for name, dtype in self.DTYPES.items()}}
+        with open(os.path.join(self.path, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        blocks = np.array(self.blocks, np.dtype([("row", "<i8"), ("time", "<f8")]))
+        np.save(os.path.join(self.path, "blocks.npy"), blocks)
+        # segments rangés par voiture, puis par tampon pour une même voiture
+        segments = np.concatenate(self.segments) if self.segments else np.zeros(0, self.SEGMENT)
+        segments = segments[np.argsort(segments["name"], kind="stable")]
+        index = np.zeros(len(segments), np.dtype([("start", "<i8"), ("count", "<i8")]))
+        index["start"], index["count"] = segments["start"], segments["count"]
+        np.save(os.path.join(self.path, "segments.npy"), index)
+        unique, first, number = np.unique(segments["name"], return_index=True, return_counts=True)
+        last = first + number - 1
+        vehicles = np.zeros(len(unique), np.dtype([("name", "<i8"), ("first_row", "<i8"), ("last_row", "<i8"),
+                                                  ("first_time", "<f8"), ("last_time", "<f8"),
+                                                  ("segment", "<i8"), ("segments", "<i8")]))
+        vehicles["name"] = unique
+        vehicles["first_row"], vehicles["last_row"] = segments["first_row"][first], segments["last_row"][last]
+        vehicles["first_time"], vehicles["last_time"] = segments["first_time"][first], segments["last_time"][last]
+        vehicles["segment"], vehicles["segments"] = first, number
+        np.save(os.path.join(self.path, "vehicles.npy"), vehicles)
+
+    def window(self, t0, t1):
+        """
+        Donne les lignes entre deux instants sans les copier.
+
+        Parameters
+        ----------
+        t0 : float
+            début de la fenêtre en seconde (inclus)
+        t1 : float
+            fin de la fenêtre en seconde (exclue)
+
+        Returns
+        -------
+        dict
+            vue sur chaque colonne
+        """
+
+        time = self.columns["time"]
+        # on trouve les tampons concernés avec l'index puis les lignes exactes dedans ; un
+        # tampon qui commence à t0 peut suivre un autre qui contient déjà des lignes de t0
+        begin = max(0, int(np.searchsorted(self.blocks["time"], t0, side="left")) - 1)
+        end = int(np.searchsorted(self.blocks["time"], t1, side="right"))
+        row0 = int(self.blocks["row"][begin]) if len(self.blocks) else 0
+        row1 = int(self.blocks["row"][end]) if end < len(self.blocks) else self.rows
+        i = row0 + int(np.searchsorted(time[row0:row1], t0, side="left"))
+        j = row0 + int(np.searchsorted(time[row0:row1], t1, side="left"))
+        return {name: column[i:j] for name, column in self.columns.items()}
+
+    def vehicle(self, name):
+        """
+        Donne les lignes d'une voiture.
+
+        Parameters
+        ----------
+        name : int
+            numéro de la voiture
+
+        Returns
+        -------
+        dict
+            tableau de chaque colonne (vide si la voiture n'existe pas)
+        """
+
+        k = int(np.searchsorted(self.vehicles["name"], name))
+        if k == len(self.vehicles) or self.vehicles["name"][k] != name:
+            return {column: values[:0] for column, values in self.columns.items()}
+        # on ne lit que les lignes de la voiture, tampon par tampon
+        s = int(self.vehicles["segment"][k])
+        segments = self.segments[s:s + int(self.vehicles["segments"][k])]
+        rows = np.concatenate([self.order[i:i + n] for i, n in zip(segments["start"].tolist(),
+                                                                   segments["count"].tolist())])
+        return {column: np.asarray(values[rows]) for column, values in self.columns.items()}
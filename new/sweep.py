@@ -0,0 +1,228 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+from config import Scenario
+from engine import Engine
+from recorder import TrajectoryRecorder
+from vector import VectorEngine
+
+
+# paramètres des modèles IDM et MOBIL que l'on peut faire varier
+PARAMETERS = ("T", "S0", "A", "B", "D", "MOYP", "SIGMA", "Bsafe", "Dath", "Dabias", "VCRIT")
+# valeurs de settings.py, pour les paramètres qu'on ne fait pas varier
+DEFAULTS = {name: value for name, value in Scenario().to_dict().items() if name in PARAMETERS}
+# colonnes du tableau de résultats
+METRICS = ("time", "exited", "throughput", "travel_time", "lane_changes")
+FIELDS = ("key",) + PARAMETERS + ("restrictions", "seed", "steps", "engine") + METRICS
+
+
+def grid(**values):
+    """
+    Donne toutes les combinaisons de valeurs des paramètres.
+
+    Parameters
+    ----------
+    **values : sequence
+        valeurs de chaque paramètre, ex: grid(T=[1, 1.5], S0=[0.1, 2])
+
+    Returns
+    -------
+    list
+        ensemble des dictionnaires {paramètre: valeur}
+    """
+
+    unknown = set(values) - set(PARAMETERS)
+    if unknown:
+        raise ValueError(f"paramètres inconnus : {sorted(unknown)}")
+    names = list(values)
+    return [dict(zip(names, combination)) for combination in itertools.product(*values.values())]
+
+
+def to_restrictions(scenario):
+    """
+    Passe un scénario lisible aux restrictions utilisées par le moteur.
+
+    Parameters
+    ----------
+    scenario : list
+        ensemble des (distance en mètre, vitesse en km/h, nombre de voies)
+
+    Returns
+    -------
+    list
+        ensemble des (abscisse en mètre, vitesse en m/s, nombre de voies)
+        comme attendu par Scenario
+    """
+
+    return [(dist, vit / 3.6, road) for dist, vit, road in scenario]
+
+
+def simulate(config):
+    """
+    Fait tourner une simulation sans affichage et donne ses indicateurs.
+
+    Parameters
+    ----------
+    config : dict
+        "params" (paramètres modifiés), "restrictions" (scénario, celui par
+        défaut si None), "seed", "steps" et "engine" ("vector" ou "object")
+
+    Returns
+    -------
+    dict
+        ligne du tableau de résultats
+    """
+
+    scenario = Scenario(**config["params"])
+    if config["restrictions"] is not None:
+        scenario = scenario.replace(RESTRICTIONS=to_restrictions(config["restrictions"]))
+    kind = VectorEngine if config["engine"] == "vector" else Engine
+    engine = kind(scenario, recorder=TrajectoryRecorder("off"), seed=config["seed"])
+    engine.run(config["steps"])
+
+    row = {name: config["params"].get(name, DEFAULTS[name]) for name in PARAMETERS}
+    row.update(key=key(config), restrictions=json.dumps(config["restrictions"]), seed=config["seed"],
+               steps=config["steps"], engine=config["engine"])
+    row.update(engine.summary())
+    return row
+
+
+def key(config):
+    """Identifiant d'une configuration, pour savoir si elle a déjà tourné."""
+
+    return json.dumps(config, sort_keys=True)
+
+
+class Sweep:
+    """
+    Balayage de paramètres lancé en parallèle sur plusieurs processus.
+
+    Chaque configuration (paramètres, scénario de restrictions, graine) est
+    une simulation indépendante donnée à un processus. Les résultats sont
+    ajoutés au fichier CSV au fur et à mesure : si le balayage est
+    interrompu, le relancer ne refait que les configurations manquantes.
+
+    ...
+
+    Attributes
+    ----------
+    configs : list
+        ensemble des configurations à simuler
+    path : str
+        fichier CSV des résultats
+    workers : int
+        nombre de processus, autant que de cœurs si None
+
+    Methods
+    -------
+    done():
+        Donne les lignes déjà présentes dans le fichier de résultats.
+    run():
+        Simule les configurations manquantes.
+    """
+
+    def __init__(self, path, params=({},), scenarios=(None,), seeds=(0,), steps=3600, engine="vector", workers=None):
+        """
+        Construit tous les  attributs nécessaires pour le balayage.
+
+        Parameters
+        ----------
+        path : str
+            fichier CSV des résultats
+        params : sequence
+            ensemble des paramètres à essayer (cf "grid")
+        scenarios : sequence
+            ensemble des scénarios de restrictions (cf "to_restrictions"),
+            None pour celui par défaut
+        seeds : sequence
+            graines du hasard, chaque configuration est simulée pour chacune
+        steps : int
+            nombre de pas de chaque simulation
+        engine : str
+            "vector" (VectorEngine) ou "object" (Engine)
+        workers : int
+            nombre de processus, autant que de cœurs si None
+        """
+
+        self.path = path
+        self.workers = workers
+        self.configs = [{"params": dict(p), "restrictions": None if s is None else [list(r) for r in s],
+                         "seed": seed, "steps": steps, "engine": engine}
+                        for p, s, seed in itertools.product(params, scenarios, seeds)]
+
+    def done(self):
+        """
+        Donne les lignes déjà présentes dans le fichier de résultats.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        list
+            ensemble des lignes (dictionnaires de chaînes de caractères)
+        """
+
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, newline="") as f:
+            return list(csv.DictReader(f))
+
+    def run(self):
+        """
+        Simule les configurations manquantes.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        list
+            toutes les lignes du fichier de résultats
+        """
+
+        # multiprocessing est long à charger, seul le processus principal en a besoin
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        finished = {row["key"] for row in self.done()}
+        todo = [config for config in self.configs if key(config) not in finished]
+        new = not os.path.exists(self.path)
+        with open(self.path, "a", newline="") as f:
+            writer = csv.DictWriter(f, FIELDS)
+            if new:
+                writer.writeheader()
+            with ProcessPoolExecutor(self.workers) as pool:
+                jobs = [pool.submit(simulate, config) for config in todo]
+                for i, job in enumerate(as_completed(jobs)):
+                    writer.writerow(job.result())
+                    # on écrit tout de suite pour pouvoir reprendre
+                    f.flush()
+                    print(f"{i + 1}/{len(todo)} simulations ({len(finished)} déjà faites)")
+        return self.done()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Balayage de paramètres de la simulation.")
+    parser.add_argument("out", help="fichier CSV des résultats (repris s'il existe)")
+    parser.add_argument("--set", action="append", default=[], metavar="NOM=V1,V2",
+                        help="valeurs d'un paramètre, ex: --set T=1,1.5")
+    parser.add_argument("--scenarios", help="fichier JSON : liste de scénarios [[distance m, vitesse km/h, voies], ...]")
+    parser.add_argument("--seeds", type=int, default=1, help="nombre de graines par configuration")
+    parser.add_argument("--steps", type=int, default=3600, help="nombre de pas de chaque simulation")
+    parser.add_argument("--engine", choices=("vector", "object"), default="vector")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    values = {}
+    for item in args.set:
+        name, _, numbers = item.partition("=")
+        values[name] = [float(v) for v in numbers.split(",")]
+    scenarios = (None,)
+    if args.scenarios:
+        with open(args.scenarios) as f:
+            scenarios = json.load(f)
+    Sweep(args.out, grid(**values), scenarios, range(args.seeds), args.steps, args.engine, args.workers).run()
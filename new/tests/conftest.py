@@ -0,0 +1,8 @@
+import os
+import sys
+
+
+# les modules de la simulation sont à la racine de new/ et lisent leurs fichiers depuis ce dossier
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
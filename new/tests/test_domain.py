@@ -0,0 +1,41 @@
+import multiprocessing as mp
+import os
+import pytest
+import numpy as np
+import domain
+from config import Scenario
+from domain import Corridor
+from vector import VectorEngine
+
+
+SCENARIO = Scenario(DISTANCE=3000, PREFILL=20, RECORD_MODE="off")
+
+
+def positions(names, pos):
+    return dict(zip(np.asarray(names).astype(np.int64).tolist(), np.asarray(pos).tolist()))
+
+
+def test_same_as_engine():
+    engine = VectorEngine(SCENARIO, seed=0)
+    engine.run(300)
+    cars = ~engine.fleet["end"]
+    reference = positions(engine.fleet["name"][cars], engine.fleet["pos"][cars])
+    with Corridor(SCENARIO, workers=2, seed=0) as corridor:
+        corridor.run(300)
+        columns = corridor.columns()
+        assert positions(columns["name"], columns["pos"]) == reference
+        assert corridor.summary()["exited"] == engine.summary()["exited"]
+
+
+@pytest.mark.skipif(mp.get_start_method() != "fork", reason="MIGRANTS doit être changé dans les processus")
+def test_worker_error(monkeypatch):
+    # aucune place pour les voitures qui changent de portion : l'erreur de la portion remonte
+    monkeypatch.setattr(domain, "MIGRANTS", 0)
+    corridor = Corridor(SCENARIO, workers=2, seed=0)
+    name = corridor.shm.name
+    with pytest.raises(RuntimeError, match="quittent la portion 0"):
+        corridor.run(300)
+    assert corridor.shm is None
+    assert not any(process.is_alive() for process in corridor.processes)
+    assert not os.path.exists(os.path.join("/dev/shm", name))
+    corridor.close()
@@ -0,0 +1,35 @@
+import pytest
+import demand
+from config import Scenario
+from engine import Engine
+
+
+def make_engine():
+    return Engine(Scenario(), apparition=demand.generate([1200, 1200, 1200], 60, seed=1), check=True, seed=2)
+
+
+def test_check_run():
+    # check=True vérifie l'index et les liens à chaque pas
+    engine = make_engine()
+    engine.run(1200)
+    assert engine.frame == 1200
+    assert engine.lanes.check(engine.cars) == []
+
+
+def test_check_unsorted():
+    engine = make_engine()
+    engine.run(600)
+    lane = max(engine.lanes.lanes, key=len)
+    assert len(lane) > 1
+    lane[0].key = lane[-1].key + 1
+    with pytest.raises(AssertionError, match="mal triée"):
+        engine.check()
+
+
+def test_check_broken_link():
+    engine = make_engine()
+    engine.run(600)
+    car = next(car for car in engine.cars if car.name != "end" and car.leader is not None)
+    car.leader = None
+    with pytest.raises(AssertionError, match=f"{car.name} suit None"):
+        engine.check()
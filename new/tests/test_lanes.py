@@ -0,0 +1,56 @@
+from types import SimpleNamespace
+import demand
+from config import Scenario
+from engine import Engine
+from lanes import LaneIndex, link
+
+
+def make_lane(positions):
+    """Range des voitures factices sur la voie 0 et les relie comme le moteur."""
+
+    lanes = LaneIndex(1)
+    cars = [SimpleNamespace(name=i, road=0, pos=[x], key=None, leader=None, follower=None)
+            for i, x in enumerate(positions)]
+    for car in cars:
+        lanes.insert(car)
+    lane = lanes.lanes[0]
+    for follower, leader in zip(lane, lane[1:] + [None]):
+        link(follower, leader)
+    return lanes, cars
+
+
+def test_update_forward():
+    lanes, cars = make_lane([0.0, 10.0, 20.0])
+    cars[0].pos[0] = 15.0
+    lanes.update(cars[0])
+    assert [car.name for car in lanes.lanes[0]] == [1, 0, 2]
+    assert lanes.check(cars) == []
+
+
+def test_update_backward():
+    # une voiture presque arrêtée qui freine recule un peu derrière sa suiveuse
+    lanes, cars = make_lane([28.05193, 28.05201, 40.0])
+    cars[1].pos[0] = 28.05161
+    lanes.update(cars[1])
+    assert [car.name for car in lanes.lanes[0]] == [1, 0, 2]
+    assert lanes.check(cars) == []
+    assert lanes.index(cars[0]) == 1
+
+
+def test_lane_drop_queue():
+    # bouchon derrière des suppressions de voie : plantait au pas 9838
+    scenario = Scenario(RESTRICTIONS=[(0, 25, 3), (500, 20, 2), (900, 25, 1), (1200, 30, 3)])
+    engine = Engine(scenario, apparition=demand.generate([1500, 1800, 1500], 600, seed=3), check=True, seed=1)
+    engine.run(9900)
+    assert engine.frame == 9900
+
+
+def test_index_unsorted():
+    lanes, cars = make_lane([0.0, 10.0, 20.0])
+    cars[0].key = 30.0
+    try:
+        lanes.index(cars[0])
+    except ValueError as err:
+        assert "0 introuvable voie 0" in str(err)
+    else:
+        raise AssertionError("index aurait dû échouer")
@@ -0,0 +1,46 @@
+import numpy as np
+from recorder import TrajectoryRecorder
+from store import TrajectoryStore
+
+
+def fill(path, chunk=7, cars=3, steps=10):
+    """Écrit "cars" voitures à chaque instant entier, par tampons de "chunk" lignes."""
+
+    recorder = TrajectoryRecorder("full", interval=1, chunk=chunk, sink=TrajectoryStore(path))
+    for t in range(steps):
+        names = np.arange(cars)
+        recorder.record(names, float(t), names * 10.0 + t, np.zeros(cars, np.int8), np.ones(cars, np.float32))
+    recorder.close()
+    return TrajectoryStore.open(path)
+
+
+def test_window_straddles_blocks(tmp_path):
+    # avec 7 lignes par tampon, les instants 2 et 4 sont coupés en deux tampons
+    store = fill(str(tmp_path))
+    for t in range(10):
+        rows = store.window(t, t + 1)
+        assert len(rows["time"]) == 3, t
+        assert np.all(rows["time"] == t)
+    assert len(store.window(2, 5)["time"]) == 9
+    assert len(store.window(0, 10)["time"]) == 30
+
+
+def test_vehicle(tmp_path):
+    store = fill(str(tmp_path))
+    rows = store.vehicle(1)
+    assert np.array_equal(rows["time"], np.arange(10.0))
+    assert np.array_equal(rows["x"], 10.0 + np.arange(10.0))
+    assert len(store.vehicle(5)["time"]) == 0
+
+
+def test_truncate(tmp_path):
+    path = str(tmp_path)
+    store = TrajectoryStore(path)
+    for t in range(4):
+        store.write({"name": np.arange(3), "time": np.full(3, float(t)), "x": np.zeros(3),
+                     "road": np.zeros(3, np.int8), "velocity": np.zeros(3, np.float32)})
+    store.truncate(6)
+    store.close()
+    store = TrajectoryStore.open(path)
+    assert store.rows == 6
+    assert np.array_equal(store.vehicle(2)["time"], [0.0, 1.0])
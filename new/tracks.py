@@ -0,0 +1,256 @@
+import argparse
+import os
+import struct
+import numpy as np
+
+
+# en-tête du fichier binaire : signature puis nombre de véhicules
+MAGIC = b"TRK1"
+HEADER = struct.Struct("<4sI")
+# chaque image est une suite de (x, y, z) en float32 petit-boutiste, un par véhicule
+DTYPE = np.dtype("<f4")
+# nombre d'images lues ou écrites à la fois
+CHUNK = 256
+
+
+class TrackWriter:
+    """
+    Écrit des positions suivies dans le format binaire, image par image.
+
+    Le fichier commence par HEADER (MAGIC et nombre de véhicules) suivi des
+    images à la suite : pour chaque image, les (x, y, z) en float32 de tous
+    les véhicules. Le nombre d'images se déduit de la taille du fichier, on
+    peut donc écrire par morceaux sans jamais garder toute la capture en
+    mémoire. position.py écrit le même format sans NumPy (dans Blender).
+
+    ...
+
+    Attributes
+    ----------
+    path : str
+        chemin du fichier
+    vehicles : int
+        nombre de véhicules de chaque image
+    frames : int
+        nombre d'images écrites
+
+    Methods
+    -------
+    write(frames):
+        Ajoute des images à la fin du fichier.
+    close():
+        Ferme le fichier.
+    """
+
+    def __init__(self, path, vehicles):
+        """
+        Construit tous les  attributs nécessaires pour l'écriture.
+
+        Parameters
+        ----------
+        path : str
+            chemin du fichier (écrasé)
+        vehicles : int
+            nombre de véhicules de chaque image
+        """
+
+        self.path = path
+        self.vehicles = vehicles
+        self.frames = 0
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, vehicles))
+
+    def write(self, frames):
+        """
+        Ajoute des images à la fin du fichier.
+
+        Parameters
+        ----------
+        frames : numpy.ndarray
+            tableau (images, véhicules, 3) des coordonnées
+
+        Returns
+        -------
+        None
+        """
+
+        frames = np.ascontiguousarray(frames, DTYPE).reshape(-1, self.vehicles, 3)
+        frames.tofile(self.file)
+        self.frames += len(frames)
+
+    def close(self):
+        """
+        Ferme le fichier.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        self.file.close()
+
+
+def is_binary(path):
+    """Indique si le fichier est au format binaire (il commence par MAGIC)."""
+
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def open_tracks(path):
+    """
+    Ouvre un fichier binaire sans le lire (numpy.memmap).
+
+    Parameters
+    ----------
+    path : str
+        chemin du fichier
+
+    Returns
+    -------
+    numpy.memmap
+        tableau (images, véhicules, 3) en float32, les pages ne sont lues
+        qu'au moment où on y accède
+    """
+
+    with open(path, "rb") as f:
+        magic, vehicles = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError(f"{path} n'est pas un fichier de positions binaire")
+    frames = (os.path.getsize(path) - HEADER.size) // (vehicles * 3 * DTYPE.itemsize)
+    if frames == 0:
+        return np.zeros((0, vehicles, 3), DTYPE)
+    return np.memmap(path, DTYPE, "r", offset=HEADER.size, shape=(frames, vehicles, 3))
+
+
+def parse_lines(lines):
+    """
+    Découpe en bloc des lignes de texte "[x, y, z];[x, y, z];...".
+
+    Les crochets (ou parenthèses) et les ";" sont remplacés par des virgules
+    puis NumPy convertit tous les nombres d'un seul coup.
+
+    Parameters
+    ----------
+    lines : list
+        lignes du fichier texte, une par image
+
+    Returns
+    -------
+    numpy.ndarray
+        tableau (images, véhicules, 3) en float64
+    """
+
+    vehicles = lines[0].count(";") + 1
+    text = ",".join(lines).translate(str.maketrans(";[]()", ",    "))
+    return np.array(text.split(","), dtype=np.float64).reshape(len(lines), vehicles, 3)
+
+
+def read_text(path, chunk=CHUNK):
+    """
+    Lit un fichier texte de positions par morceaux de "chunk" images.
+
+    Parameters
+    ----------
+    path : str
+        chemin du fichier (une ligne par image, une case par véhicule)
+    chunk : int
+        nombre d'images de chaque morceau
+
+    Yields
+    ------
+    numpy.ndarray
+        tableau (images, véhicules, 3) d'un morceau
+    """
+
+    with open(path, "r") as f:
+        lines = []
+        for line in f:
+            if line.strip():
+                lines.append(line.rstrip("\n"))
+            if len(lines) == chunk:
+                yield parse_lines(lines)
+                lines = []
+        if lines:
+            yield parse_lines(lines)
+
+
+def read_chunks(path, chunk=CHUNK, skip=0):
+    """
+    Lit des positions par morceaux, quel que soit le format du fichier.
+
+    Seul un morceau est en mémoire à la fois : une capture de plusieurs
+    gigaoctets se traite avec une mémoire bornée.
+
+    Parameters
+    ----------
+    path : str
+        chemin du fichier, binaire (cf TrackWriter) ou texte
+    chunk : int
+        nombre d'images de chaque morceau
+    skip : int
+        nombre d'images ignorées au début
+
+    Yields
+    ------
+    numpy.ndarray
+        tableau (images, véhicules, 3) en float64 d'un morceau
+    """
+
+    if is_binary(path):
+        tracks = open_tracks(path)
+        for start in range(skip, len(tracks), chunk):
+            yield np.array(tracks[start:start + chunk], np.float64)
+        return
+    for block in read_text(path, chunk):
+        if skip >= len(block):
+            skip -= len(block)
+            continue
+        yield block[skip:]
+        skip = 0
+
+
+def convert(source, destination, chunk=CHUNK):
+    """
+    Convertit un fichier texte de positions au format binaire, par morceaux.
+
+    Les positions viennent du curseur de Blender, qui les garde en float32 :
+    les ranger en float32 ne perd donc rien.
+
+    Parameters
+    ----------
+    source : str
+        fichier texte écrit par l'ancienne version de position.py
+    destination : str
+        fichier binaire écrit
+    chunk : int
+        nombre d'images lues à la fois
+
+    Returns
+    -------
+    int
+        nombre d'images converties
+    """
+
+    writer = None
+    for block in read_text(source, chunk):
+        if writer is None:
+            writer = TrackWriter(destination, block.shape[1])
+        writer.write(block)
+    if writer is None:
+        raise ValueError(f"{source} ne contient aucune image")
+    writer.close()
+    return writer.frames
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convertit un fichier texte de positions au format binaire.")
+    parser.add_argument("source", help="fichier texte (location.csv / location.txt)")
+    parser.add_argument("destination", help="fichier binaire écrit")
+    parser.add_argument("--chunk", type=int, default=CHUNK, help="nombre d'images lues à la fois")
+    args = parser.parse_args()
+    print(convert(args.source, args.destination, args.chunk), "images converties")
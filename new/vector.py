@@ -0,0 +1,1012 @@
+from time import perf_counter
+import numpy as np
+from engine import BaseEngine
+from schedule import queue_offsets
+
+# numéro de meneur signifiant qu'il n'y en a pas
+NO_LEADER = np.iinfo(np.int64).min
+
+
+class Fleet:
+    """
+    Ensemble des véhicules rangés dans des tableaux NumPy contigus.
+
+    Au lieu d'un objet par voiture, chaque grandeur (position, vitesse...) est
+    un tableau dont la case i correspond au véhicule i. Les tableaux sont
+    alloués avec une capacité qui double quand elle est dépassée, seules les
+    "n" premières cases sont utilisées.
+
+    ...
+
+    Attributes
+    ----------
+    n : int
+        nombre de véhicules
+    data : dict
+        tableaux de chaque colonne, de taille "capacity"
+
+    Methods
+    -------
+    reserve(size):
+        Agrandit les tableaux pour contenir au moins size véhicules.
+    add(**values):
+        Ajoute un véhicule et renvoie son indice.
+    extend(count, **values):
+        Ajoute plusieurs véhicules d'un coup.
+    remove(mask):
+        Enlève les véhicules sélectionnés en gardant l'ordre des autres.
+    """
+
+    # nom et type de chaque colonne
+    COLUMNS = (
+        ("name", np.int64),            # numéro de la voiture (négatif pour une fin de voie)
+        ("pos", np.float64),           # abscisse en mètre
+        ("velocity", np.float64),      # vitesse en m/s
+        ("acceleration", np.float64),  # accélération en m/s**2
+        ("road", np.int8),             # voie entre 0 et 2
+        ("voies", np.int8),            # nombre de voies à la position de la voiture
+        ("v0", np.float64),            # vitesse désirée en m/s
+        ("P", np.float64),             # facteur de politesse
+        ("end", np.bool_),             # fin de voie (véhicule immobile)
+        ("cooldown_time", np.float64), # temps du dernier changement de voie (s)
+        ("old_leader", np.int64),      # numéro de l'ancien meneur (NO_LEADER si aucun)
+        ("birth", np.float64),         # instant d'apparition (s)
+    )
+
+    def __init__(self, capacity=1024):
+        """
+        Construit tous les  attributs nécessaires pour l'ensemble de véhicules.
+
+        Parameters
+        ----------
+        capacity : int
+            nombre de véhicules alloués au départ
+        """
+
+        self.n = 0
+        self.data = {name: np.zeros(capacity, dtype) for name, dtype in self.COLUMNS}
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, name):
+        """Vue sur les "n" premières cases d'une colonne."""
+
+        return self.data[name][:self.n]
+
+    @property
+    def capacity(self):
+        """Nombre de véhicules que peuvent contenir les tableaux."""
+
+        return len(self.data["pos"])
+
+    def reserve(self, size):
+        """
+        Agrandit les tableaux pour contenir au moins size véhicules.
+
+        Parameters
+        ----------
+        size : int
+            nombre de véhicules à pouvoir contenir
+
+        Returns
+        -------
+        None
+        """
+
+        capacity = self.capacity
+        if size <= capacity:
+            return None
+        while capacity < size:
+            capacity *= 2
+        for name, array in self.data.items():
+            new = np.zeros(capacity, array.dtype)
+            new[:self.n] = array[:self.n]
+            self.data[name] = new
+
+    def add(self, **values):
+        """
+        Ajoute un véhicule et renvoie son indice.
+
+        Parameters
+        ----------
+        **values : dict
+            valeur de chaque colonne, 0 pour celles non précisées
+
+        Returns
+        -------
+        int
+            indice du véhicule
+        """
+
+        self.reserve(self.n + 1)
+        i = self.n
+        for name, array in self.data.items():
+            array[i] = values.get(name, 0)
+        self.n += 1
+        return i
+
+    def extend(self, count, **values):
+        """
+        Ajoute plusieurs véhicules d'un coup.
+
+        Parameters
+        ----------
+        count : int
+            nombre de véhicules à ajouter
+        **values : dict
+            valeur (ou tableau de taille count) de chaque colonne, 0 pour
+            celles non précisées
+
+        Returns
+        -------
+        slice
+            indices des véhicules ajoutés
+        """
+
+        self.reserve(self.n + count)
+        added = slice(self.n, self.n + count)
+        for name, array in self.data.items():
+            array[added] = values.get(name, 0)
+        self.n += count
+        return added
+
+    def remove(self, mask):
+        """
+        Enlève les véhicules sélectionnés en gardant l'ordre des autres.
+
+        Parameters
+        ----------
+        mask : numpy.ndarray
+            booléens de taille n, True pour les véhicules à enlever
+
+        Returns
+        -------
+        None
+        """
+
+        keep = ~mask
+        k = int(keep.sum())
+        if k == self.n:
+            return None
+        for array in self.data.values():
+            array[:k] = array[:self.n][keep]
+        self.n = k
+
+
+def get_leaders(pos, road, ring=False):
+    """
+    Donne le meneur de chaque véhicule : le plus proche devant sur sa voie.
+
+    Parameters
+    ----------
+    pos : numpy.ndarray
+        abscisses des véhicules
+    road : numpy.ndarray
+        voies des véhicules
+    ring : bool
+        route en anneau : le premier de chaque voie suit le dernier
+
+    Returns
+    -------
+    numpy.ndarray
+        indice du meneur de chaque véhicule, -1 s'il n'en a pas
+    """
+
+    order = np.lexsort((pos, road))  # trié par voie puis par abscisse
+    leader = np.full(len(pos), -1, np.int64)
+    same = road[order[1:]] == road[order[:-1]]
+    leader[order[:-1][same]] = order[1:][same]
+    if ring and len(pos):
+        # premier et dernier de chaque voie, une voiture seule n'a pas de meneur
+        last = np.append(~same, True)
+        first = np.insert(~same, 0, True)
+        alone = first & last
+        leader[order[last & ~alone]] = order[first & ~alone]
+    return leader
+
+
+def follow_acceleration(scenario, pos, velocity, v0, lead_pos, lead_velocity, has_leader):
+    """
+    Donne l'accélération de véhicules derrière leurs meneurs (cf Car.get_acceleration).
+
+    Parameters
+    ----------
+    scenario : Scenario
+        paramètres des modèles
+    pos : numpy.ndarray
+        abscisses des véhicules
+    velocity : numpy.ndarray
+        vitesses des véhicules
+    v0 : numpy.ndarray
+        vitesses désirées des véhicules
+    lead_pos : numpy.ndarray
+        abscisses des meneurs
+    lead_velocity : numpy.ndarray
+        vitesses des meneurs
+    has_leader : numpy.ndarray
+        False pour les véhicules sans meneur (les valeurs du meneur sont ignorées)
+
+    Returns
+    -------
+    numpy.ndarray
+        accélération de chaque véhicule
+    """
+
+    # on calcule le "s" et le "s*" de la formule, comme si le meneur était loin quand il n'y en a pas
+    sc = scenario
+    gap = lead_pos - pos
+    if sc.RING:
+        # le meneur du premier est le dernier de la voie, un tour plus loin
+        gap = gap % sc.DISTANCE
+    s = np.where(has_leader, gap - sc.CAR_LENGTH, sc.DISTANCE)
+    deltav = np.where(has_leader, velocity - lead_velocity, 0)
+    setoile = np.where(has_leader, sc.S0 + np.maximum(0, velocity * (sc.T + deltav * sc.INVERTED2SQRTAB)), sc.S0)
+    return np.maximum(sc.MB, sc.A * (1 - (velocity / v0) ** sc.D - (setoile / s) ** 2))
+
+
+def idm_acceleration(scenario, pos, velocity, v0, leader):
+    """
+    Donne l'accélération de tous les véhicules (cf Car.get_acceleration).
+
+    Parameters
+    ----------
+    scenario : Scenario
+        paramètres des modèles
+    pos : numpy.ndarray
+        abscisses des véhicules
+    velocity : numpy.ndarray
+        vitesses des véhicules
+    v0 : numpy.ndarray
+        vitesses désirées des véhicules
+    leader : numpy.ndarray
+        indice du meneur de chaque véhicule, -1 s'il n'en a pas
+
+    Returns
+    -------
+    numpy.ndarray
+        accélération de chaque véhicule
+    """
+
+    has_leader = leader >= 0
+    lead = np.where(has_leader, leader, 0)
+    return follow_acceleration(scenario, pos, velocity, v0, pos[lead], velocity[lead], has_leader)
+
+
+def pair_acceleration(scenario, fleet, car, leader):
+    """
+    Donne l'accélération de chaque véhicule "car" s'il suivait "leader".
+
+    Sert à MOBIL pour évaluer les situations avant et après un changement de
+    voie, comme les appels à Car.get_acceleration(car, leader).
+
+    Parameters
+    ----------
+    scenario : Scenario
+        paramètres des modèles
+    fleet : Fleet
+        ensemble des véhicules
+    car : numpy.ndarray
+        indices des véhicules, -1 pour aucun (l'accélération vaut alors 0)
+    leader : numpy.ndarray
+        indices des meneurs, -1 pour aucun
+
+    Returns
+    -------
+    numpy.ndarray
+        accélération de chaque véhicule
+    """
+
+    pos, velocity, v0 = fleet["pos"], fleet["velocity"], fleet["v0"]
+    has_car = car >= 0
+    has_leader = leader >= 0
+    c = np.where(has_car, car, 0)
+    lead = np.where(has_leader, leader, 0)
+    acceleration = follow_acceleration(scenario, pos[c], velocity[c], v0[c], pos[lead], velocity[lead], has_leader)
+    return np.where(has_car, acceleration, 0)
+
+
+def get_followers(leader):
+    """
+    Donne le suiveur de chaque véhicule à partir des meneurs.
+
+    Parameters
+    ----------
+    leader : numpy.ndarray
+        indice du meneur de chaque véhicule, -1 s'il n'en a pas
+
+    Returns
+    -------
+    numpy.ndarray
+        indice du suiveur de chaque véhicule, -1 s'il n'en a pas
+    """
+
+    follower = np.full(len(leader), -1, np.int64)
+    has_leader = leader >= 0
+    follower[leader[has_leader]] = np.nonzero(has_leader)[0]
+    return follower
+
+
+def lane_neighbors(pos, road, car, target, ring=False):
+    """
+    Donne les voisins qu'auraient des véhicules sur une autre voie (cf Car.get_other_cars).
+
+    Parameters
+    ----------
+    pos : numpy.ndarray
+        abscisses de tous les véhicules
+    road : numpy.ndarray
+        voies de tous les véhicules
+    car : numpy.ndarray
+        indices des véhicules qui voudraient changer de voie
+    target : numpy.ndarray
+        voie visée par chacun de ces véhicules
+    ring : bool
+        route en anneau : derrière le premier de la voie il y a le dernier
+
+    Returns
+    -------
+    ps : numpy.ndarray
+        potentiel suiveur sur la voie visée, -1 s'il n'y en a pas
+    pl : numpy.ndarray
+        potentiel meneur sur la voie visée, -1 s'il n'y en a pas
+    """
+
+    ps = np.full(len(car), -1, np.int64)
+    pl = np.full(len(car), -1, np.int64)
+    order = np.lexsort((pos, road))
+    sorted_road = road[order]
+    for lane in range(3):
+        members = order[sorted_road == lane]  # véhicules de la voie triés par abscisse
+        asking = np.nonzero(target == lane)[0]
+        if len(asking) == 0 or len(members) == 0:
+            continue
+        k = np.searchsorted(pos[members], pos[car[asking]], side="left")
+        if ring:
+            ps[asking] = members[k - 1]
+            pl[asking] = members[k % len(members)]
+            continue
+        behind = k > 0
+        ps[asking[behind]] = members[k[behind] - 1]
+        ahead = k < len(members)
+        pl[asking[ahead]] = members[k[ahead]]
+    return ps, pl
+
+
+def mobil_test(scenario, fleet, car, target, LvR, s, l):
+    """
+    Tests de changement de voie avec le modèle MOBIL pour plusieurs véhicules (cf Car.test).
+
+    Parameters
+    ----------
+    scenario : Scenario
+        paramètres des modèles
+    fleet : Fleet
+        ensemble des véhicules
+    car : numpy.ndarray
+        indices des véhicules testés
+    target : numpy.ndarray
+        voie visée par chaque véhicule
+    LvR : numpy.ndarray
+        True si le véhicule veut aller de la gauche vers la droite
+    s : numpy.ndarray
+        actuel suiveur de chaque véhicule, -1 s'il n'y en a pas
+    l : numpy.ndarray
+        actuel meneur de chaque véhicule, -1 s'il n'y en a pas
+
+    Returns
+    -------
+    change : numpy.ndarray
+        True pour les véhicules qui peuvent changer de voie
+    gain : numpy.ndarray
+        avantage au-delà du seuil de changement (sert à départager les conflits)
+    ps : numpy.ndarray
+        potentiel suiveur sur la voie visée, -1 s'il n'y en a pas
+    pl : numpy.ndarray
+        potentiel meneur sur la voie visée, -1 s'il n'y en a pas
+    """
+
+    sc = scenario
+    pos, velocity = fleet["pos"], fleet["velocity"]
+    ps, pl = lane_neighbors(pos, fleet["road"], car, target, sc.RING)
+
+    # on regarde si les dimensions des voitures permettent le changement de voie
+    length = sc.CAR_LENGTH
+    pspos = np.where(ps >= 0, pos[ps], - length)
+    plpos = np.where(pl >= 0, pos[pl], sc.DISTANCE + length)
+    behind, ahead = pos[car] - pspos, plpos - pos[car]
+    if sc.RING:
+        behind, ahead = behind % sc.DISTANCE, ahead % sc.DISTANCE
+    room = (behind > length) & (ahead > length)
+
+    # sur un anneau, une voiture qui reste seule sur sa voie n'a plus de meneur
+    after = np.where(s == l, -1, l) if sc.RING else l
+    before = np.where(ps == pl, -1, pl) if sc.RING else pl
+
+    ca = pair_acceleration(sc, fleet, car, l)
+    tca = pair_acceleration(sc, fleet, car, pl)
+    sa = pair_acceleration(sc, fleet, s, car)
+    tsa = pair_acceleration(sc, fleet, s, after)
+    psa = pair_acceleration(sc, fleet, ps, before)
+    tpsa = pair_acceleration(sc, fleet, ps, car)
+    P = fleet["P"][car]
+
+    if sc.SYMETRIQUE:
+        # pour route symétrique (ex: Amérique)
+        incentive = tca - ca + P * ((tpsa - psa) + (tsa - sa))
+        threshold = np.full(len(car), sc.Dath)
+    else:
+        # pour route asymétrique (ex: France), on ne double pas par la droite
+        v = velocity[car]
+        lv = velocity[np.where(l >= 0, l, 0)]
+        plv = velocity[np.where(pl >= 0, pl, 0)]
+        tceura = np.where((l < 0) | (v <= lv) | (lv <= sc.VCRIT), tca, np.minimum(tca, ca))
+        ceura = np.where((pl < 0) | (v <= plv) | (plv <= sc.VCRIT), ca, np.minimum(tca, ca))
+        incentive = np.where(LvR, tceura - ca + P * (tsa - sa), tca - ceura + P * (tpsa - psa))
+        threshold = np.where(LvR, sc.Dath - sc.Dabias, sc.Dath + sc.Dabias)
+
+    change = room & (tpsa >= - sc.Bsafe) & (incentive > threshold)
+    return change, incentive - threshold, ps, pl
+
+
+def resolve_conflicts(n, touched, gain):
+    """
+    Choisit, parmi des changements de voie simultanés, ceux qui ne se gênent pas.
+
+    Chaque changement concerne le véhicule, ses meneur et suiveur actuels et
+    ses potentiels meneur et suiveur. Un changement est gardé s'il a le plus
+    grand avantage parmi tous ceux qui concernent l'un de ces véhicules (à
+    avantage égal le plus petit indice l'emporte). Les changements gardés ne
+    partagent donc aucun véhicule, les autres seront retentés au pas suivant.
+
+    Parameters
+    ----------
+    n : int
+        nombre total de véhicules
+    touched : numpy.ndarray
+        tableau (nombre de changements, 5) des véhicules concernés, -1 pour aucun
+    gain : numpy.ndarray
+        avantage de chaque changement
+
+    Returns
+    -------
+    numpy.ndarray
+        True pour les changements gardés
+    """
+
+    k = len(gain)
+    # rang unique de chaque changement, le plus grand avantage a le plus grand rang
+    rank = np.empty(k, np.int64)
+    rank[np.lexsort((- np.arange(k), gain))] = np.arange(k)
+
+    owner = np.repeat(np.arange(k), touched.shape[1])
+    ids = touched.ravel()
+    valid = ids >= 0
+    owner, ids = owner[valid], ids[valid]
+    best = np.full(n, -1, np.int64)
+    np.maximum.at(best, ids, rank[owner])
+    kept = np.ones(k, np.bool_)
+    kept[owner[best[ids] != rank[owner]]] = False
+    return kept
+
+
+def integrate(fleet, dt):
+    """
+    Fait avancer la position puis la vitesse de tous les véhicules (cf Car.move).
+
+    Les fins de voie ne bougent pas.
+
+    Parameters
+    ----------
+    fleet : Fleet
+        ensemble des véhicules
+    dt : float
+        pas de temps en seconde
+
+    Returns
+    -------
+    None
+    """
+
+    moving = ~fleet["end"]
+    pos, velocity, acceleration = fleet["pos"], fleet["velocity"], fleet["acceleration"]
+    pos[:] = np.where(moving, pos + velocity * dt + (acceleration * dt ** 2) / 2, pos)
+    velocity[:] = np.where(moving, np.maximum(0, velocity + acceleration * dt), velocity)
+
+
+def update_acceleration(scenario, fleet, leader):
+    """
+    Calcule la nouvelle accélération de tous les véhicules (cf Car.move).
+
+    Parameters
+    ----------
+    scenario : Scenario
+        paramètres des modèles
+    fleet : Fleet
+        ensemble des véhicules
+    leader : numpy.ndarray
+        indice du meneur de chaque véhicule, -1 s'il n'en a pas
+
+    Returns
+    -------
+    None
+    """
+
+    moving = ~fleet["end"]
+    acceleration = fleet["acceleration"]
+    acceleration[:] = np.where(moving, idm_acceleration(scenario, fleet["pos"], fleet["velocity"], fleet["v0"], leader), acceleration)
+
+
+class VectorEngine(BaseEngine):
+    """
+    Moteur de simulation sans affichage utilisant des tableaux NumPy.
+
+    Les véhicules sont rangés dans un "Fleet" et les modèles IDM et MOBIL
+    sont calculés pour tous les véhicules d'un seul coup, ce qui évite un
+    appel Python par voiture (cf documentation BaseEngine).
+
+    ...
+
+    Attributes
+    ----------
+    fleet : Fleet
+        ensemble des véhicules et fins de voie
+    leader : numpy.ndarray
+        indice du meneur de chaque véhicule, -1 s'il n'en a pas
+    exited : int
+        nombre de voitures sorties de la route
+
+    Methods
+    -------
+    initialise(restrictions):
+        Créée tous les attributs à chaque début de simulation.
+    end_line(x, road):
+        Créée une voiture morte au bout d'une fin de voie
+    spawn():
+        Fait apparaître les voitures en fonction du jeu de données.
+    place(x, road, velocity):
+        Place des voitures directement sur la route.
+    apply_restrictions():
+        Appliquer les restrictions à tous les véhicules.
+    change_lines():
+        Fait changer de voie en une seule fois toutes les voitures qui le peuvent.
+    exited_mask():
+        Donne les voitures sorties de la route.
+    wrap():
+        Ramène au début de l'anneau les voitures arrivées au bout.
+    remove(gone):
+        Enlève des voitures de la simulation.
+    clear_end_lines():
+        Enlève toutes les fins de voie.
+    vehicles():
+        Donne l'état de toutes les voitures en tableaux.
+    load_vehicles(state):
+        Remplace toutes les voitures par celles de "vehicles".
+    positions():
+        Donne la position de chaque voiture pour l'affichage.
+    record():
+        Enregistre les positions des voitures si c'est le moment.
+    step():
+        Fait avancer la simulation d'un pas de temps.
+    """
+
+    def initialise(self, restrictions=None):
+        """
+        Créée tous les attributs à chaque début de simulation.
+
+        Parameters
+        ----------
+        restrictions : list
+            nouvelles restrictions, on garde les précédentes si None
+
+        Returns
+        -------
+        None
+        """
+
+        self.fleet = Fleet()
+        self.leader = np.zeros(0, np.int64)
+        self.exited = 0
+        BaseEngine.initialise(self, restrictions)
+
+    def end_line(self, x, road):
+        """
+        Créée une voiture morte au bout d'une fin de voie
+
+        Parameters
+        ----------
+        x : float
+            abscisse de la fin de voie en mètre
+        road : int
+            voie sur laquelle on voudrait la positionner
+
+        Returns
+        -------
+        None
+        """
+
+        # chaque fin de voie a son propre numéro négatif
+        name = -1 - int(self.fleet["end"].sum())
+        # on tire aussi le facteur de politesse pour suivre le même tirage que "Car"
+        sc = self.scenario
+        self.fleet.add(name=name, road=road, velocity=1, v0=1, voies=3, end=True,
+                       pos=x + sc.CAR_LENGTH / 2, P=self.random.normalvariate(sc.MOYP, sc.SIGMA),
+                       cooldown_time=self.time, old_leader=NO_LEADER)
+
+    def spawn(self):
+        """
+        Fait apparaître les voitures en fonction du jeu de données.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        # on regarde quelles voitures doivent apparaitre
+        schedule = self.schedule
+        due = schedule.due(self.time)
+        count = due.stop - due.start
+        if count == 0:
+            return None
+        if self.stats is not None:
+            self.stats.count("spawns", count)
+        road = schedule.road[due]
+        sc = self.scenario
+        self.fleet.extend(count,
+                          name=schedule.name[due],
+                          road=road,
+                          velocity=schedule.speed[due],
+                          v0=sc.V0,
+                          voies=3,
+                          pos=- sc.CAR_LENGTH / 2 - queue_offsets(road, sc.CAR_LENGTH + sc.S0),
+                          P=[self.random.normalvariate(sc.MOYP, sc.SIGMA) for _ in range(count)],
+                          cooldown_time=self.time,
+                          old_leader=NO_LEADER,
+                          birth=self.time)
+
+    def place(self, x, road, velocity):
+        """
+        Place des voitures directement sur la route, sans le calendrier d'apparition.
+
+        Sert à partir d'une route déjà remplie (bancs d'essai, conditions
+        initiales). Les voitures sont numérotées après celles du calendrier.
+
+        Parameters
+        ----------
+        x : sequence
+            abscisse de chaque voiture en mètre
+        road : sequence
+            voie de chaque voiture
+        velocity : sequence
+            vitesse de chaque voiture en m/s
+
+        Returns
+        -------
+        None
+        """
+
+        count = len(x)
+        sc = self.scenario
+        first = len(self.schedule) + self.placed
+        self.placed += count
+        self.fleet.extend(count,
+                          name=np.arange(first, first + count),
+                          road=road,
+                          velocity=velocity,
+                          v0=sc.V0,
+                          voies=3,
+                          pos=x,
+                          P=[self.random.normalvariate(sc.MOYP, sc.SIGMA) for _ in range(count)],
+                          cooldown_time=self.time,
+                          old_leader=NO_LEADER,
+                          # sur un anneau le premier tour est incomplet, on ne le compte pas
+                          birth=np.nan if sc.RING else self.time)
+
+    def apply_restrictions(self):
+        """
+        Appliquer les restrictions à tous les véhicules.
+
+        Toutes les zones sont trouvées avec une seule recherche par
+        dichotomie dans le tableau trié des débuts de zone.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        fleet = self.fleet
+        moving = ~fleet["end"]
+        zone = self.zones.find_all(fleet["pos"][moving] + self.scenario.CAR_LENGTH / 2)
+        fleet["v0"][moving] = self.zones.speeds[zone]
+        fleet["voies"][moving] = self.zones.lanes[zone]
+
+    def change_lines(self):
+        """
+        Fait changer de voie en une seule fois toutes les voitures qui le peuvent.
+
+        On reprend la logique de Car.change_line : temps d'observation quand
+        le meneur change, puis pour une voiture au centre test vers la droite
+        et sinon vers la gauche (s'il y a 3 voies), pour une voiture à droite
+        test vers la gauche puis avec le critère vers la droite, pour une
+        voiture à gauche test vers la droite. Tous les tests sont évalués sur
+        le même état puis les conflits sont résolus par "resolve_conflicts".
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        bool
+            True si au moins une voiture a changé de voie
+        """
+
+        fleet = self.fleet
+        now = self.time
+        leader = self.leader
+        road, voies = fleet["road"], fleet["voies"]
+
+        # si notre meneur a changé de voie on prend un temps d'observation
+        names = fleet["name"]
+        lead_name = np.where(leader >= 0, names[np.where(leader >= 0, leader, 0)], NO_LEADER)
+        new_leader = lead_name != fleet["old_leader"]
+        fleet["old_leader"][new_leader] = lead_name[new_leader]
+        fleet["cooldown_time"][new_leader] = now
+
+        # on regarde qui peut changer de voie
+        eligible = ~fleet["end"] & (voies != 1) & (now - fleet["cooldown_time"] > self.scenario.COOLDOWN)
+        car = np.nonzero(eligible)[0]
+        if len(car) == 0:
+            return False
+        follower = get_followers(leader)
+
+        # premier test : à droite depuis le centre, à gauche depuis la droite, à droite depuis la gauche
+        target = np.where(road[car] == 1, 2, 1)
+        LvR = road[car] != 2
+        change, gain, ps, pl = mobil_test(self.scenario, fleet, car, target, LvR, follower[car], leader[car])
+        tests = len(car)
+
+        # second test pour ceux qui ont échoué : à gauche depuis le centre
+        # s'il y a 3 voies, et depuis la droite le critère vers la droite
+        retry = ~change & (((road[car] == 1) & (voies[car] == 3)) | (road[car] == 2))
+        car2 = car[retry]
+        target2 = np.where(road[car2] == 1, 0, 1)
+        LvR2 = road[car2] == 2
+        change2, gain2, ps2, pl2 = mobil_test(self.scenario, fleet, car2, target2, LvR2, follower[car2], leader[car2])
+        tests += len(car2)
+        # chaque test cherche les voisines sur la voie visée
+        if self.stats is not None:
+            self.stats.count("lane_tests", tests)
+            self.stats.count("neighbor_lookups", tests)
+
+        car = np.concatenate((car[change], car2[change2]))
+        if len(car) == 0:
+            return False
+        target = np.concatenate((target[change], target2[change2]))
+        gain = np.concatenate((gain[change], gain2[change2]))
+        ps = np.concatenate((ps[change], ps2[change2]))
+        pl = np.concatenate((pl[change], pl2[change2]))
+
+        touched = np.stack((car, follower[car], leader[car], ps, pl), axis=1)
+        kept = resolve_conflicts(len(fleet), touched, gain)
+        car = car[kept]
+        road[car] = target[kept]
+        fleet["cooldown_time"][car] = now
+        for i in range(len(car)):
+            self.change_line()
+        return True
+
+    def exited_mask(self):
+        """
+        Donne les voitures sorties de la route.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        numpy.ndarray
+            True pour les voitures dont l'arrière dépasse le bout de la route
+        """
+
+        fleet = self.fleet
+        sc = self.scenario
+        return ~fleet["end"] & (fleet["pos"] - sc.CAR_LENGTH / 2 > sc.DISTANCE)
+
+    def wrap(self):
+        """
+        Ramène au début de l'anneau les voitures arrivées au bout.
+
+        Chaque passage compte dans "crossings" et le temps depuis le passage
+        précédent de la voiture dans "travel_times" (un tour).
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        fleet = self.fleet
+        crossed = ~fleet["end"] & (fleet["pos"] >= self.scenario.DISTANCE)
+        if not crossed.any():
+            return None
+        fleet["pos"][crossed] -= self.scenario.DISTANCE
+        self.crossings += int(crossed.sum())
+        lap = self.time - fleet["birth"][crossed]
+        self.travel_times.extend(lap[~np.isnan(lap)].tolist())
+        fleet["birth"][crossed] = self.time
+
+    def remove(self, gone):
+        """
+        Enlève des voitures de la simulation.
+
+        Parameters
+        ----------
+        gone : numpy.ndarray
+            True pour les voitures à enlever
+
+        Returns
+        -------
+        None
+        """
+
+        if gone.any():
+            self.exited += int(gone.sum())
+            if self.stats is not None:
+                self.stats.count("removals", int(gone.sum()))
+            self.travel_times.extend((self.time - self.fleet["birth"][gone]).tolist())
+            self.fleet.remove(gone)
+
+    def clear_end_lines(self):
+        """
+        Enlève toutes les fins de voie.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        self.fleet.remove(self.fleet["end"].copy())
+
+    def vehicles(self):
+        """
+        Donne l'état de toutes les voitures en tableaux (cf BaseEngine.checkpoint).
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        dict
+            chaque colonne de "fleet" et le nombre de sorties
+        """
+
+        # les meneurs ne sont pas gardés : ceux du dernier pas précèdent le retrait des voitures sorties
+        state = {"fleet." + name: self.fleet[name].copy() for name, _ in Fleet.COLUMNS}
+        state["exited"] = np.array(self.exited)
+        return state
+
+    def load_vehicles(self, state):
+        """
+        Remplace toutes les voitures par celles données par "vehicles".
+
+        Parameters
+        ----------
+        state : dict
+            tableaux donnés par "vehicles"
+
+        Returns
+        -------
+        None
+        """
+
+        count = len(state["fleet.name"])
+        self.fleet = Fleet()
+        self.fleet.extend(count, **{name: state["fleet." + name] for name, _ in Fleet.COLUMNS})
+        self.leader = get_leaders(self.fleet["pos"], self.fleet["road"], self.scenario.RING)
+        self.exited = int(state["exited"])
+
+    def positions(self):
+        """
+        Donne la position de chaque voiture pour l'affichage.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        zip
+            ensemble des (abscisse en mètre, voie, fin de voie)
+        """
+
+        fleet = self.fleet
+        return zip(fleet["pos"].tolist(), fleet["road"].tolist(), fleet["end"].tolist())
+
+    def record(self):
+        """
+        Enregistre les positions des voitures si c'est le moment.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        if not self.recorder.due(self.frame):
+            return None
+        fleet = self.fleet
+        cars = ~fleet["end"]
+        self.recorder.record(fleet["name"][cars], self.time, fleet["pos"][cars],
+                             fleet["road"][cars], fleet["velocity"][cars])
+
+    def step(self):
+        """
+        Fait avancer la simulation d'un pas de temps.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+        # chronomètres seulement si STATS est vrai (un test par phase sinon)
+        stats = self.stats
+        if stats is not None:
+            start = perf_counter()
+        self.spawn()
+        if stats is not None:
+            start = stats.lap("spawn", start)
+        self.apply_restrictions()
+        if stats is not None:
+            start = stats.lap("restrictions", start)
+        fleet = self.fleet
+        ring = self.scenario.RING
+        self.leader = get_leaders(fleet["pos"], fleet["road"], ring)
+        if self.change_lines():
+            self.leader = get_leaders(fleet["pos"], fleet["road"], ring)
+        if stats is not None:
+            start = stats.lap("mobil", start)
+        integrate(fleet, self.dt)
+        if ring:
+            # personne ne sort, les écarts avec les meneurs se calculent modulo la longueur
+            self.wrap()
+            update_acceleration(self.scenario, fleet, self.leader)
+        else:
+            # une voiture sortie n'est plus le meneur de personne
+            gone = self.exited_mask()
+            self.leader[(self.leader >= 0) & gone[self.leader]] = -1
+            update_acceleration(self.scenario, fleet, self.leader)
+            self.remove(gone)
+        if stats is not None:
+            start = stats.lap("idm", start)
+        self.record()
+        if stats is not None:
+            stats.lap("record", start)
+        self.clock.tick()
+        self.notify()
+        if stats is not None:
+            stats.end_step(self)